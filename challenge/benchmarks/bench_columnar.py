@@ -0,0 +1,59 @@
+"""
+Row engine against the NumPy columnar engine on numeric filters.
+
+Usage:
+    python -m benchmarks.bench_columnar --size 100 --filters "age>29"
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.data import write_synthetic_csv
+from processor_py.processor import process_csv_file
+
+MEGABYTE = 1024 * 1024
+DEFAULT_FILTERS = "age>29\nexperience<=5"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100, help="Size in MB.")
+    parser.add_argument("--columns", default="name,experience")
+    parser.add_argument("--filters", default=DEFAULT_FILTERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = os.path.join(directory, "data.csv")
+        write_synthetic_csv(
+            csv_file_path, columns=8, size_bytes=arguments.size * MEGABYTE
+        )
+
+        print(f"{'engine':>9} {'seconds':>9} {'MB/s':>8} {'speedup':>8}")
+        baseline = 0.0
+        for engine in ["text", "columnar"]:
+            timings = []
+            for _ in range(arguments.repeat):
+                with open(os.devnull, "w") as devnull:
+                    started_at = time.perf_counter()
+                    process_csv_file(
+                        csv_file_path,
+                        arguments.columns,
+                        arguments.filters,
+                        output=devnull,
+                        engine=engine,
+                    )
+                    timings.append(time.perf_counter() - started_at)
+
+            seconds = min(timings)
+            baseline = baseline or seconds
+            print(
+                f"{engine:>9} {seconds:>9.2f} {arguments.size / seconds:>8.1f} "
+                f"{baseline / seconds:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
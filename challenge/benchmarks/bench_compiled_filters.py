@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of the per-row filter path: line_match against plan_match,
+with the comparisons in definition order and reordered by order_filter_plan.
+
+Rows are tokenized up front so only the filter evaluation is measured.
+
+Usage:
+    python -m benchmarks.bench_compiled_filters --rows 200000
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from benchmarks.data import synthetic_headers, synthetic_row
+from processor_py.filter import compile_filters, line_match, parse_filters, plan_match
+from processor_py.filter import order_filter_plan
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE
+
+DEFAULT_FILTERS = "age>29\nexperience<=30\nname!=name7\ncol4!=none"
+
+
+def best_of(repeat: int, run: Callable[[], int]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--filters", default=DEFAULT_FILTERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    headers = synthetic_headers(arguments.columns)[: arguments.columns]
+    randomizer = random.Random(42)
+    rows: List[List[str]] = [
+        synthetic_row(row_number, arguments.columns, randomizer).split(",")
+        for row_number in range(arguments.rows)
+    ]
+    filter_comparisons = parse_filters(arguments.filters)
+    filter_plan = compile_filters(filter_comparisons, headers)
+    ordered_filter_plan = order_filter_plan(
+        filter_plan, rows[:DEFAULT_SCHEMA_SAMPLE_SIZE]
+    )
+
+    def run_line_match() -> int:
+        return sum(1 for row in rows if line_match(row, headers, filter_comparisons))
+
+    def run_plan_match() -> int:
+        return sum(1 for row in rows if plan_match(row, filter_plan))
+
+    def run_ordered_plan_match() -> int:
+        return sum(1 for row in rows if plan_match(row, ordered_filter_plan))
+
+    assert run_line_match() == run_plan_match() == run_ordered_plan_match()
+
+    line_match_seconds = best_of(arguments.repeat, run_line_match)
+    plan_match_seconds = best_of(arguments.repeat, run_plan_match)
+    ordered_seconds = best_of(arguments.repeat, run_ordered_plan_match)
+
+    print(f"rows:       {arguments.rows}")
+    print(f"line_match: {line_match_seconds:.3f}s")
+    print(f"plan_match: {plan_match_seconds:.3f}s")
+    print(f"speedup:    {line_match_seconds / plan_match_seconds:.1f}x")
+    print(f"ordered:    {ordered_seconds:.3f}s")
+    for stats in ordered_filter_plan.statistics:
+        print(f"    {stats.definition:<20} pass rate {stats.pass_rate:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+/*
+ * Per-call latency of libcsv with a cold and a warm interpreter.
+ *
+ * cold: each sample runs in a forked child that starts the interpreter, runs
+ *       one processCsv call and shuts it down, as the library did on every
+ *       call before libcsv_init.
+ * warm: libcsv_init runs once, then every sample is a single processCsv call.
+ *
+ * Build (from the challenge directory, after python compile.py):
+ *     gcc -O2 -I.. benchmarks/bench_latency.c -o build/bench_latency \
+ *         -Lbuild -lcsv -Wl,-rpath,'$ORIGIN'
+ *
+ * Usage:
+ *     PYTHONPATH=. build/bench_latency [samples]
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <time.h>
+#include <unistd.h>
+#include <fcntl.h>
+#include <sys/wait.h>
+
+#include "libcsv.h"
+
+static const char csv[] = "header1,header2,header3\n1,2,3\n4,5,6\n7,8,9";
+static const char selected_columns[] = "header1,header3";
+static const char row_filter_definitions[] = "header1>1";
+
+static double now(void) {
+    struct timespec timestamp;
+    clock_gettime(CLOCK_MONOTONIC, &timestamp);
+    return timestamp.tv_sec + timestamp.tv_nsec / 1e9;
+}
+
+static int compare_doubles(const void *left, const void *right) {
+    double difference = *(const double *)left - *(const double *)right;
+    return (difference > 0) - (difference < 0);
+}
+
+static void report(const char *name, double *samples, int count) {
+    qsort(samples, count, sizeof(double), compare_doubles);
+
+    double total = 0;
+    for (int index = 0; index < count; index++) {
+        total += samples[index];
+    }
+
+    fprintf(stderr, "%6s %12.3f %12.3f %12.3f\n", name,
+            total / count * 1e3, samples[count / 2] * 1e3, samples[count * 99 / 100] * 1e3);
+}
+
+static double cold_sample(void) {
+    int pipe_descriptors[2];
+    if (pipe(pipe_descriptors) != 0) {
+        perror("pipe");
+        exit(1);
+    }
+
+    pid_t child = fork();
+    if (child == 0) {
+        close(pipe_descriptors[0]);
+        double started_at = now();
+        libcsv_init();
+        processCsv(csv, selected_columns, row_filter_definitions);
+        libcsv_shutdown();
+        double seconds = now() - started_at;
+        write(pipe_descriptors[1], &seconds, sizeof(seconds));
+        _exit(0);
+    }
+
+    close(pipe_descriptors[1]);
+    double seconds = 0;
+    if (read(pipe_descriptors[0], &seconds, sizeof(seconds)) != sizeof(seconds)) {
+        fprintf(stderr, "Cold sample failed\n");
+        exit(1);
+    }
+    close(pipe_descriptors[0]);
+    waitpid(child, NULL, 0);
+    return seconds;
+}
+
+int main(int argc, char *argv[]) {
+    int samples = argc > 1 ? atoi(argv[1]) : 20;
+    if (samples < 1) {
+        samples = 1;
+    }
+
+    int null_descriptor = open("/dev/null", O_WRONLY);
+    dup2(null_descriptor, STDOUT_FILENO);
+    close(null_descriptor);
+
+    double *cold = malloc(samples * sizeof(double));
+    double *warm = malloc(samples * sizeof(double));
+
+    for (int index = 0; index < samples; index++) {
+        cold[index] = cold_sample();
+    }
+
+    double started_at = now();
+    if (libcsv_init() != 0) {
+        return 1;
+    }
+    double init_seconds = now() - started_at;
+
+    for (int index = 0; index < samples; index++) {
+        started_at = now();
+        processCsv(csv, selected_columns, row_filter_definitions);
+        warm[index] = now() - started_at;
+    }
+    libcsv_shutdown();
+
+    fprintf(stderr, "libcsv_init: %.3f ms\n", init_seconds * 1e3);
+    fprintf(stderr, "%6s %12s %12s %12s\n", "mode", "mean ms", "p50 ms", "p99 ms");
+    report("cold", cold, samples);
+    report("warm", warm, samples);
+
+    free(cold);
+    free(warm);
+    return 0;
+}
@@ -0,0 +1,95 @@
+"""
+Regression benchmark for lines_split_lazy on a large in-memory processCsv payload.
+
+The splitter advances a cursor over the original string, so the time per MB
+should stay flat as the payload grows. The previous slicing splitter copied the
+remaining buffer once per line and is only run up to --legacy-max-size.
+
+Usage:
+    python -m benchmarks.bench_lines_split --sizes 1,10,100 --legacy-max-size 4
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+from typing import Callable, Iterator
+
+from benchmarks.data import write_synthetic_csv
+from processor_py.lexer import lines_split_lazy
+from processor_py.processor import process_csv
+
+MEGABYTE = 1024 * 1024
+
+
+def slicing_lines_split_lazy(
+    full_string: str, line_delimiter: str = "\n"
+) -> Iterator[str]:
+    has_other_lines = line_delimiter in full_string
+
+    if not has_other_lines:
+        yield full_string
+        return
+
+    sliced_string = full_string
+
+    while has_other_lines:
+        line_position = sliced_string.find(line_delimiter)
+        yield sliced_string[:line_position]
+
+        sliced_string = sliced_string[line_position + len(line_delimiter) :]
+        has_other_lines = line_delimiter in sliced_string
+
+    if sliced_string:
+        yield sliced_string
+
+    elif full_string.endswith(line_delimiter):
+        yield ""
+
+
+def time_split(
+    csv_data: str, split_lines: Callable[[str, str], Iterator[str]]
+) -> float:
+    started_at = time.perf_counter()
+    for _ in split_lines(csv_data, "\n"):
+        pass
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1,10,100", help="Sizes in MB.")
+    parser.add_argument("--legacy-max-size", type=int, default=4)
+    parser.add_argument("--columns", default="name,experience")
+    parser.add_argument("--filters", default="age>29")
+    arguments = parser.parse_args()
+
+    print(
+        f"{'size MB':>8} {'split s':>9} {'legacy s':>9} "
+        f"{'processCsv s':>13} {'MB/s':>8}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in [int(size) for size in arguments.sizes.split(",")]:
+            csv_file_path = os.path.join(directory, f"{size_mb}mb.csv")
+            write_synthetic_csv(csv_file_path, columns=8, size_bytes=size_mb * MEGABYTE)
+            with open(csv_file_path) as file:
+                csv_data = file.read().rstrip("\n")
+
+            split_seconds = time_split(csv_data, lines_split_lazy)
+            legacy = "-"
+            if size_mb <= arguments.legacy_max_size:
+                legacy = f"{time_split(csv_data, slicing_lines_split_lazy):.2f}"
+
+            started_at = time.perf_counter()
+            process_csv(csv_data, arguments.columns, arguments.filters, io.StringIO())
+            seconds = time.perf_counter() - started_at
+
+            print(
+                f"{size_mb:>8} {split_seconds:>9.2f} {legacy:>9} "
+                f"{seconds:>13.2f} {size_mb / seconds:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
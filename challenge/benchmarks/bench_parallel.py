@@ -0,0 +1,55 @@
+"""
+Parallel byte-range processing benchmark for process_csv_file(workers=N).
+
+Usage:
+    python -m benchmarks.bench_parallel --size 1000 --workers 1,2,4,8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.data import write_synthetic_csv
+from processor_py.processor import process_csv_file
+
+MEGABYTE = 1024 * 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1000, help="Size in MB.")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--columns", default="name,experience")
+    parser.add_argument("--filters", default="age>29\nexperience<=20")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = os.path.join(directory, "data.csv")
+        write_synthetic_csv(
+            csv_file_path, columns=8, size_bytes=arguments.size * MEGABYTE
+        )
+
+        print(f"{'workers':>8} {'seconds':>9} {'MB/s':>8} {'speedup':>8}")
+        baseline = 0.0
+        for workers in [int(value) for value in arguments.workers.split(",")]:
+            with open(os.devnull, "w") as devnull:
+                started_at = time.perf_counter()
+                process_csv_file(
+                    csv_file_path,
+                    arguments.columns,
+                    arguments.filters,
+                    output=devnull,
+                    workers=workers,
+                )
+                seconds = time.perf_counter() - started_at
+
+            baseline = baseline or seconds
+            print(
+                f"{workers:>8} {seconds:>9.2f} {arguments.size / seconds:>8.1f} "
+                f"{baseline / seconds:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
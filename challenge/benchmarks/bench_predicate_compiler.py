@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of the Filter of the processor package: the interpreted
+Comparison path against the predicate generated by PredicateCompiler.
+
+Rows are tokenized up front so only the filter evaluation is measured.
+
+Usage:
+    python -m benchmarks.bench_predicate_compiler --rows 200000
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from benchmarks.data import synthetic_headers, synthetic_row
+from processor.processor.filter import Filter
+
+DEFAULT_FILTERS = "age>29\nexperience<=30\nname!=name7\ncol4!=none"
+
+
+def best_of(repeat: int, run: Callable[[], int]) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--filters", default=DEFAULT_FILTERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    headers = synthetic_headers(arguments.columns)[: arguments.columns]
+    randomizer = random.Random(42)
+    rows: List[List[str]] = [
+        synthetic_row(row_number, arguments.columns, randomizer).split(",")
+        for row_number in range(arguments.rows)
+    ]
+    csv_filter = Filter(arguments.filters, headers)
+
+    def run_interpreted() -> int:
+        return sum(1 for row in rows if csv_filter.is_satisfied_by_interpreted(row))
+
+    def run_compiled() -> int:
+        return sum(1 for row in rows if csv_filter.is_satisfied_by(row))
+
+    assert run_interpreted() == run_compiled()
+
+    interpreted_seconds = best_of(arguments.repeat, run_interpreted)
+    compiled_seconds = best_of(arguments.repeat, run_compiled)
+
+    print(f"rows:        {arguments.rows}")
+    print(f"interpreted: {interpreted_seconds:.3f}s")
+    print(f"compiled:    {compiled_seconds:.3f}s")
+    print(f"speedup:     {interpreted_seconds / compiled_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Projection benchmark on wide rows where only a few columns are selected.
+
+Compares, over the same tokenized rows:
+    - stringify_line over a dict of the selected fields, as processor_py did,
+    - compile_line_serializer, an itemgetter compiled once per query,
+    - Serializer.filter_entries of the processor package, which tests every
+      field of the row against the selected indexes,
+    - Serializer.stringify, which now compiles the projection once per query
+      with processor_py.serializer.compile_projection, so both packages
+      share the projection path,
+and then times a full process_csv_file of a wide file for both packages.
+
+Usage:
+    python -m benchmarks.bench_projection --rows 20000 --columns 500 \\
+        --selected name,col250,col500
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import tempfile
+import time
+from typing import Callable, List
+
+from benchmarks.data import synthetic_headers, synthetic_row, write_synthetic_csv
+from processor import csv_processor
+from processor.processor.processor import ProcessedLazyDataDTO
+from processor.serializer.serializer import Serializer
+from processor_py.lexer import tokenize
+from processor_py.processor import process_csv_file
+from processor_py.serializer import compile_line_serializer, stringify_line
+
+
+def measure(rows: List[List[str]], serialize_row: Callable[[List[str]], str]) -> float:
+    started_at = time.perf_counter()
+    for row in rows:
+        serialize_row(row)
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--columns", type=int, default=500)
+    parser.add_argument("--selected", default="name,col250,col500")
+    arguments = parser.parse_args()
+
+    randomizer = random.Random(42)
+    headers = synthetic_headers(arguments.columns)
+    rows = [
+        tokenize(synthetic_row(row_number, arguments.columns, randomizer), ",")
+        for row_number in range(arguments.rows)
+    ]
+    selected_indexes = {
+        headers.index(column) for column in arguments.selected.split(",")
+    }
+
+    serializer = Serializer(ProcessedLazyDataDTO(headers, iter(rows)))
+
+    serializers = {
+        "stringify_line": lambda row: stringify_line(
+            {index: row[index] for index in selected_indexes}
+        ),
+        "line serializer": compile_line_serializer(selected_indexes),
+        "filter_entries": lambda row: ",".join(
+            serializer.filter_entries(selected_indexes, row)
+        ),
+    }
+
+    print(f"{'projection':>16} {'seconds':>9} {'rows/s':>12}")
+    for name, serialize_row in serializers.items():
+        seconds = measure(rows, serialize_row)
+        print(f"{name:>16} {seconds:>9.3f} {len(rows) / seconds:>12.0f}")
+
+    started_at = time.perf_counter()
+    serializer.stringify(arguments.selected)
+    seconds = time.perf_counter() - started_at
+    print(f"{'Serializer':>16} {seconds:>9.3f} {len(rows) / seconds:>12.0f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = os.path.join(directory, "wide.csv")
+        write_synthetic_csv(
+            csv_file_path, rows=arguments.rows, columns=arguments.columns
+        )
+
+        print(f"\n{'process_csv_file':>16} {'seconds':>9}")
+        for name, process in (
+            ("processor", csv_processor.process_csv_file),
+            ("processor_py", process_csv_file),
+        ):
+            with open(os.devnull, "w") as devnull:
+                with contextlib.redirect_stdout(devnull):
+                    started_at = time.perf_counter()
+                    process(csv_file_path, arguments.selected, "")
+                    seconds = time.perf_counter() - started_at
+            print(f"{name:>16} {seconds:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Streaming output benchmark for processor_py.processor.process_csv_file.
+
+Every matching row is written to the output as soon as it is serialized, so the
+time per MB should stay flat and the peak RSS should not grow with the input.
+
+Usage:
+    python -m benchmarks.bench_streaming_output --sizes 10,100,1000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.data import write_synthetic_csv
+
+MEGABYTE = 1024 * 1024
+
+
+def measure(csv_file_path: str, selected_columns: str, filters: str) -> None:
+    from processor_py.processor import process_csv_file
+
+    with open(os.devnull, "w") as devnull:
+        started_at = time.perf_counter()
+        process_csv_file(csv_file_path, selected_columns, filters, output=devnull)
+        elapsed = time.perf_counter() - started_at
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_kb": peak_rss_kb}))
+
+
+def run(sizes_mb: list[int], selected_columns: str, filters: str) -> None:
+    print(f"{'size MB':>8} {'seconds':>9} {'s/MB':>8} {'MB/s':>8} {'peak RSS MB':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in sizes_mb:
+            csv_file_path = os.path.join(directory, f"{size_mb}mb.csv")
+            write_synthetic_csv(csv_file_path, columns=8, size_bytes=size_mb * MEGABYTE)
+
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.bench_streaming_output",
+                    "--measure",
+                    csv_file_path,
+                    "--columns",
+                    selected_columns,
+                    "--filters",
+                    filters,
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            metrics = json.loads(result.stdout.splitlines()[-1])
+            seconds = metrics["seconds"]
+
+            print(
+                f"{size_mb:>8} {seconds:>9.2f} {seconds / size_mb:>8.4f} "
+                f"{size_mb / seconds:>8.1f} {metrics['peak_rss_kb'] / 1024:>12.1f}"
+            )
+            os.remove(csv_file_path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10,100,1000", help="Sizes in MB.")
+    parser.add_argument("--columns", default="name,age,experience")
+    parser.add_argument("--filters", default="age>18")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+
+    if arguments.measure:
+        measure(arguments.measure, arguments.columns, arguments.filters)
+        return
+
+    run(
+        [int(size) for size in arguments.sizes.split(",")],
+        arguments.columns,
+        arguments.filters,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+/*
+ * Aggregate throughput of processCsvFile called from several host threads.
+ *
+ * Every thread runs the same query over the file, with the rows handed to a
+ * callback that only counts them. With the mmap engine the numeric filters are
+ * evaluated by the compiled scanner without the GIL, so the threads overlap
+ * while they scan and only serialize the matching rows one at a time.
+ *
+ * Build (from the challenge directory, after python compile.py):
+ *     gcc -O2 -I.. benchmarks/bench_threads.c -o build/bench_threads \
+ *         -Lbuild -lcsv -lpthread -Wl,-rpath,'$ORIGIN'
+ *
+ * Usage:
+ *     LIBCSV_ENGINE=mmap PYTHONPATH=. build/bench_threads file.csv \
+ *         [selectedColumns] [rowFilterDefinitions] [queriesPerThread]
+ */
+#include <pthread.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <sys/stat.h>
+#include <time.h>
+
+#include "libcsv.h"
+
+typedef struct {
+    const char *csv_file_path;
+    const char *selected_columns;
+    const char *row_filter_definitions;
+    int queries;
+    size_t output_size;
+    int failures;
+} Worker;
+
+static double now(void) {
+    struct timespec timestamp;
+    clock_gettime(CLOCK_MONOTONIC, &timestamp);
+    return timestamp.tv_sec + timestamp.tv_nsec / 1e9;
+}
+
+static int count_output(const char *data, size_t size, void *context) {
+    (void)data;
+    *(size_t *)context += size;
+    return 0;
+}
+
+static void *run_worker(void *argument) {
+    Worker *worker = argument;
+
+    for (int query = 0; query < worker->queries; query++) {
+        if (processCsvFileWithCallback(worker->csv_file_path, worker->selected_columns,
+                                       worker->row_filter_definitions, count_output,
+                                       &worker->output_size) != 0) {
+            worker->failures++;
+        }
+    }
+
+    return NULL;
+}
+
+int main(int argc, char *argv[]) {
+    if (argc < 2) {
+        fprintf(stderr, "Usage: %s file.csv [selectedColumns] [rowFilterDefinitions] [queriesPerThread]\n", argv[0]);
+        return 1;
+    }
+
+    const char *csv_file_path = argv[1];
+    const char *selected_columns = argc > 2 ? argv[2] : "";
+    const char *row_filter_definitions = argc > 3 ? argv[3] : "";
+    int queries = argc > 4 ? atoi(argv[4]) : 4;
+    const int thread_counts[] = {1, 4, 16};
+
+    struct stat file_stat;
+    if (stat(csv_file_path, &file_stat) != 0) {
+        perror(csv_file_path);
+        return 1;
+    }
+
+    if (libcsv_init() != 0) {
+        return 1;
+    }
+
+    fprintf(stderr, "%8s %10s %10s %12s\n", "threads", "seconds", "queries/s", "MB/s");
+    for (size_t run = 0; run < sizeof(thread_counts) / sizeof(thread_counts[0]); run++) {
+        int thread_count = thread_counts[run];
+        pthread_t threads[thread_count];
+        Worker workers[thread_count];
+
+        double started_at = now();
+        for (int index = 0; index < thread_count; index++) {
+            workers[index] = (Worker){csv_file_path, selected_columns, row_filter_definitions, queries, 0, 0};
+            pthread_create(&threads[index], NULL, run_worker, &workers[index]);
+        }
+
+        int failures = 0;
+        for (int index = 0; index < thread_count; index++) {
+            pthread_join(threads[index], NULL);
+            failures += workers[index].failures;
+        }
+        double seconds = now() - started_at;
+
+        int total_queries = thread_count * queries;
+        double megabytes = (double)file_stat.st_size * total_queries / (1024 * 1024);
+        fprintf(stderr, "%8d %10.2f %10.2f %12.1f%s\n", thread_count, seconds,
+                total_queries / seconds, megabytes / seconds, failures ? " (failures)" : "");
+    }
+
+    libcsv_shutdown();
+    return 0;
+}
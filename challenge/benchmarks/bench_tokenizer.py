@@ -0,0 +1,67 @@
+"""
+Tokenizer benchmark on wide rows where only a few columns are used.
+
+Compares tokenize (str.split of every field) against compile_tokenizer, which
+only materialises the fields reached from the cheaper end of the line, and
+reports the field objects allocated per row with their tracemalloc peak.
+
+Usage:
+    python -m benchmarks.bench_tokenizer --rows 50000 --columns 150 --used 0,1,149
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, List, Tuple
+
+from benchmarks.data import synthetic_row
+from processor_py.lexer import compile_tokenizer, tokenize
+
+
+def measure(
+    lines: List[str], tokenize_line: Callable[[str], List[Any]]
+) -> Tuple[float, int, float]:
+    started_at = time.perf_counter()
+    for line in lines:
+        tokenize_line(line)
+    seconds = time.perf_counter() - started_at
+
+    fields = sum(field is not None for field in tokenize_line(lines[0]))
+
+    tracemalloc.start()
+    tokenized_lines = [tokenize_line(line) for line in lines[:1000]]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tokenized_lines
+
+    return seconds, fields, peak / 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--columns", type=int, default=150)
+    parser.add_argument("--used", default="0,1,149", help="Used column indexes.")
+    arguments = parser.parse_args()
+
+    randomizer = random.Random(42)
+    lines = [
+        synthetic_row(row_number, arguments.columns, randomizer)
+        for row_number in range(arguments.rows)
+    ]
+    used_columns = [int(index) for index in arguments.used.split(",")]
+
+    tokenizers = {
+        "tokenize": lambda line: tokenize(line, ","),
+        "compile_tokenizer": compile_tokenizer(",", arguments.columns, used_columns),
+    }
+
+    print(f"{'tokenizer':>18} {'seconds':>9} {'fields/row':>11} {'bytes/row':>10}")
+    for name, tokenize_line in tokenizers.items():
+        seconds, fields, bytes_per_row = measure(lines, tokenize_line)
+        print(f"{name:>18} {seconds:>9.3f} {fields:>11} {bytes_per_row:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
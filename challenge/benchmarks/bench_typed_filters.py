@@ -0,0 +1,99 @@
+"""
+Filter evaluation benchmark of the typed processor_pyx/filter.pyx.
+
+Compares, over the same tokenized rows:
+    - line_match, the per row dict lookups and int() calls the previous .pyx
+      copied from processor_py, run as Python and compiled by Cython untyped,
+    - the compiled filter plan of processor_py, as Python and compiled untyped,
+    - the typed filter plan of processor_pyx/filter.pyx, which switches on an
+      enum and parses the cells as long long without int().
+
+The .pyx modules are compiled with pyximport (Cython and a C compiler are
+required), the compile time is not measured.
+
+Usage:
+    python -m benchmarks.bench_typed_filters --rows 200000 --filters "age>29"
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+from benchmarks.data import synthetic_headers, synthetic_row
+from benchmarks.pyx import CHALLENGE_DIRECTORY, PYX_DIRECTORY, load_pyx_module
+from processor_py import filter as python_filter
+from processor_py.lexer import tokenize
+
+
+def measure(rows: List[List[str]], row_match: Callable[[List[str]], Any]) -> float:
+    started_at = time.perf_counter()
+    for row in rows:
+        row_match(row)
+    return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--filters", default="age>29\nexperience<=7")
+    arguments = parser.parse_args()
+
+    randomizer = random.Random(42)
+    rows = [
+        tokenize(synthetic_row(row_number, arguments.columns, randomizer), ",")
+        for row_number in range(arguments.rows)
+    ]
+    headers = synthetic_headers(arguments.columns)
+    comparison_map = python_filter.parse_filters(arguments.filters)
+
+    with tempfile.TemporaryDirectory() as build_directory:
+        untyped_path = Path(build_directory) / "untyped_filter.pyx"
+        shutil.copy(CHALLENGE_DIRECTORY / "processor_py" / "filter.py", untyped_path)
+        untyped_filter = load_pyx_module(
+            "untyped_filter", untyped_path, build_directory
+        )
+        typed_filter = load_pyx_module(
+            "filter",
+            PYX_DIRECTORY / "filter.pyx",
+            build_directory,
+        )
+
+        untyped_comparison_map = untyped_filter.parse_filters(arguments.filters)
+        python_plan = python_filter.compile_filters(comparison_map, headers)
+        untyped_plan = untyped_filter.compile_filters(untyped_comparison_map, headers)
+        typed_plan = typed_filter.compile_filters(comparison_map, headers)
+
+        matchers = {
+            "line_match python": lambda row: python_filter.line_match(
+                row, headers, comparison_map
+            ),
+            "line_match cython": lambda row: untyped_filter.line_match(
+                row, headers, untyped_comparison_map
+            ),
+            "plan python": lambda row: python_filter.plan_match(row, python_plan),
+            "plan cython": lambda row: untyped_filter.plan_match(row, untyped_plan),
+            "plan typed pyx": lambda row: typed_filter.plan_match(row, typed_plan),
+        }
+
+        matches = {name: sum(map(match, rows)) for name, match in matchers.items()}
+        if len(set(matches.values())) != 1:
+            raise RuntimeError(f"The matchers disagree: {matches}")
+
+        print(f"{'matcher':>18} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+        baseline = None
+        for name, match in matchers.items():
+            seconds = measure(rows, match)
+            baseline = baseline or seconds
+            print(
+                f"{name:>18} {seconds:>9.3f} {len(rows) / seconds:>12.0f} "
+                f"{baseline / seconds:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
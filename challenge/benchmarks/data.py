@@ -0,0 +1,56 @@
+import random
+from typing import List
+
+DEFAULT_SEED = 42
+
+
+def synthetic_headers(columns: int) -> List[str]:
+    return ["name", "age", "experience"] + [f"col{i}" for i in range(4, columns + 1)]
+
+
+def synthetic_row(row_number: int, columns: int, randomizer: random.Random) -> str:
+    fields = [
+        f"name{row_number}",
+        str(randomizer.randint(18, 99)),
+        str(randomizer.randint(0, 40)),
+    ] + [f"data{row_number}_{i}" for i in range(4, columns + 1)]
+    return ",".join(fields[:columns])
+
+
+def write_synthetic_csv(
+    path: str,
+    rows: int = 0,
+    columns: int = 3,
+    size_bytes: int = 0,
+    seed: int = DEFAULT_SEED,
+) -> int:
+    """
+    Write a synthetic CSV file with a fixed set of numeric and text columns.
+
+    @param path Where the CSV file is written.
+    @param rows Amount of data rows to write, ignored when size_bytes is set.
+    @param columns Amount of columns, the first three are name, age, experience.
+    @param size_bytes Keep writing rows until the file reaches this size.
+    @param seed Seed used for the random numeric columns.
+
+    @return The amount of data rows written.
+    """
+    randomizer = random.Random(seed)
+    columns = max(columns, 1)
+    written_rows = 0
+    written_bytes = 0
+
+    with open(path, "w") as file:
+        header = ",".join(synthetic_headers(columns)[:columns]) + "\n"
+        file.write(header)
+        written_bytes += len(header)
+
+        while (size_bytes and written_bytes < size_bytes) or (
+            not size_bytes and written_rows < rows
+        ):
+            line = synthetic_row(written_rows, columns, randomizer) + "\n"
+            file.write(line)
+            written_bytes += len(line)
+            written_rows += 1
+
+    return written_rows
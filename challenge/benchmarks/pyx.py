@@ -0,0 +1,29 @@
+import importlib.util
+from pathlib import Path
+from types import ModuleType
+
+import pyximport
+
+CHALLENGE_DIRECTORY = Path(__file__).resolve().parents[1]
+PYX_DIRECTORY = CHALLENGE_DIRECTORY / "processor_pyx"
+
+
+def load_pyx_module(name: str, pyx_path: Path, build_directory: str) -> ModuleType:
+    """
+    Compile a .pyx file with pyximport and load it without registering it in
+    sys.modules, so it can share its name with a Python package.
+
+    @param name The module name, the file is pyx_path.parent/name.pyx.
+    @param pyx_path The path to the .pyx file.
+    @param build_directory Where the extension is built, reused between calls.
+
+    @return The compiled module.
+    """
+    importers = pyximport.install(build_dir=build_directory, language_level=3)
+    try:
+        spec = importers[1].find_spec(name, [str(pyx_path.parent)])
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        pyximport.uninstall(*importers)
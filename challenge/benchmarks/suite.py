@@ -0,0 +1,307 @@
+"""
+Benchmark suite comparing the processor, processor_py and processor_pyx
+implementations on the same synthetic CSV.
+
+Each case runs in a fresh interpreter so its peak RSS is not shared with the
+other cases, the rows are written to /dev/null. The results are printed as a
+table and written as JSON, so runs of different commits can be compared.
+
+Cases are named implementation/engine:
+    processor/text        the OOP pipeline of the processor package
+    processor_py/<engine> the functional pipeline, engine text, mmap or columnar
+    processor_pyx/<engine> processor_pyx/processor.pyx compiled with pyximport,
+                          the mmap engine also uses the compiled scanner
+
+The implementations are not fully independent: the processor package reuses
+the column tokenizer (processor_py.lexer.compile_tokenizer), the projection
+(processor_py.serializer.compile_projection) and the filter statistics
+(processor_py.filter.measure_predicates and selectivity_order) of
+processor_py. processor/text and processor_py/text differ in their pipeline
+and their filter evaluation, not in these paths.
+
+Usage:
+    python -m benchmarks.suite --rows 200000 --columns 8 --selectivity 0.1 \\
+        --filter-count 2 --json results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks.data import write_synthetic_csv
+
+MEGABYTE = 1024 * 1024
+AGE_VALUES = range(18, 100)
+DEFAULT_CASES = (
+    "processor/text,processor_py/text,processor_py/mmap,processor_py/columnar,"
+    "processor_pyx/text,processor_pyx/mmap"
+)
+FILE_ONLY_ENGINES = {"mmap", "columnar"}
+
+
+def build_filters(selectivity: float, filter_count: int) -> str:
+    """
+    Build filters keeping about a selectivity fraction of the synthetic rows.
+
+    The first filter is on the uniform age column, the other ones always match
+    so they only add evaluation work.
+    """
+    kept_ages = round(selectivity * len(AGE_VALUES))
+    filters = [f"age>={AGE_VALUES.stop - kept_ages}"]
+    always_true = ["experience>=0", "experience<=40", "age<100", "age>=18"]
+
+    for index in range(filter_count - 1):
+        filters.append(always_true[index % len(always_true)])
+
+    return "\n".join(filters[: max(filter_count, 0)])
+
+
+def load_entry_point(
+    implementation: str, engine: str, entry_point: str, build_directory: str
+) -> Callable[..., None]:
+    if implementation == "processor":
+        from processor import csv_processor
+
+        return getattr(csv_processor, entry_point)  # type: ignore[no-any-return]
+
+    if implementation == "processor_py":
+        from processor_py import processor
+    else:
+        from benchmarks.pyx import PYX_DIRECTORY, load_pyx_module
+        from processor_py import mmap_reader
+
+        processor = load_pyx_module(
+            "processor", PYX_DIRECTORY / "processor.pyx", build_directory
+        )
+        if engine == "mmap":
+            scanner = load_pyx_module(
+                "scanner", PYX_DIRECTORY / "scanner.pyx", build_directory
+            )
+            setattr(mmap_reader, "scan_lines", scanner.scan_lines)
+
+    function = getattr(processor, entry_point)
+    if entry_point == "process_csv_file":
+        return lambda *arguments: function(*arguments, engine=engine)
+
+    return function  # type: ignore[no-any-return]
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss survives exec, so it would report the peak of the parent: the
+    # high water mark of the process memory map is read instead when possible.
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Measure one implementation/engine/entry point, run in the child process.
+    """
+    run = load_entry_point(
+        case["implementation"],
+        case["engine"],
+        case["entry_point"],
+        case["build_directory"],
+    )
+
+    source = case["csv_file_path"]
+    if case["entry_point"] == "process_csv":
+        with open(source) as file:
+            source = file.read().rstrip("\n")
+
+    arguments = (source, case["selected_columns"], case["filters"])
+    baseline_rss = peak_rss_bytes()
+
+    timings = []
+    for _ in range(case["repeat"]):
+        started_at = time.perf_counter()
+        run(*arguments)
+        sys.stdout.flush()
+        timings.append(time.perf_counter() - started_at)
+    rss = peak_rss_bytes()
+
+    allocated_peak = None
+    if case["trace_allocations"]:
+        tracemalloc.start()
+        run(*arguments)
+        sys.stdout.flush()
+        _, allocated_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    seconds = min(timings)
+    return {
+        "case": f"{case['implementation']}/{case['engine']}",
+        "entry_point": case["entry_point"],
+        "seconds": seconds,
+        "rows_per_second": case["rows"] / seconds,
+        "mb_per_second": case["size_bytes"] / MEGABYTE / seconds,
+        "peak_rss_bytes": rss,
+        "baseline_rss_bytes": baseline_rss,
+        "allocated_peak_bytes": allocated_peak,
+    }
+
+
+def run_child() -> None:
+    case = json.loads(sys.stdin.read())
+    result_file = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    os.close(devnull)
+
+    with result_file:
+        json.dump(run_case(case), result_file)
+
+
+def spawn_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.suite", "--child"],
+        input=json.dumps(case),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0 or not completed.stdout:
+        return {
+            "case": f"{case['implementation']}/{case['engine']}",
+            "entry_point": case["entry_point"],
+            "error": completed.stderr.strip().splitlines()[-1:],
+        }
+
+    return json.loads(completed.stdout)  # type: ignore[no-any-return]
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    print(
+        f"{'case':>22} {'entry point':>17} {'seconds':>8} {'rows/s':>10} "
+        f"{'MB/s':>7} {'RSS MB':>7} {'alloc MB':>9}"
+    )
+    for result in results:
+        if "error" in result:
+            print(
+                f"{result['case']:>22} {result['entry_point']:>17} "
+                f"error: {' '.join(result['error'])}"
+            )
+            continue
+
+        allocated = result["allocated_peak_bytes"]
+        allocated_mb = "-" if allocated is None else f"{allocated / MEGABYTE:.1f}"
+        print(
+            f"{result['case']:>22} {result['entry_point']:>17} "
+            f"{result['seconds']:>8.3f} {result['rows_per_second']:>10.0f} "
+            f"{result['mb_per_second']:>7.1f} "
+            f"{result['peak_rss_bytes'] / MEGABYTE:>7.1f} {allocated_mb:>9}"
+        )
+
+
+def main() -> None:
+    if "--child" in sys.argv:
+        run_child()
+        return
+
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--columns", type=int, default=8)
+    parser.add_argument("--selectivity", type=float, default=0.1)
+    parser.add_argument("--filter-count", type=int, default=1)
+    parser.add_argument("--select", default="name,experience")
+    parser.add_argument("--cases", default=DEFAULT_CASES)
+    parser.add_argument("--entry-points", default="process_csv,process_csv_file")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-trace-allocations", action="store_true")
+    parser.add_argument("--json", help="Write the results to this file.")
+    arguments = parser.parse_args()
+
+    filters = build_filters(arguments.selectivity, arguments.filter_count)
+    parameters = {
+        "rows": arguments.rows,
+        "columns": arguments.columns,
+        "selectivity": arguments.selectivity,
+        "filter_count": arguments.filter_count,
+        "selected_columns": arguments.select,
+        "filters": filters,
+        "repeat": arguments.repeat,
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file_path = os.path.join(directory, "data.csv")
+        write_synthetic_csv(
+            csv_file_path, rows=arguments.rows, columns=arguments.columns
+        )
+
+        build_directory = os.path.join(directory, "pyxbld")
+        if "processor_pyx" in arguments.cases:
+            # Build once here, so the compiler does not count in the peak RSS.
+            from benchmarks.pyx import PYX_DIRECTORY, load_pyx_module
+
+            for module_name in ("processor", "scanner"):
+                load_pyx_module(
+                    module_name, PYX_DIRECTORY / f"{module_name}.pyx", build_directory
+                )
+
+        results = []
+        for name in arguments.cases.split(","):
+            implementation, _, engine = name.partition("/")
+            for entry_point in arguments.entry_points.split(","):
+                if entry_point == "process_csv" and engine in FILE_ONLY_ENGINES:
+                    continue
+
+                case = {
+                    "implementation": implementation,
+                    "engine": engine or "text",
+                    "entry_point": entry_point,
+                    "csv_file_path": csv_file_path,
+                    "size_bytes": os.path.getsize(csv_file_path),
+                    "build_directory": build_directory,
+                    "trace_allocations": not arguments.no_trace_allocations,
+                    **parameters,
+                }
+                results.append(spawn_case(case))
+
+    print_table(results)
+
+    report = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "parameters": parameters,
+        "results": results,
+    }
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
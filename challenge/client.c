@@ -0,0 +1,327 @@
+/*
+ * Client of the query server started with `python -m processor_py.server`.
+ *
+ * It provides the processCsvFile functions of libcsv.h with the same
+ * signatures, so hosts link against libcsvclient.so instead of libcsv.so to
+ * send their queries to a warm server instead of embedding the interpreter.
+ * The server socket is read from the LIBCSV_SERVER_SOCKET environment
+ * variable, then defaults to /tmp/libcsv.sock.
+ */
+#include <errno.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/socket.h>
+#include <sys/un.h>
+#include <unistd.h>
+
+#include "../libcsv.h"
+
+#ifndef MSG_NOSIGNAL
+#define MSG_NOSIGNAL 0
+#endif
+
+#define DEFAULT_SOCKET_PATH "/tmp/libcsv.sock"
+#define READ_CHUNK_SIZE 65536
+
+int libcsv_init(void) {
+    return 0;
+}
+
+void libcsv_shutdown(void) {
+}
+
+static int connect_server(void) {
+    const char *socket_path = getenv("LIBCSV_SERVER_SOCKET");
+    if (socket_path == NULL || socket_path[0] == '\0') {
+        socket_path = DEFAULT_SOCKET_PATH;
+    }
+
+    struct sockaddr_un address = {0};
+    address.sun_family = AF_UNIX;
+    if (strlen(socket_path) >= sizeof(address.sun_path)) {
+        fprintf(stderr, "Socket path too long: '%s'", socket_path);
+        return -1;
+    }
+    strcpy(address.sun_path, socket_path);
+
+    int connection = socket(AF_UNIX, SOCK_STREAM, 0);
+    if (connection < 0) {
+        perror("socket");
+        return -1;
+    }
+
+#ifdef SO_NOSIGPIPE
+    int enabled = 1;
+    setsockopt(connection, SOL_SOCKET, SO_NOSIGPIPE, &enabled, sizeof(enabled));
+#endif
+
+    if (connect(connection, (struct sockaddr *)&address, sizeof(address)) != 0) {
+        fprintf(stderr, "Cannot connect to the query server at '%s': %s", socket_path, strerror(errno));
+        close(connection);
+        return -1;
+    }
+
+    return connection;
+}
+
+static int send_all(int connection, const char *data, size_t size) {
+    while (size > 0) {
+        ssize_t sent = send(connection, data, size, MSG_NOSIGNAL);
+        if (sent < 0) {
+            if (errno == EINTR) {
+                continue;
+            }
+            return -1;
+        }
+        data += sent;
+        size -= (size_t)sent;
+    }
+
+    return 0;
+}
+
+static int receive_all(int connection, char *data, size_t size) {
+    while (size > 0) {
+        ssize_t received = recv(connection, data, size, 0);
+        if (received < 0 && errno == EINTR) {
+            continue;
+        }
+        if (received <= 0) {
+            return -1;
+        }
+        data += received;
+        size -= (size_t)received;
+    }
+
+    return 0;
+}
+
+static void put_u32(char *destination, uint32_t value) {
+    for (int index = 3; index >= 0; index--) {
+        destination[index] = (char)(value & 0xFF);
+        value >>= 8;
+    }
+}
+
+static void put_i64(char *destination, int64_t value) {
+    uint64_t bits = (uint64_t)value;
+    for (int index = 7; index >= 0; index--) {
+        destination[index] = (char)(bits & 0xFF);
+        bits >>= 8;
+    }
+}
+
+static uint32_t get_u32(const char *source) {
+    uint32_t value = 0;
+    for (int index = 0; index < 4; index++) {
+        value = (value << 8) | (unsigned char)source[index];
+    }
+    return value;
+}
+
+/*
+ * Encode the length prefixed request of processor_py/server.py.
+ */
+static char *encode_request(const char *fields[3], long limit, long offset, size_t *size) {
+    size_t lengths[3];
+    size_t body_size = 16;
+    for (int index = 0; index < 3; index++) {
+        lengths[index] = strlen(fields[index]);
+        body_size += 4 + lengths[index];
+    }
+
+    char *request = malloc(4 + body_size);
+    if (request == NULL) {
+        return NULL;
+    }
+
+    char *position = request;
+    put_u32(position, (uint32_t)body_size);
+    position += 4;
+    for (int index = 0; index < 3; index++) {
+        put_u32(position, (uint32_t)lengths[index]);
+        memcpy(position + 4, fields[index], lengths[index]);
+        position += 4 + lengths[index];
+    }
+    put_i64(position, limit < 0 ? -1 : (int64_t)limit);
+    put_i64(position + 8, (int64_t)offset);
+
+    *size = 4 + body_size;
+    return request;
+}
+
+/*
+ * Forward the payload of a frame to the callback, or to stdout when it is NULL,
+ * in chunks of at most READ_CHUNK_SIZE bytes.
+ */
+static int forward_payload(int connection, uint32_t size, CsvWriteCallback callback, void *context) {
+    char chunk[READ_CHUNK_SIZE];
+
+    while (size > 0) {
+        size_t chunk_size = size < READ_CHUNK_SIZE ? size : READ_CHUNK_SIZE;
+        if (receive_all(connection, chunk, chunk_size) != 0) {
+            fprintf(stderr, "The query server closed the connection");
+            return -1;
+        }
+
+        if (callback == NULL) {
+            fwrite(chunk, 1, chunk_size, stdout);
+        } else if (callback(chunk, chunk_size, context) != 0) {
+            return -1;
+        }
+        size -= (uint32_t)chunk_size;
+    }
+
+    return 0;
+}
+
+static int report_error(int connection, uint32_t size) {
+    char *message = malloc((size_t)size + 1);
+    if (message == NULL || receive_all(connection, message, size) != 0) {
+        free(message);
+        fprintf(stderr, "The query server closed the connection");
+        return -1;
+    }
+
+    message[size] = '\0';
+    fputs(message, stderr);
+    free(message);
+    return -1;
+}
+
+static int run_query(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    long limit,
+    long offset,
+    CsvWriteCallback callback,
+    void *context
+) {
+    const char *fields[3] = {csvFilePath, selectedColumns, rowFilterDefinitions};
+    size_t request_size = 0;
+    char *request = encode_request(fields, limit, offset, &request_size);
+    if (request == NULL) {
+        return -1;
+    }
+
+    int connection = connect_server();
+    if (connection < 0) {
+        free(request);
+        return -1;
+    }
+
+    int result = send_all(connection, request, request_size);
+    free(request);
+    if (result != 0) {
+        fprintf(stderr, "Cannot send the query: %s", strerror(errno));
+    }
+
+    while (result == 0) {
+        char header[5];
+        if (receive_all(connection, header, sizeof(header)) != 0) {
+            fprintf(stderr, "The query server closed the connection");
+            result = -1;
+            break;
+        }
+
+        uint32_t size = get_u32(header + 1);
+        if (header[0] == 'K') {
+            break;
+        }
+        if (header[0] == 'E') {
+            result = report_error(connection, size);
+        } else {
+            result = forward_payload(connection, size, callback, context);
+        }
+    }
+
+    if (callback == NULL) {
+        fflush(stdout);
+    }
+    close(connection);
+    return result;
+}
+
+static int append_to_buffer(const char *data, size_t size, void *context) {
+    CsvBuffer *buffer = context;
+
+    if (buffer->size + size + 1 > buffer->capacity) {
+        size_t capacity = buffer->capacity ? buffer->capacity : 4096;
+        while (buffer->size + size + 1 > capacity) {
+            capacity *= 2;
+        }
+
+        char *data_grown = realloc(buffer->data, capacity);
+        if (data_grown == NULL) {
+            return -1;
+        }
+        buffer->data = data_grown;
+        buffer->capacity = capacity;
+    }
+
+    memcpy(buffer->data + buffer->size, data, size);
+    buffer->size += size;
+    buffer->data[buffer->size] = '\0';
+    return 0;
+}
+
+void processCsvFile(const char csvFilePath[], const char selectedColumns[], const char rowFilterDefinitions[]) {
+    run_query(csvFilePath, selectedColumns, rowFilterDefinitions, -1, 0, NULL, NULL);
+}
+
+int processCsvFileWithCallback(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    CsvWriteCallback callback,
+    void *context
+) {
+    return run_query(csvFilePath, selectedColumns, rowFilterDefinitions, -1, 0, callback, context);
+}
+
+int processCsvFileToBuffer(const char csvFilePath[], const char selectedColumns[], const char rowFilterDefinitions[], CsvBuffer *buffer) {
+    return processCsvFileWithCallback(csvFilePath, selectedColumns, rowFilterDefinitions, append_to_buffer, buffer);
+}
+
+void processCsvFileLimit(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    long limit,
+    long offset
+) {
+    run_query(csvFilePath, selectedColumns, rowFilterDefinitions, limit, offset, NULL, NULL);
+}
+
+int processCsvFileLimitWithCallback(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    long limit,
+    long offset,
+    CsvWriteCallback callback,
+    void *context
+) {
+    return run_query(csvFilePath, selectedColumns, rowFilterDefinitions, limit, offset, callback, context);
+}
+
+int processCsvFileLimitToBuffer(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    long limit,
+    long offset,
+    CsvBuffer *buffer
+) {
+    return processCsvFileLimitWithCallback(csvFilePath, selectedColumns, rowFilterDefinitions, limit, offset, append_to_buffer, buffer);
+}
+
+void freeCsvBuffer(CsvBuffer *buffer) {
+    free(buffer->data);
+    buffer->data = NULL;
+    buffer->size = 0;
+    buffer->capacity = 0;
+}
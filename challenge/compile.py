@@ -43,6 +43,18 @@ def compile_cython_modules():
 
 def compile_main_binary():
     try:
+        run(
+            [
+                "gcc",
+                "-c",
+                "main.c",
+                "-o",
+                "main.o",
+                "-fPIC",
+                f"-I{sysconfig.get_path('include')}",
+            ],
+            check=True,
+        )
         object_files = [
             os.path.join("processor_pyx", f)
             for f in os.listdir("processor_pyx")
@@ -53,7 +65,9 @@ def compile_main_binary():
             + object_files
             + [
                 f"-L{sysconfig.get_config_var('LIBDIR')}",
-                "-lpython3.10",
+                f"-lpython{sysconfig.get_config_var('LDVERSION')}",
+                "-lpthread",
+                "-ldl",
                 "-Wl,-rpath,/usr/lib",
                 "-static-libgcc",
                 "-static-libstdc++",
@@ -67,6 +81,18 @@ def compile_main_binary():
     return True
 
 
+def compile_client_library():
+    try:
+        run(
+            ["gcc", "-shared", "-fPIC", "client.c", "-o", "libcsvclient.so"],
+            check=True,
+        )
+    except CalledProcessError as e:
+        print(f"Erro na compilação do cliente do servidor de consultas: {e}")
+        return False
+    return True
+
+
 def main():
     if not compile_cython_modules():
         return
@@ -74,10 +100,14 @@ def main():
     if not compile_main_binary():
         return
 
+    if not compile_client_library():
+        return
+
     if not os.path.exists("build"):
         os.makedirs("build")
 
     shutil.move("libcsv.so", "build/libcsv.so")
+    shutil.move("libcsvclient.so", "build/libcsvclient.so")
     list_and_copy_dependencies("build/libcsv.so", "build")
 
     print("Build successful and all .so files moved to build/ directory.")
@@ -2,42 +2,512 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <stddef.h>
+#include <string.h>
 #include <dlfcn.h>
+#include <pthread.h>
+
+#include "../libcsv.h"
 
 #define MODINIT(name)  PyInit_##name
 
 PyMODINIT_FUNC MODINIT(filter)(void);
 PyMODINIT_FUNC MODINIT(lexer)(void);
 PyMODINIT_FUNC MODINIT(processor)(void);
+PyMODINIT_FUNC MODINIT(scanner)(void);
 PyMODINIT_FUNC MODINIT(serializer)(void);
 
-int main(int argc, char *argv[]) {
-    const char *libpython_path = "./build/libpython3.10.so";
+static const char *module_names[] = {"filter", "lexer", "processor", "scanner", "serializer"};
+#define MODULE_COUNT (sizeof(module_names) / sizeof(module_names[0]))
+
+static pthread_mutex_t libcsv_lock = PTHREAD_MUTEX_INITIALIZER;
+static int libcsv_initialized = 0;
+static int libcsv_finalized = 0;
+static int libcsv_owns_interpreter = 0;
+static PyThreadState *libcsv_main_thread = NULL;
+static PyObject *libcsv_modules[MODULE_COUNT];
+static PyObject *process_csv_function = NULL;
+static PyObject *process_csv_file_function = NULL;
+static PyObject *index_csv_file_function = NULL;
+static PyObject *process_csv_file_batch_function = NULL;
 
-    void *handle = dlopen(libpython_path, RTLD_NOW | RTLD_GLOBAL);
-    if (!handle) {
-        fprintf(stderr, "Erro ao carregar %s: %s\n", libpython_path, dlerror());
-        return 1;
+/*
+ * Extension modules imported by the interpreter, such as numpy, resolve the
+ * Python symbols globally, so the libpython this library is linked against is
+ * promoted to RTLD_GLOBAL wherever it was loaded from.
+ */
+static void promote_libpython(void) {
+    Dl_info info;
+    if (!dladdr((void *)&Py_InitializeFromConfig, &info) || info.dli_fname == NULL) {
+        return;
     }
 
-    wchar_t *program = Py_DecodeLocale(argv[0], NULL);
-    if (program == NULL) {
-        fprintf(stderr, "Fatal error: cannot decode argv[0]\n");
-        exit(1);
+    void *handle = dlopen(info.dli_fname, RTLD_NOW | RTLD_GLOBAL | RTLD_NOLOAD);
+    if (handle == NULL) {
+        fprintf(stderr, "Erro ao carregar %s: %s\n", info.dli_fname, dlerror());
+    }
+}
+
+static int import_modules(void) {
+    for (size_t index = 0; index < MODULE_COUNT; index++) {
+        libcsv_modules[index] = PyImport_ImportModule(module_names[index]);
+        if (libcsv_modules[index] == NULL) {
+            PyErr_Print();
+            return -1;
+        }
     }
-    Py_SetProgramName(program);
-    Py_Initialize();
 
+    PyObject *processor = libcsv_modules[2];
+    process_csv_function = PyObject_GetAttrString(processor, "process_csv");
+    process_csv_file_function = PyObject_GetAttrString(processor, "process_csv_file");
+    index_csv_file_function = PyObject_GetAttrString(processor, "index_csv_file");
+    process_csv_file_batch_function = PyObject_GetAttrString(processor, "process_csv_file_batch");
+    if (process_csv_function == NULL || process_csv_file_function == NULL || index_csv_file_function == NULL
+        || process_csv_file_batch_function == NULL) {
+        PyErr_Print();
+        return -1;
+    }
+
+    return 0;
+}
+
+static void release_modules(void) {
+    Py_CLEAR(process_csv_function);
+    Py_CLEAR(process_csv_file_function);
+    Py_CLEAR(index_csv_file_function);
+    Py_CLEAR(process_csv_file_batch_function);
+    for (size_t index = 0; index < MODULE_COUNT; index++) {
+        Py_CLEAR(libcsv_modules[index]);
+    }
+}
+
+static int initialize_interpreter(void) {
     PyImport_AppendInittab("filter", MODINIT(filter));
     PyImport_AppendInittab("lexer", MODINIT(lexer));
     PyImport_AppendInittab("processor", MODINIT(processor));
+    PyImport_AppendInittab("scanner", MODINIT(scanner));
     PyImport_AppendInittab("serializer", MODINIT(serializer));
 
-    Py_Initialize();
+    PyConfig config;
+    PyConfig_InitPythonConfig(&config);
+    config.install_signal_handlers = 0;
 
-    Py_Finalize();
-    PyMem_RawFree(program);
-    dlclose(handle);
+    PyStatus status = PyConfig_SetBytesString(&config, &config.program_name, "libcsv");
+    if (!PyStatus_Exception(status)) {
+        status = Py_InitializeFromConfig(&config);
+    }
+    PyConfig_Clear(&config);
+
+    if (PyStatus_Exception(status)) {
+        fprintf(stderr, "Fatal error: %s\n", status.err_msg ? status.err_msg : "Py_InitializeFromConfig");
+        return -1;
+    }
 
     return 0;
 }
+
+int libcsv_init(void) {
+    int result = 0;
+    pthread_mutex_lock(&libcsv_lock);
+
+    if (libcsv_initialized) {
+        pthread_mutex_unlock(&libcsv_lock);
+        return 0;
+    }
+
+    /* The Cython modules keep static state and cannot be initialized twice. */
+    if (libcsv_finalized) {
+        pthread_mutex_unlock(&libcsv_lock);
+        fprintf(stderr, "libcsv was shut down and cannot be initialized again\n");
+        return -1;
+    }
+
+    promote_libpython();
+
+    PyGILState_STATE gil_state = PyGILState_UNLOCKED;
+    libcsv_owns_interpreter = !Py_IsInitialized();
+    if (libcsv_owns_interpreter) {
+        result = initialize_interpreter();
+    } else {
+        gil_state = PyGILState_Ensure();
+    }
+
+    if (result == 0) {
+        result = import_modules();
+        if (result != 0) {
+            release_modules();
+        }
+    }
+
+    if (libcsv_owns_interpreter) {
+        if (result == 0) {
+            libcsv_main_thread = PyEval_SaveThread();
+        } else if (Py_IsInitialized()) {
+            Py_FinalizeEx();
+        }
+    } else {
+        PyGILState_Release(gil_state);
+    }
+
+    libcsv_initialized = result == 0;
+    pthread_mutex_unlock(&libcsv_lock);
+    return result;
+}
+
+void libcsv_shutdown(void) {
+    pthread_mutex_lock(&libcsv_lock);
+
+    if (!libcsv_initialized) {
+        pthread_mutex_unlock(&libcsv_lock);
+        return;
+    }
+
+    if (libcsv_owns_interpreter) {
+        PyEval_RestoreThread(libcsv_main_thread);
+        libcsv_main_thread = NULL;
+        release_modules();
+        Py_FinalizeEx();
+        libcsv_finalized = 1;
+    } else {
+        PyGILState_STATE gil_state = PyGILState_Ensure();
+        release_modules();
+        PyGILState_Release(gil_state);
+    }
+
+    libcsv_initialized = 0;
+    pthread_mutex_unlock(&libcsv_lock);
+}
+
+/*
+ * Python writer handed to the processor as its output, every write(str) call
+ * is encoded to UTF-8 and forwarded to the C callback.
+ */
+typedef struct {
+    PyObject_HEAD
+    CsvWriteCallback callback;
+    void *context;
+} CallbackWriter;
+
+static PyObject *CallbackWriter_write(CallbackWriter *self, PyObject *text) {
+    Py_ssize_t size = 0;
+    const char *data = PyUnicode_AsUTF8AndSize(text, &size);
+    if (data == NULL) {
+        return NULL;
+    }
+
+    if (size > 0 && self->callback(data, (size_t)size, self->context) != 0) {
+        PyErr_SetString(PyExc_OSError, "The write callback failed");
+        return NULL;
+    }
+
+    return PyLong_FromSsize_t(size);
+}
+
+static PyMethodDef CallbackWriter_methods[] = {
+    {"write", (PyCFunction)CallbackWriter_write, METH_O, NULL},
+    {NULL, NULL, 0, NULL},
+};
+
+static PyTypeObject CallbackWriterType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "libcsv.CallbackWriter",
+    .tp_basicsize = sizeof(CallbackWriter),
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_methods = CallbackWriter_methods,
+};
+
+static PyObject *create_callback_writer(CsvWriteCallback callback, void *context) {
+    if (PyType_Ready(&CallbackWriterType) < 0) {
+        return NULL;
+    }
+
+    CallbackWriter *writer = PyObject_New(CallbackWriter, &CallbackWriterType);
+    if (writer != NULL) {
+        writer->callback = callback;
+        writer->context = context;
+    }
+
+    return (PyObject *)writer;
+}
+
+/*
+ * Errors are already written to stderr by the processor, which then raises
+ * SystemExit: the exception is cleared so the host process keeps running.
+ */
+static int call_processor(PyObject *function, PyObject *arguments, PyObject *keywords) {
+    if (arguments == NULL) {
+        PyErr_Print();
+        return -1;
+    }
+
+    PyObject *result = PyObject_Call(function, arguments, keywords);
+    if (result == NULL) {
+        if (PyErr_ExceptionMatches(PyExc_SystemExit)) {
+            PyErr_Clear();
+        } else {
+            PyErr_Print();
+        }
+        return -1;
+    }
+
+    Py_DECREF(result);
+    return 0;
+}
+
+/*
+ * Build the keyword arguments of a query, only the options that differ from
+ * the processor defaults are passed. A negative limit means no limit.
+ */
+static PyObject *build_keywords(int workers, long limit, long offset) {
+    PyObject *keywords = PyDict_New();
+    if (keywords == NULL) {
+        return NULL;
+    }
+
+    const char *names[] = {"workers", "limit", "offset"};
+    const long values[] = {workers, limit, offset};
+    const int is_set[] = {workers != 1, limit >= 0, offset != 0};
+
+    for (size_t index = 0; index < sizeof(names) / sizeof(names[0]); index++) {
+        if (!is_set[index]) {
+            continue;
+        }
+
+        PyObject *value = PyLong_FromLong(values[index]);
+        if (value == NULL || PyDict_SetItemString(keywords, names[index], value) != 0) {
+            Py_XDECREF(value);
+            Py_DECREF(keywords);
+            return NULL;
+        }
+        Py_DECREF(value);
+    }
+
+    return keywords;
+}
+
+/*
+ * Run a processor function over (source, selectedColumns, rowFilterDefinitions)
+ * writing to stdout when callback is NULL, and to the callback otherwise.
+ */
+static int run_processor(
+    PyObject **function,
+    const char source[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    int workers,
+    long limit,
+    long offset,
+    CsvWriteCallback callback,
+    void *context
+) {
+    if (libcsv_init() != 0) {
+        return -1;
+    }
+
+    int result = -1;
+    PyGILState_STATE gil_state = PyGILState_Ensure();
+
+    PyObject *output = callback == NULL ? Py_NewRef(Py_None) : create_callback_writer(callback, context);
+    PyObject *arguments = NULL;
+    PyObject *keywords = NULL;
+
+    if (output == NULL) {
+        PyErr_Print();
+    } else {
+        arguments = Py_BuildValue("(sssO)", source, selectedColumns, rowFilterDefinitions, output);
+        keywords = build_keywords(workers, limit, offset);
+
+        if (keywords == NULL) {
+            PyErr_Print();
+        } else {
+            result = call_processor(*function, arguments, keywords);
+        }
+    }
+
+    Py_XDECREF(keywords);
+    Py_XDECREF(arguments);
+    Py_XDECREF(output);
+    PyGILState_Release(gil_state);
+    return result;
+}
+
+static int append_to_buffer(const char *data, size_t size, void *context) {
+    CsvBuffer *buffer = context;
+
+    if (buffer->size + size + 1 > buffer->capacity) {
+        size_t capacity = buffer->capacity ? buffer->capacity : 4096;
+        while (buffer->size + size + 1 > capacity) {
+            capacity *= 2;
+        }
+
+        char *data_grown = realloc(buffer->data, capacity);
+        if (data_grown == NULL) {
+            return -1;
+        }
+        buffer->data = data_grown;
+        buffer->capacity = capacity;
+    }
+
+    memcpy(buffer->data + buffer->size, data, size);
+    buffer->size += size;
+    buffer->data[buffer->size] = '\0';
+    return 0;
+}
+
+void processCsv(const char csv[], const char selectedColumns[], const char rowFilterDefinitions[]) {
+    run_processor(&process_csv_function, csv, selectedColumns, rowFilterDefinitions, 1, -1, 0, NULL, NULL);
+}
+
+void processCsvFile(const char csvFilePath[], const char selectedColumns[], const char rowFilterDefinitions[]) {
+    run_processor(&process_csv_file_function, csvFilePath, selectedColumns, rowFilterDefinitions, 1, -1, 0, NULL, NULL);
+}
+
+void processCsvFileParallel(const char csvFilePath[], const char selectedColumns[], const char rowFilterDefinitions[], int workers) {
+    run_processor(&process_csv_file_function, csvFilePath, selectedColumns, rowFilterDefinitions, workers, -1, 0, NULL, NULL);
+}
+
+int processCsvWithCallback(
+    const char csv[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    CsvWriteCallback callback,
+    void *context
+) {
+    return run_processor(&process_csv_function, csv, selectedColumns, rowFilterDefinitions, 1, -1, 0, callback, context);
+}
+
+int processCsvFileWithCallback(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    CsvWriteCallback callback,
+    void *context
+) {
+    return run_processor(&process_csv_file_function, csvFilePath, selectedColumns, rowFilterDefinitions, 1, -1, 0, callback, context);
+}
+
+int processCsvToBuffer(const char csv[], const char selectedColumns[], const char rowFilterDefinitions[], CsvBuffer *buffer) {
+    return processCsvWithCallback(csv, selectedColumns, rowFilterDefinitions, append_to_buffer, buffer);
+}
+
+int processCsvFileToBuffer(const char csvFilePath[], const char selectedColumns[], const char rowFilterDefinitions[], CsvBuffer *buffer) {
+    return processCsvFileWithCallback(csvFilePath, selectedColumns, rowFilterDefinitions, append_to_buffer, buffer);
+}
+
+void processCsvFileLimit(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    long limit,
+    long offset
+) {
+    run_processor(&process_csv_file_function, csvFilePath, selectedColumns, rowFilterDefinitions, 1, limit, offset, NULL, NULL);
+}
+
+int processCsvFileLimitWithCallback(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    long limit,
+    long offset,
+    CsvWriteCallback callback,
+    void *context
+) {
+    return run_processor(&process_csv_file_function, csvFilePath, selectedColumns, rowFilterDefinitions, 1, limit, offset, callback, context);
+}
+
+int processCsvFileLimitToBuffer(
+    const char csvFilePath[],
+    const char selectedColumns[],
+    const char rowFilterDefinitions[],
+    long limit,
+    long offset,
+    CsvBuffer *buffer
+) {
+    return processCsvFileLimitWithCallback(csvFilePath, selectedColumns, rowFilterDefinitions, limit, offset, append_to_buffer, buffer);
+}
+
+int indexCsvFile(const char csvFilePath[], const char indexedColumns[]) {
+    if (libcsv_init() != 0) {
+        return -1;
+    }
+
+    PyGILState_STATE gil_state = PyGILState_Ensure();
+    PyObject *arguments = Py_BuildValue("(ss)", csvFilePath, indexedColumns);
+    int result = call_processor(index_csv_file_function, arguments, NULL);
+    Py_XDECREF(arguments);
+    PyGILState_Release(gil_state);
+    return result;
+}
+
+static int same_output(const CsvQuery *query, const CsvQuery *other) {
+    return query->callback == other->callback && query->context == other->context && query->buffer == other->buffer;
+}
+
+/*
+ * Create the output of a query, the one of an earlier query when they share a
+ * callback and context or a buffer, so their rows are written in query order.
+ */
+static PyObject *create_query_output(const CsvQuery queries[], size_t index, PyObject *query_list) {
+    const CsvQuery *query = &queries[index];
+
+    for (size_t previous = 0; previous < index; previous++) {
+        if (same_output(query, &queries[previous])) {
+            PyObject *previous_item = PyList_GET_ITEM(query_list, (Py_ssize_t)previous);
+            return Py_NewRef(PyTuple_GET_ITEM(previous_item, 2));
+        }
+    }
+
+    if (query->callback != NULL) {
+        return create_callback_writer(query->callback, query->context);
+    }
+    if (query->buffer != NULL) {
+        return create_callback_writer(append_to_buffer, query->buffer);
+    }
+    return Py_NewRef(Py_None);
+}
+
+/*
+ * Build the (selectedColumns, rowFilterDefinitions, output) tuples handed to
+ * process_csv_file_batch.
+ */
+static PyObject *build_batch_queries(const CsvQuery queries[], size_t queryCount) {
+    PyObject *query_list = PyList_New((Py_ssize_t)queryCount);
+    if (query_list == NULL) {
+        return NULL;
+    }
+
+    for (size_t index = 0; index < queryCount; index++) {
+        const CsvQuery *query = &queries[index];
+        PyObject *output = create_query_output(queries, index, query_list);
+
+        PyObject *item = output == NULL ? NULL : Py_BuildValue("(ssN)", query->selectedColumns, query->rowFilterDefinitions, output);
+        if (item == NULL) {
+            Py_DECREF(query_list);
+            return NULL;
+        }
+        PyList_SET_ITEM(query_list, (Py_ssize_t)index, item);
+    }
+
+    return query_list;
+}
+
+int processCsvFileBatch(const char csvFilePath[], const CsvQuery queries[], size_t queryCount) {
+    if (libcsv_init() != 0) {
+        return -1;
+    }
+
+    PyGILState_STATE gil_state = PyGILState_Ensure();
+    PyObject *query_list = build_batch_queries(queries, queryCount);
+    PyObject *arguments = query_list == NULL ? NULL : Py_BuildValue("(sN)", csvFilePath, query_list);
+    int result = call_processor(process_csv_file_batch_function, arguments, NULL);
+    Py_XDECREF(arguments);
+    PyGILState_Release(gil_state);
+    return result;
+}
+
+void freeCsvBuffer(CsvBuffer *buffer) {
+    free(buffer->data);
+    buffer->data = NULL;
+    buffer->size = 0;
+    buffer->capacity = 0;
+}
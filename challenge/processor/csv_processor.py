@@ -1,11 +1,74 @@
+import sys
+from itertools import chain, islice
 from processor.processor.filter import Filter
 from processor.processor.processor import Processor
 from processor.serializer.serializer import Serializer
+from processor.transformer.lexer import Lexer
 from processor.transformer.transformer import TransformerFactory
+from processor.transformer.transformer_strategy import CSVTransformedDataDTO
+from processor_py.profiling import Profiler, ProfileOption, measure, profile_query
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE
+from typing import List, Optional
+
+
+def used_columns(
+    selected_columns: str, row_filter_definitions: str
+) -> Optional[List[str]]:
+    """
+    List the columns read by the query, None when every column is selected.
+
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+
+    @return The selected and the filtered columns.
+    """
+    if not selected_columns:
+        return None
+
+    return Lexer(delimiter=",").tokenize(selected_columns) + Filter.referenced_headers(
+        row_filter_definitions
+    )
+
+
+def build_filter(
+    row_filter_definitions: str,
+    transformed_lazy_data_DTO: CSVTransformedDataDTO,
+    profiler: Optional[Profiler] = None,
+) -> Filter:
+    """
+    Build the filter of the query, its columns are checked in the order found
+    the cheapest and most selective over the first rows.
+
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param transformed_lazy_data_DTO The headers and the rows of the CSV data,
+    the sampled rows are put back in front of the rows.
+    @param profiler Records the chosen order under the "filter_order" detail.
+
+    @return The filter.
+    """
+    sampled_rows = list(
+        islice(transformed_lazy_data_DTO.rows, DEFAULT_SCHEMA_SAMPLE_SIZE)
+    )
+    transformed_lazy_data_DTO.rows = chain(sampled_rows, transformed_lazy_data_DTO.rows)
+
+    csv_filter = Filter(
+        row_filter_definitions, transformed_lazy_data_DTO.headers, sampled_rows
+    )
+    if profiler is not None and csv_filter.statistics:
+        profiler.describe(
+            "filter_order", (stats._asdict() for stats in csv_filter.statistics)
+        )
+
+    return csv_filter
 
 
 def process_csv(
-    csv_data: str, selected_columns: str, row_filter_definitions: str
+    csv_data: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    profile: ProfileOption = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
 ) -> None:
     """
     Process the CSV data by applying filters and selecting columns.
@@ -13,26 +76,46 @@ def process_csv(
     @param csv The CSV data to be processed.
     @param selectedColumns The columns to be selected from the CSV data.
     @param rowFilterDefinitions The filters to be applied to the CSV data.
+    @param profile Records the time, calls and rows of each stage, see
+    processor_py.profiling.resolve_profile.
+    @param limit The maximum amount of matching rows printed, all when None.
+    @param offset The amount of matching rows skipped.
 
     @return void
     """
-    csv_transformer = TransformerFactory.create_csv_transformer(line_delimiter=",")
-
-    transformed_lazy_data_DTO = csv_transformer.data_transform_lazy(csv_data)
-
-    csv_filter = Filter(row_filter_definitions, transformed_lazy_data_DTO.headers)
+    with profile_query(profile) as profiler:
+        csv_transformer = TransformerFactory.create_csv_transformer(
+            line_delimiter=",",
+            used_columns=used_columns(selected_columns, row_filter_definitions),
+            profiler=profiler,
+        )
+
+        transformed_lazy_data_DTO = csv_transformer.data_transform_lazy(csv_data)
+
+        with measure(profiler, "parse_filters"):
+            csv_filter = build_filter(
+                row_filter_definitions, transformed_lazy_data_DTO, profiler
+            )
 
-    processed_lazy_data_DTO = Processor(transformed_lazy_data_DTO, csv_filter)
+        processed_lazy_data_DTO = Processor(
+            transformed_lazy_data_DTO, csv_filter, profiler
+        )
 
-    serialized_data = Serializer(processed_lazy_data_DTO.build_lazy()).stringify(
-        selected_columns
-    )
+        with measure(profiler, "stringify"):
+            Serializer(processed_lazy_data_DTO.build_lazy(limit, offset)).write_to(
+                sys.stdout, selected_columns
+            )
 
-    print(serialized_data)
+        sys.stdout.write("\n")
 
 
 def process_csv_file(
-    csv_file_path: str, selected_columns: str, row_filter_definitions: str
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    profile: ProfileOption = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
 ) -> None:
     """
     Process the CSV file by applying filters and selecting columns.
@@ -40,26 +123,36 @@ def process_csv_file(
     @param csvFilePath The path to the CSV file to be processed.
     @param selectedColumns The columns to be selected from the CSV data.
     @param rowFilterDefinitions The filters to be applied to the CSV data.
+    @param profile Records the time, calls and rows of each stage, see
+    processor_py.profiling.resolve_profile.
+    @param limit The maximum amount of matching rows printed, all when None.
+    @param offset The amount of matching rows skipped.
 
     @return void
     """
     try:
-        with open(csv_file_path, "r") as file:
+        with profile_query(profile) as profiler, open(csv_file_path, "r") as file:
             csv_transformer = TransformerFactory.create_csv_transformer(
-                line_delimiter=","
+                line_delimiter=",",
+                used_columns=used_columns(selected_columns, row_filter_definitions),
+                profiler=profiler,
             )
             transformed_lazy_data_DTO = csv_transformer.file_transform_lazy(file)
 
-            csv_filter = Filter(
-                row_filter_definitions, transformed_lazy_data_DTO.headers
+            with measure(profiler, "parse_filters"):
+                csv_filter = build_filter(
+                    row_filter_definitions, transformed_lazy_data_DTO, profiler
+                )
+            processed_lazy_data_DTO = Processor(
+                transformed_lazy_data_DTO, csv_filter, profiler
             )
-            processed_lazy_data_DTO = Processor(transformed_lazy_data_DTO, csv_filter)
 
-            serialized_data = Serializer(
-                processed_lazy_data_DTO.build_lazy()
-            ).stringify(selected_columns)
+            with measure(profiler, "stringify"):
+                Serializer(processed_lazy_data_DTO.build_lazy(limit, offset)).write_to(
+                    sys.stdout, selected_columns
+                )
 
-            print(serialized_data)
+            sys.stdout.write("\n")
     except FileNotFoundError:
         print(f"File not found: {csv_file_path}")
     except Exception as e:
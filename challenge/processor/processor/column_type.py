@@ -0,0 +1,64 @@
+from enum import Enum
+from typing import Dict, Iterable, List, Sequence
+
+
+class ColumnTypeEnum(Enum):
+    INT = "int"
+    FLOAT = "float"
+    STRING = "string"
+
+
+class ColumnTypeInferrer:
+    """
+    A class used to classify the filtered columns as int, float or string
+    from the first rows, so the comparisons of a column only try int() on
+    the cells that can be integers.
+    """
+
+    @staticmethod
+    def infer(values: Iterable[str]) -> ColumnTypeEnum:
+        column_type = ColumnTypeEnum.INT
+
+        for value in values:
+            if not value:
+                continue
+
+            if column_type is ColumnTypeEnum.INT:
+                try:
+                    int(value)
+                    continue
+                except ValueError:
+                    column_type = ColumnTypeEnum.FLOAT
+
+            try:
+                float(value)
+            except ValueError:
+                return ColumnTypeEnum.STRING
+
+        return column_type
+
+    @staticmethod
+    def infer_columns(
+        headers: Sequence[str],
+        column_names: Iterable[str],
+        sampled_rows: Sequence[List[str]],
+    ) -> Dict[str, ColumnTypeEnum]:
+        """
+        @param column_names The columns to classify, the ones missing from the
+        headers are skipped.
+        @param sampled_rows The first rows of the CSV data.
+
+        @return The column type of each column name found in the headers.
+        """
+        column_types: Dict[str, ColumnTypeEnum] = {}
+
+        for column_name in column_names:
+            if column_name in column_types or column_name not in headers:
+                continue
+
+            column_index = headers.index(column_name)
+            column_types[column_name] = ColumnTypeInferrer.infer(
+                row[column_index] for row in sampled_rows if column_index < len(row)
+            )
+
+        return column_types
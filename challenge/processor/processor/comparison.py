@@ -1,4 +1,5 @@
-from typing import List, Generic, TypeVar, Union
+from typing import List, Generic, Optional, TypeVar, Union
+from processor.processor.column_type import ColumnTypeEnum
 from processor.processor.comparison_type_enum import ComparisonTypeEnum
 
 ComparisonType = TypeVar("ComparisonType", int, str)
@@ -10,12 +11,14 @@ class Comparison(Generic[ComparisonType]):
         comparison_header: str,
         comparison_type: ComparisonTypeEnum,
         reference_value: Union[str, int],
+        column_type: Optional[ColumnTypeEnum] = None,
     ):
         if not isinstance(comparison_type, ComparisonTypeEnum):
             raise ValueError(f"Invalid comparison type: {comparison_type}")
         self.comparison_header = comparison_header
         self.reference_value: Union[str, int] = reference_value
         self.comparison_type: ComparisonTypeEnum = comparison_type
+        self.column_type: Optional[ColumnTypeEnum] = column_type
 
     def is_satisfied_by(self, comparison_value: Union[str, int]) -> bool:
         return self.__is_satisfied_by(
@@ -23,11 +26,31 @@ class Comparison(Generic[ComparisonType]):
         )
 
     def cast_many(self, values: List[Union[str, int]]) -> List[Union[str, int]]:
+        """
+        Cast the values to integers when all of them are integers, to text
+        otherwise. The column type spares the int() of the cells that cannot
+        be integers, any other cell is cast as without a column type.
+
+        @return The cast values.
+        """
+        if not all(self._may_be_int(value) for value in values):
+            return [str(value) for value in values]
+
         try:
             return [int(value) for value in values]
         except ValueError:
             return [str(value) for value in values]
 
+    def _may_be_int(self, value: Union[str, int]) -> bool:
+        if isinstance(value, int) or self.column_type in (None, ColumnTypeEnum.INT):
+            return True
+
+        if self.column_type is ColumnTypeEnum.FLOAT:
+            return "." not in value
+
+        head = value[:1]
+        return head.isdigit() or head in ("+", "-") or head.isspace()
+
     def __is_satisfied_by(
         self, comparison: Union[str, int], reference: Union[str, int]
     ) -> bool:
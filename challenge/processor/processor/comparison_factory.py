@@ -37,6 +37,24 @@ class ComparisonFactory:
 
         return [header, operator, value]
 
+    @staticmethod
+    def referenced_headers(
+        full_filter_string: str, valid_sorted_operators: List[str]
+    ) -> List[str]:
+        headers: List[str] = []
+
+        for filter in full_filter_string.split("\n"):
+            try:
+                header, _, _ = ComparisonFactory.tokenize_filter(
+                    filter, valid_sorted_operators
+                )
+            except InvalidFilterError:
+                continue
+
+            headers.append(header)
+
+        return headers
+
     @staticmethod
     def parse_filters(
         full_filter_string: str,
@@ -1,38 +1,77 @@
-from typing import Dict, List
+from typing import Dict, List, Sequence
 
+from processor.processor.column_type import ColumnTypeInferrer
 from processor.processor.comparison import Comparison
 from processor.processor.comparison_factory import ComparisonFactory
 from processor.processor.comparison_type_enum import ComparisonTypeEnum
+from processor.processor.predicate_compiler import Predicate, PredicateCompiler
+from processor_py.filter import PredicateStats
 
 
 class Filter:
-    def __init__(self, full_filter_string: str, headers: List[str]):
+    def __init__(
+        self,
+        full_filter_string: str,
+        headers: List[str],
+        sampled_rows: Sequence[List[str]] = (),
+    ):
+        self.statistics: List[PredicateStats] = []
         self.comparisons: Dict[str, List[Comparison[str]]] = {
             header: [] for header in headers
         }
 
         self.headers = headers
         if full_filter_string == "":
+            self.predicate: Predicate = PredicateCompiler.compile(
+                headers, self.comparisons
+            )
             return
 
-        operators_sorted = sorted(
-            [op.value for op in ComparisonTypeEnum], key=len, reverse=True
-        )
-
         comparisons = ComparisonFactory.parse_filters(
             full_filter_string=full_filter_string,
             valid_columns=headers,
-            valid_sorted_operators=operators_sorted,
+            valid_sorted_operators=Filter.sorted_operators(),
         )
 
+        column_types = ColumnTypeInferrer.infer_columns(
+            headers,
+            (comparison.comparison_header for comparison in comparisons),
+            sampled_rows,
+        )
         for comparison in comparisons:
             if comparison.comparison_header in self.comparisons:
                 comparison_header = comparison.comparison_header
+                comparison.column_type = column_types.get(comparison_header)
                 self.comparisons[comparison_header].append(comparison)
 
         self.headers = headers
+        header_positions, self.statistics = PredicateCompiler.order_positions(
+            headers, self.comparisons, sampled_rows
+        )
+        self.predicate = PredicateCompiler.compile(
+            headers, self.comparisons, header_positions
+        )
+
+    @staticmethod
+    def sorted_operators() -> List[str]:
+        return sorted([op.value for op in ComparisonTypeEnum], key=len, reverse=True)
+
+    @staticmethod
+    def referenced_headers(full_filter_string: str) -> List[str]:
+        return ComparisonFactory.referenced_headers(
+            full_filter_string, Filter.sorted_operators()
+        )
 
     def is_satisfied_by(self, row: List[str]) -> bool:
+        return self.predicate(row)
+
+    def is_satisfied_by_interpreted(self, row: List[str]) -> bool:
+        """
+        Evaluate each Comparison in turn, the reference of the generated
+        predicate used by is_satisfied_by.
+
+        @return Whether the row matches every comparison.
+        """
         is_match = True
         for header_position, header in enumerate(self.headers):
             header_comparisons = self.comparisons.get(header)
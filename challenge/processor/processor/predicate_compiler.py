@@ -0,0 +1,243 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from processor.processor.column_type import ColumnTypeEnum
+from processor.processor.comparison import Comparison
+from processor.processor.comparison_type_enum import ComparisonTypeEnum
+from processor_py.filter import PredicateStats, measure_predicates
+from processor_py.filter import selectivity_order
+
+Predicate = Callable[[List[str]], bool]
+
+PYTHON_OPERATORS = {
+    ComparisonTypeEnum.EQUAL: "==",
+    ComparisonTypeEnum.GREATER_THAN: ">",
+    ComparisonTypeEnum.LESS_THAN: "<",
+    ComparisonTypeEnum.NOT_EQUAL: "!=",
+    ComparisonTypeEnum.GREATER_OR_EQUAL: ">=",
+    ComparisonTypeEnum.LESS_OR_EQUAL: "<=",
+}
+
+PREDICATE_CACHE_SIZE = 256
+
+
+def _parse_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class PredicateCompiler:
+    """
+    A class used to turn the comparisons of a Filter into the source of a
+    single function, compiled once per distinct source.
+
+    The generated function keeps the semantics of Comparison.is_satisfied_by:
+    a cell and a reference are compared as integers when both are integers,
+    as text otherwise, and the function returns at the first column failing
+    its comparisons.
+    """
+
+    @staticmethod
+    def filtered_positions(
+        headers: Sequence[str], comparisons: Dict[str, List[Comparison[str]]]
+    ) -> List[int]:
+        """
+        @return The positions of the columns having comparisons.
+        """
+        return [
+            header_position
+            for header_position, header in enumerate(headers)
+            if comparisons.get(header)
+        ]
+
+    @staticmethod
+    def text_guard(cell: str, column_type: Optional[ColumnTypeEnum]) -> Optional[str]:
+        """
+        @return The condition on the cell telling it cannot be an integer,
+        None when the type of the column does not tell, see
+        Comparison.cast_many.
+        """
+        if column_type is ColumnTypeEnum.FLOAT:
+            return f"'.' in {cell}"
+        if column_type is ColumnTypeEnum.STRING:
+            head = f"{cell}[:1]"
+            return (
+                f"not ({head}.isdigit() or {head} in ('+', '-')"
+                f" or {head}.isspace())"
+            )
+        return None
+
+    @staticmethod
+    def generate_checks(
+        headers: Sequence[str],
+        comparisons: Dict[str, List[Comparison[str]]],
+        header_positions: Sequence[int],
+        indent: str,
+    ) -> List[str]:
+        """
+        @return The lines returning False at the first of the columns failing
+        its comparisons, checked in the order of the positions.
+        """
+        lines = []
+
+        for header_position in header_positions:
+            header_comparisons = comparisons[headers[header_position]]
+
+            cell = f"cell_{header_position}"
+            number = f"number_{header_position}"
+            text_conditions = []
+            number_conditions = []
+            for comparison in header_comparisons:
+                operator = PYTHON_OPERATORS[comparison.comparison_type]
+                reference = str(comparison.reference_value)
+                text_condition = f"{cell} {operator} {reference!r}"
+                number_reference = _parse_int(reference)
+
+                text_conditions.append(text_condition)
+                number_conditions.append(
+                    text_condition
+                    if number_reference is None
+                    else f"{number} {operator} {number_reference!r}"
+                )
+
+            lines.append(f"{indent}{cell} = row[{header_position}]")
+            if number_conditions == text_conditions:
+                lines.append(f"{indent}if not ({' and '.join(text_conditions)}):")
+                lines.append(f"{indent}    return False")
+                continue
+
+            number_indent = indent
+            text_guard = PredicateCompiler.text_guard(
+                cell, header_comparisons[0].column_type
+            )
+            if text_guard is not None:
+                lines.append(f"{indent}if {text_guard}:")
+                lines.append(f"{indent}    if not ({' and '.join(text_conditions)}):")
+                lines.append(f"{indent}        return False")
+                lines.append(f"{indent}else:")
+                number_indent = indent + "    "
+
+            lines.append(f"{number_indent}try:")
+            lines.append(f"{number_indent}    {number} = int({cell})")
+            lines.append(f"{number_indent}except ValueError:")
+            lines.append(
+                f"{number_indent}    if not ({' and '.join(text_conditions)}):"
+            )
+            lines.append(f"{number_indent}        return False")
+            lines.append(f"{number_indent}else:")
+            lines.append(
+                f"{number_indent}    if not ({' and '.join(number_conditions)}):"
+            )
+            lines.append(f"{number_indent}        return False")
+
+        return lines
+
+    @staticmethod
+    def generate_source(
+        headers: Sequence[str],
+        comparisons: Dict[str, List[Comparison[str]]],
+        header_positions: Optional[Sequence[int]] = None,
+    ) -> str:
+        """
+        @param header_positions The columns to be checked, in that order.
+        Defaults to every filtered column, in the order of the headers. Rows
+        too short to hold every one of them are checked in the order of the
+        headers, so they are rejected, or fail, as without the order.
+
+        @return The source of a `predicate(row)` function.
+        """
+        if header_positions is None:
+            header_positions = PredicateCompiler.filtered_positions(
+                headers, comparisons
+            )
+        ordered_positions = sorted(header_positions)
+
+        lines = ["def predicate(row):"]
+        if list(header_positions) != ordered_positions:
+            lines.append(f"    if len(row) > {ordered_positions[-1]}:")
+            lines.extend(
+                PredicateCompiler.generate_checks(
+                    headers, comparisons, header_positions, "        "
+                )
+            )
+            lines.append("        return True")
+
+        lines.extend(
+            PredicateCompiler.generate_checks(
+                headers, comparisons, ordered_positions, "    "
+            )
+        )
+        lines.append("    return True")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    @lru_cache(maxsize=PREDICATE_CACHE_SIZE)
+    def compile_source(source: str) -> Predicate:
+        """
+        @return The function defined by the source of generate_source.
+        """
+        namespace: Dict[str, Any] = {}
+        exec(compile(source, "<filter>", "exec"), namespace)
+        predicate: Predicate = namespace["predicate"]
+        return predicate
+
+    @staticmethod
+    def compile(
+        headers: Sequence[str],
+        comparisons: Dict[str, List[Comparison[str]]],
+        header_positions: Optional[Sequence[int]] = None,
+    ) -> Predicate:
+        return PredicateCompiler.compile_source(
+            PredicateCompiler.generate_source(headers, comparisons, header_positions)
+        )
+
+    @staticmethod
+    def order_positions(
+        headers: Sequence[str],
+        comparisons: Dict[str, List[Comparison[str]]],
+        sampled_rows: Sequence[List[str]],
+    ) -> Tuple[List[int], List[PredicateStats]]:
+        """
+        Order the filtered columns by the cost and the pass rate of their
+        comparisons over the sampled rows, see
+        processor_py.filter.selectivity_order.
+
+        @param sampled_rows The first rows of the CSV data, the ones too short
+        to hold every filtered column are ignored.
+
+        @return The positions of the filtered columns in evaluation order and
+        their statistics, the order of the headers and no statistics when no
+        sampled row can be evaluated.
+        """
+        header_positions = PredicateCompiler.filtered_positions(headers, comparisons)
+        rows = [
+            row
+            for row in sampled_rows
+            if header_positions and len(row) > header_positions[-1]
+        ]
+        if not rows:
+            return header_positions, []
+
+        statistics = measure_predicates(
+            [
+                " and ".join(
+                    f"{comparison.comparison_header}"
+                    f"{comparison.comparison_type.value}"
+                    f"{comparison.reference_value}"
+                    for comparison in comparisons[headers[header_position]]
+                )
+                for header_position in header_positions
+            ],
+            [
+                PredicateCompiler.compile(headers, comparisons, [header_position])
+                for header_position in header_positions
+            ],
+            rows,
+        )
+        order = selectivity_order(statistics)
+
+        return [header_positions[index] for index in order], [
+            statistics[index] for index in order
+        ]
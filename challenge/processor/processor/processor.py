@@ -1,6 +1,8 @@
-from typing import Iterator, List
+from itertools import islice
+from typing import Iterator, List, Optional
 
 from processor.processor.filter import Filter
+from processor_py.profiling import Profiler
 from processor.transformer.transformer_strategy import CSVTransformedDataDTO
 
 
@@ -15,16 +17,43 @@ class Processor:
         self,
         transformed_lazy_data_DTO: CSVTransformedDataDTO,
         entryComparisonMatcher: Filter,
+        profiler: Optional[Profiler] = None,
     ):
         self.transformed_lazy_data_DTO = transformed_lazy_data_DTO
         self.entryComparisonMatcher = entryComparisonMatcher
+        self.profiler = profiler
+
+    def build_lazy(
+        self, limit: Optional[int] = None, offset: int = 0
+    ) -> ProcessedLazyDataDTO:
+        """
+        Filter the rows lazily.
+
+        @param limit The maximum amount of matching rows, all when None. No row
+        is read once they are produced.
+        @param offset The amount of matching rows skipped.
+
+        @return The headers and the matching rows.
+        """
+        if limit is not None and limit < 0:
+            raise ValueError(f"Invalid limit: {limit}")
+        if offset < 0:
+            raise ValueError(f"Invalid offset: {offset}")
 
-    def build_lazy(self) -> ProcessedLazyDataDTO:
         headers = self.transformed_lazy_data_DTO.headers
+        is_satisfied_by = self.entryComparisonMatcher.is_satisfied_by
+        if self.profiler is not None:
+            is_satisfied_by = self.profiler.wrap(
+                "line_match", is_satisfied_by, is_filter=True
+            )
 
         def row_iterator() -> Iterator[List[str]]:
             for line in self.transformed_lazy_data_DTO.rows:
-                if self.entryComparisonMatcher.is_satisfied_by(line):
+                if is_satisfied_by(line):
                     yield line
 
-        return ProcessedLazyDataDTO(headers, row_iterator())
+        rows = row_iterator()
+        if limit is not None or offset:
+            rows = islice(rows, offset, None if limit is None else offset + limit)
+
+        return ProcessedLazyDataDTO(headers, rows)
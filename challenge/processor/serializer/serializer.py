@@ -1,23 +1,22 @@
 import sys
-from typing import List, Set
+from typing import Callable, Iterator, List, Set, TextIO, Tuple
 
 from processor.processor.processor import ProcessedLazyDataDTO
 from processor.transformer.lexer import Lexer
+from processor_py.serializer import compile_projection
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
 
 
 class Serializer:
     def __init__(self, data: ProcessedLazyDataDTO):
         self.data = data
 
-    def __stringify(self, headers: List[str], rows: List[str]) -> str:
-        headers_string = ",".join(headers) + "\n"
-        rows_string = "\n".join(rows)
-        return headers_string + rows_string
-
-    def stringify(self, selected_columns_input: str) -> str:
+    def __row_serializer(
+        self, selected_columns_input: str
+    ) -> Tuple[List[str], Callable[[List[str]], str]]:
         if not selected_columns_input:
-            rows = [",".join(row) for row in self.data.rows]
-            return self.__stringify(self.data.headers, rows)
+            return self.data.headers, ",".join
 
         selected_columns = Lexer(delimiter=",").tokenize(selected_columns_input)
 
@@ -32,12 +31,74 @@ class Serializer:
         filtered_headers = self.filter_entries(
             selected_column_indexes, self.data.headers
         )
-        filtered_rows = [
-            ",".join(self.filter_entries(selected_column_indexes, row))
-            for row in self.data.rows
-        ]
 
-        return self.__stringify(filtered_headers, filtered_rows)
+        # The projection is compiled once, rows shorter than the selected
+        # columns keep the fields they have like filter_entries.
+        project = compile_projection(selected_column_indexes)
+        last_column_index = max(selected_column_indexes)
+
+        def serialize_row(row: List[str]) -> str:
+            if len(row) > last_column_index:
+                return ",".join(project(row))
+            return ",".join(self.filter_entries(selected_column_indexes, row))
+
+        return filtered_headers, serialize_row
+
+    def stringify(self, selected_columns_input: str) -> str:
+        return "".join(self.stringify_iter(selected_columns_input))
+
+    def stringify_iter(
+        self, selected_columns_input: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[str]:
+        """
+        Serialize the rows as they are produced by the lazy row iterator.
+
+        @param selected_columns_input The columns to be serialized, all when
+        empty.
+        @param chunk_size The amount of characters gathered before a chunk is
+        yielded.
+
+        @return Chunks of the text returned by stringify.
+        """
+        headers, serialize_row = self.__row_serializer(selected_columns_input)
+
+        pending = [",".join(headers) + "\n"]
+        pending_size = len(pending[0])
+        separator = ""
+
+        for row in self.data.rows:
+            line = separator + serialize_row(row)
+            separator = "\n"
+
+            pending.append(line)
+            pending_size += len(line)
+            if pending_size >= chunk_size:
+                yield "".join(pending)
+                pending = []
+                pending_size = 0
+
+        if pending:
+            yield "".join(pending)
+
+    def write_to(
+        self,
+        stream: TextIO,
+        selected_columns_input: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """
+        Write the text returned by stringify to a stream chunk by chunk, so
+        the rows are never held in memory at once.
+
+        @param stream The stream written to.
+        @param selected_columns_input The columns to be serialized, all when
+        empty.
+        @param chunk_size The amount of characters written at once.
+
+        @return void
+        """
+        for chunk in self.stringify_iter(selected_columns_input, chunk_size):
+            stream.write(chunk)
 
     def filter_entries(
         self,
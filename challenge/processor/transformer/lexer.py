@@ -1,5 +1,6 @@
-from typing import List, Iterator
+from typing import Any, Callable, Iterable, Iterator, List
 from abc import ABC, abstractmethod
+from processor_py.lexer import compile_tokenizer
 
 
 class LexerInterface(ABC):
@@ -30,23 +31,31 @@ class Lexer(LexerInterface):
     def lines_split_lazy(
         self, full_string: str, line_delimiter: str = "\n"
     ) -> Iterator[str]:
-        has_other_lines = line_delimiter in full_string
-
-        if not has_other_lines:
+        if line_delimiter not in full_string:
             yield full_string
             return
 
-        sliced_string = full_string
+        delimiter_length = len(line_delimiter)
+        line_start = 0
+        line_position = full_string.find(line_delimiter)
+
+        while line_position != -1:
+            yield full_string[line_start:line_position]
 
-        while has_other_lines:
-            line_position = sliced_string.find(line_delimiter)
-            yield sliced_string[:line_position]
+            line_start = line_position + delimiter_length
+            line_position = full_string.find(line_delimiter, line_start)
 
-            sliced_string = sliced_string[line_position + len(line_delimiter) :]
-            has_other_lines = line_delimiter in sliced_string
+        yield full_string[line_start:]
 
-        if sliced_string:
-            yield sliced_string
+    def compile_tokenizer(
+        self, column_count: int, column_indexes: Iterable[int]
+    ) -> Callable[[str], List[Any]]:
+        """
+        Build a tokenizer that only materialises the fields of the given columns,
+        see processor_py.lexer.compile_tokenizer.
 
-        elif full_string.endswith(line_delimiter):
-            yield ""
+        Fields outside of the columns are None or left inside an unsplit
+        remainder, lines whose field count differs from column_count are fully
+        tokenized.
+        """
+        return compile_tokenizer(self.delimiter, column_count, column_indexes)
@@ -1,5 +1,6 @@
-from typing import TextIO, Generic, TypeVar
+from typing import Generic, Iterable, Optional, TextIO, TypeVar
 
+from processor_py.profiling import Profiler
 from processor.transformer.transformer_strategy import (
     CsvTransformStrategy,
     CSVTransformedDataDTO,
@@ -29,6 +30,10 @@ class TransformerFactory:
     @staticmethod
     def create_csv_transformer(
         line_delimiter: str,
+        used_columns: Optional[Iterable[str]] = None,
+        profiler: Optional[Profiler] = None,
     ) -> Transformer[CSVTransformedDataDTO]:
-        csv_transform_strategy = CsvTransformStrategy(line_delimiter)
+        csv_transform_strategy = CsvTransformStrategy(
+            line_delimiter, used_columns, profiler
+        )
         return Transformer(csv_transform_strategy)
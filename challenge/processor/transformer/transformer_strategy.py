@@ -1,6 +1,16 @@
 from abc import ABC, abstractmethod
 from processor.transformer.lexer import Lexer
-from typing import TextIO, Iterator, List, Generic, TypeVar
+from processor_py.profiling import Profiler
+from typing import (
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    TypeVar,
+)
 
 
 ReturnType = TypeVar("ReturnType")
@@ -23,26 +33,60 @@ class CSVTransformedDataDTO:
 
 
 class CsvTransformStrategy(TransformStrategy[CSVTransformedDataDTO]):
-    def __init__(self, line_delimiter: str) -> None:
+    def __init__(
+        self,
+        line_delimiter: str,
+        used_columns: Optional[Iterable[str]] = None,
+        profiler: Optional[Profiler] = None,
+    ) -> None:
         self.line_delimiter = line_delimiter
         self.csv_lexer = Lexer(delimiter=self.line_delimiter)
+        self.used_columns = None if used_columns is None else set(used_columns)
+        self.profiler = profiler
+
+    def row_tokenizer(self, headers: List[str]) -> Callable[[str], List[str]]:
+        """
+        Tokenize rows fully, or only up to the used columns when they are known.
+        """
+        if self.used_columns is None or not self.used_columns <= set(headers):
+            tokenize_row: Callable[[str], List[str]] = self.csv_lexer.tokenize
+        else:
+            column_indexes = [
+                index
+                for index, header in enumerate(headers)
+                if header in self.used_columns
+            ]
+            tokenize_row = self.csv_lexer.compile_tokenizer(
+                len(headers), column_indexes
+            )
+
+        if self.profiler is not None:
+            return self.profiler.wrap("tokenize", tokenize_row)
+        return tokenize_row
 
     def file_transform_lazy(self, data: TextIO) -> CSVTransformedDataDTO:
         headers = self.csv_lexer.tokenize(data.readline().strip())
+        tokenize_row = self.row_tokenizer(headers)
+        lines: Iterable[str] = data
+        if self.profiler is not None:
+            lines = self.profiler.wrap_iter("read_lines", data)
 
         def row_iterator() -> Iterator[List[str]]:
-            for line in data:
-                yield self.csv_lexer.tokenize(line.strip())
+            for line in lines:
+                yield tokenize_row(line.strip())
 
         return CSVTransformedDataDTO(headers, row_iterator())
 
     def data_transform_lazy(self, data: str) -> CSVTransformedDataDTO:
         splitted_lines = self.csv_lexer.lines_split_lazy(data)
+        if self.profiler is not None:
+            splitted_lines = self.profiler.wrap_iter("lines_split_lazy", splitted_lines)
 
         headers = self.csv_lexer.tokenize(next(splitted_lines))
+        tokenize_row = self.row_tokenizer(headers)
 
         def row_iterator() -> Iterator[List[str]]:
             for line in splitted_lines:
-                yield self.csv_lexer.tokenize(line)
+                yield tokenize_row(line)
 
         return CSVTransformedDataDTO(headers, row_iterator())
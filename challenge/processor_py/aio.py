@@ -0,0 +1,158 @@
+import asyncio
+from concurrent.futures import Executor
+from functools import partial
+from typing import AsyncIterator, List, Optional, TextIO, Tuple
+
+from processor_py.lexer import tokenize
+from processor_py.query import QueryPlan, compile_query, is_limited
+from processor_py.query import iter_matching_lines, serialize_headers
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE, SchemaDefinition
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class LineChunkReader:
+    """
+    A class used to read the stripped lines of a text file in chunks, the
+    partial line ending a chunk is completed by the next one.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.__pending = ""
+
+    def read_lines(self) -> Optional[List[str]]:
+        """
+        @return The lines of the next chunk, None once the file is read.
+        """
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            if not self.__pending:
+                return None
+
+            lines = [self.__pending.strip()]
+            self.__pending = ""
+            return lines
+
+        lines = (self.__pending + chunk).split("\n")
+        self.__pending = lines.pop()
+        return [line.strip() for line in lines]
+
+
+def start_query(
+    reader: LineChunkReader,
+    selected_columns: str,
+    row_filter_definitions: str,
+    schema: SchemaDefinition = None,
+) -> Tuple[QueryPlan, List[str]]:
+    """
+    Read the headers and the first chunk, compile the query and filter it.
+
+    @return The query plan and the first batch, starting with the headers.
+    """
+    headers = tokenize(reader.file.readline().strip(), ",")
+    lines = reader.read_lines() or []
+
+    sampled_rows = [tokenize(line, ",") for line in lines[:DEFAULT_SCHEMA_SAMPLE_SIZE]]
+    query_plan = compile_query(
+        headers, selected_columns, row_filter_definitions, sampled_rows, schema
+    )
+
+    return query_plan, [
+        serialize_headers(query_plan),
+        *iter_matching_lines(lines, query_plan),
+    ]
+
+
+def match_chunk(reader: LineChunkReader, query_plan: QueryPlan) -> Optional[List[str]]:
+    """
+    @return The serialized matching lines of the next chunk, None once the
+    file is read.
+    """
+    lines = reader.read_lines()
+    if lines is None:
+        return None
+
+    return list(iter_matching_lines(lines, query_plan))
+
+
+async def aprocess_csv_file(
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    schema: SchemaDefinition = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Optional[Executor] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> AsyncIterator[List[str]]:
+    """
+    Process the CSV file without blocking the event loop.
+
+    Each chunk is read and filtered in the executor, and the next one is only
+    read once the consumer asks for the next batch, so slow consumers hold
+    back the reading instead of buffering the file.
+
+        async for rows in aprocess_csv_file(path, "name", "age>30"):
+            ...
+
+    @param csv_file_path The path to the CSV file to be processed.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param schema Optional column types of the filtered columns.
+    @param chunk_size The amount of characters read per batch.
+    @param executor Where the chunks are read and filtered, the default
+    executor of the loop when None.
+    @param limit The maximum amount of matching rows yielded, all when None.
+    The file is no longer read once they are yielded.
+    @param offset The amount of matching rows skipped before the first yielded.
+
+    @return The batches of serialized rows without line breaks, the first
+    batch starts with the headers. Nothing is written to stdout, and errors
+    are raised, not written to stderr.
+    """
+    is_limited(limit, offset)
+    loop = asyncio.get_running_loop()
+
+    file = await loop.run_in_executor(executor, partial(open, csv_file_path, "r"))
+    try:
+        reader = LineChunkReader(file, chunk_size)
+        query_plan, first_batch = await loop.run_in_executor(
+            executor,
+            start_query,
+            reader,
+            selected_columns,
+            row_filter_definitions,
+            schema,
+        )
+
+        header = first_batch[0]
+        batch: Optional[List[str]] = first_batch[1:]
+        yielded_header = False
+        rows_to_skip = offset
+        rows_left = limit
+
+        while batch is not None:
+            if rows_to_skip:
+                skipped_rows = min(len(batch), rows_to_skip)
+                batch = batch[rows_to_skip:]
+                rows_to_skip -= skipped_rows
+            if rows_left is not None:
+                batch = batch[:rows_left]
+                rows_left -= len(batch)
+
+            if not yielded_header:
+                yield [header, *batch]
+                yielded_header = True
+            elif batch:
+                yield batch
+
+            if rows_left == 0:
+                return
+
+            batch = await loop.run_in_executor(
+                executor, match_chunk, reader, query_plan
+            )
+    finally:
+        file.close()
@@ -0,0 +1,165 @@
+import shutil
+from contextlib import ExitStack
+from itertools import chain, islice
+from tempfile import SpooledTemporaryFile
+from typing import IO, Callable, Dict, Iterator, List, NamedTuple, Sequence
+from typing import Tuple
+
+from processor_py.filter import FilterPlan
+from processor_py.lexer import compile_tokenizer, tokenize
+from processor_py.query import QueryPlan, compile_query, serialize_headers
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE, SchemaDefinition
+from processor_py.writer import DEFAULT_BUFFER_SIZE, BufferedLineWriter, OutputSink
+from processor_py.writer import open_line_writer
+
+DEFAULT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class BatchQuery(NamedTuple):
+    selected_columns: str
+    row_filter_definitions: str
+    output: OutputSink = None
+
+
+def output_key(output: OutputSink) -> Tuple[str, int]:
+    """
+    @return A key equal for the queries writing to the same output.
+    """
+    if output is None:
+        return ("stdout", 0)
+    if isinstance(output, int):
+        return ("fd", output)
+    return ("writer", id(output))
+
+
+LineRoute = Tuple[Callable[[Sequence[str]], str], Callable[[str], None]]
+
+
+class FilterRoute(NamedTuple):
+    """
+    The queries sharing the same filters, they are evaluated once per row and
+    the row is written to every query of the route when it matches.
+    """
+
+    filter_plan: FilterPlan
+    match_plan: Callable[[Sequence[str], FilterPlan], bool]
+    line_routes: List[LineRoute]
+
+
+def compile_batch(
+    headers: List[str],
+    queries: Sequence[BatchQuery],
+    sampled_rows: Sequence[Sequence[str]] = (),
+    schema: SchemaDefinition = None,
+) -> Tuple[List[QueryPlan], Callable[[str], List[str]]]:
+    """
+    Compile every query of the batch once.
+
+    @param headers The headers of the CSV data.
+    @param queries The queries of the batch.
+    @param sampled_rows The first rows of the CSV data, used to infer the type
+    of the filtered columns.
+    @param schema Optional column types of the filtered columns.
+
+    @return The query plans, in the order of the queries, and a tokenizer
+    splitting a line up to the columns used by any of them.
+    """
+    query_plans = [
+        compile_query(
+            headers,
+            query.selected_columns,
+            query.row_filter_definitions,
+            sampled_rows,
+            schema,
+        )
+        for query in queries
+    ]
+
+    used_column_indexes = set()
+    for query_plan in query_plans:
+        used_column_indexes |= query_plan.selected_column_indexes
+        used_column_indexes |= {
+            comparison.column_index for comparison in query_plan.filter_plan.comparisons
+        }
+
+    return query_plans, compile_tokenizer(",", len(headers), used_column_indexes)
+
+
+def process_lines_batch(
+    headers: List[str],
+    lines: Iterator[str],
+    queries: Sequence[BatchQuery],
+    schema: SchemaDefinition = None,
+) -> None:
+    """
+    Run every query of the batch over the lines in a single pass: each line is
+    tokenized once, each distinct set of filters is evaluated once and the
+    matching row is serialized for each query routed to it.
+
+    Queries sharing an output write to it one after the other, in the order of
+    the queries, as consecutive process_csv_file calls would: the first one
+    streams its rows, the rows of the next ones are spooled, in memory up to
+    DEFAULT_SPOOL_SIZE characters then in a temporary file, and copied once
+    the file is read.
+
+    @param headers The headers of the CSV data.
+    @param lines The lines of the CSV data, without the line break.
+    @param queries The queries of the batch.
+    @param schema Optional column types of the filtered columns.
+
+    @return void
+    """
+    sampled_lines = list(islice(lines, DEFAULT_SCHEMA_SAMPLE_SIZE))
+    sampled_rows = [tokenize(line, ",") for line in sampled_lines]
+    query_plans, tokenize_line = compile_batch(headers, queries, sampled_rows, schema)
+
+    with ExitStack() as stack:
+        filter_routes: Dict[Tuple[str, ...], FilterRoute] = {}
+        shared_writers: Dict[Tuple[str, int], BufferedLineWriter] = {}
+        spooled_outputs: List[
+            Tuple[BufferedLineWriter, IO[str], BufferedLineWriter]
+        ] = []
+
+        for query, query_plan in zip(queries, query_plans):
+            key = output_key(query.output)
+            shared_writer = shared_writers.get(key)
+            if shared_writer is None:
+                writer = shared_writers[key] = stack.enter_context(
+                    open_line_writer(query.output)
+                )
+            else:
+                spool = stack.enter_context(
+                    SpooledTemporaryFile(max_size=DEFAULT_SPOOL_SIZE, mode="w+")
+                )
+                writer = BufferedLineWriter(spool)
+                spooled_outputs.append((shared_writer, spool, writer))
+            writer.write_line(serialize_headers(query_plan))
+
+            filter_key = tuple(
+                sorted(
+                    filter_definition.strip()
+                    for filter_definition in query.row_filter_definitions.split("\n")
+                    if filter_definition.strip()
+                )
+            )
+            filter_route = filter_routes.get(filter_key)
+            if filter_route is None:
+                filter_route = filter_routes[filter_key] = FilterRoute(
+                    query_plan.filter_plan, query_plan.match_plan, []
+                )
+            filter_route.line_routes.append(
+                (query_plan.serialize_line, writer.write_line)
+            )
+
+        routes = list(filter_routes.values())
+        for row in map(tokenize_line, chain(sampled_lines, lines)):
+            for filter_plan, match_plan, line_routes in routes:
+                if match_plan(row, filter_plan):
+                    for serialize_line, write_line in line_routes:
+                        write_line(serialize_line(row))
+
+        for output_writer, spooled_rows, spooled_writer in spooled_outputs:
+            spooled_writer.flush()
+            output_writer.flush()
+            spooled_rows.seek(0)
+            shutil.copyfileobj(spooled_rows, output_writer.sink, DEFAULT_BUFFER_SIZE)
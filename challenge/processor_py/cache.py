@@ -0,0 +1,374 @@
+import hashlib
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from processor_py.filter import tokenize_filter
+from processor_py.lexer import tokenize
+from processor_py.writer import OutputSink, Writer, open_sink
+
+CACHE_SIZE_ENVIRONMENT_VARIABLE = "LIBCSV_CACHE_SIZE"
+CACHE_DIRECTORY_ENVIRONMENT_VARIABLE = "LIBCSV_CACHE_DIR"
+CACHE_DIRECTORY_SIZE_ENVIRONMENT_VARIABLE = "LIBCSV_CACHE_DIR_SIZE"
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+DEFAULT_DISK_CACHE_SIZE = 1024 * 1024 * 1024
+DISK_ENTRY_PATTERN = re.compile(r"[0-9a-f]{64}\.csv")
+
+
+class CacheKey(NamedTuple):
+    path: str
+    mtime_ns: int
+    size: int
+    inode: int
+    selected_columns: Tuple[str, ...]
+    filters: Tuple[Tuple[str, str, str], ...]
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+
+
+def file_identity(csv_file_path: str) -> Tuple[str, int, int, int]:
+    file_stat = os.stat(csv_file_path)
+    return (
+        os.path.realpath(csv_file_path),
+        file_stat.st_mtime_ns,
+        file_stat.st_size,
+        file_stat.st_ino,
+    )
+
+
+def build_cache_key(
+    csv_file_path: str, selected_columns: str, row_filter_definitions: str
+) -> CacheKey:
+    """
+    Identify a query result by the file identity and the normalized query.
+
+    Rows are serialized in column order and filters are all applied, so the
+    selected columns and the filters are keyed as sorted sets.
+
+    @param csv_file_path The path to the CSV file.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+
+    @return The cache key.
+    """
+    path, mtime_ns, size, inode = file_identity(csv_file_path)
+
+    column_tokens: List[str] = []
+    if selected_columns:
+        column_tokens = tokenize(selected_columns, ",")
+
+    filters = {
+        tuple(tokenize_filter(filter_definition))
+        for filter_definition in row_filter_definitions.split("\n")
+        if filter_definition.strip()
+    }
+
+    return CacheKey(
+        path=path,
+        mtime_ns=mtime_ns,
+        size=size,
+        inode=inode,
+        selected_columns=tuple(sorted(set(column_tokens))),
+        filters=tuple(sorted(filters)),  # type: ignore[arg-type]
+    )
+
+
+class ResultCache:
+    """
+    A class used to keep serialized query results in a LRU with a byte budget,
+    optionally backed by a directory with its own byte budget, where the least
+    recently read or written entries are removed first.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_CACHE_SIZE,
+        directory: Optional[str] = None,
+        max_disk_bytes: int = DEFAULT_DISK_CACHE_SIZE,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.__entries: "OrderedDict[CacheKey, str]" = OrderedDict()
+        self.__entry_sizes: "dict[CacheKey, int]" = {}
+        self.__size_bytes = 0
+        self.__hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        value = self.__entries.get(key)
+        if value is not None:
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return value
+
+        value = self.__read_disk(key)
+        if value is not None:
+            self.__disk_hits += 1
+            self.__store(key, value)
+            return value
+
+        self.__misses += 1
+        return None
+
+    def put(self, key: CacheKey, value: str) -> None:
+        if self.__store(key, value):
+            self.__write_disk(key, value)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self.__hits,
+            disk_hits=self.__disk_hits,
+            misses=self.__misses,
+            evictions=self.__evictions,
+            entries=len(self.__entries),
+            size_bytes=self.__size_bytes,
+        )
+
+    def clear(self) -> None:
+        self.__entries.clear()
+        self.__entry_sizes.clear()
+        self.__size_bytes = 0
+
+        for _, _, disk_path in self.__disk_entries():
+            self.__remove_disk(disk_path)
+
+    def __store(self, key: CacheKey, value: str) -> bool:
+        value_size = len(value.encode("utf-8"))
+        if value_size > self.max_bytes:
+            return False
+
+        if key in self.__entries:
+            self.__size_bytes -= self.__entry_sizes[key]
+
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        self.__entry_sizes[key] = value_size
+        self.__size_bytes += value_size
+
+        while self.__size_bytes > self.max_bytes:
+            evicted_key, _ = self.__entries.popitem(last=False)
+            self.__size_bytes -= self.__entry_sizes.pop(evicted_key)
+            self.__evictions += 1
+
+        return True
+
+    def __disk_path(self, key: CacheKey) -> Optional[str]:
+        if not self.directory:
+            return None
+
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.csv")
+
+    def __read_disk(self, key: CacheKey) -> Optional[str]:
+        disk_path = self.__disk_path(key)
+        if disk_path is None:
+            return None
+
+        try:
+            with open(disk_path, "r", encoding="utf-8", newline="") as file:
+                value = file.read()
+            os.utime(disk_path)
+        except OSError:
+            return None
+
+        return value
+
+    def __write_disk(self, key: CacheKey, value: str) -> None:
+        disk_path = self.__disk_path(key)
+        if disk_path is None or len(value.encode("utf-8")) > self.max_disk_bytes:
+            return
+
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with open(
+                file_descriptor, "w", encoding="utf-8", newline=""
+            ) as temporary_file:
+                temporary_file.write(value)
+            os.replace(temporary_path, disk_path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            return
+
+        self.__evict_disk()
+
+    def __disk_entries(self) -> List[Tuple[int, int, str]]:
+        """
+        @return The modification time, the size and the path of the entries of
+        the directory, the other files are left alone.
+        """
+        if not self.directory:
+            return []
+
+        disk_entries = []
+        try:
+            with os.scandir(self.directory) as directory_entries:
+                for directory_entry in directory_entries:
+                    if not DISK_ENTRY_PATTERN.fullmatch(directory_entry.name):
+                        continue
+                    try:
+                        entry_stat = directory_entry.stat()
+                    except OSError:
+                        continue
+                    disk_entries.append(
+                        (
+                            entry_stat.st_mtime_ns,
+                            entry_stat.st_size,
+                            directory_entry.path,
+                        )
+                    )
+        except OSError:
+            return []
+
+        return disk_entries
+
+    def __evict_disk(self) -> None:
+        disk_entries = sorted(self.__disk_entries())
+        disk_size_bytes = sum(size for _, size, _ in disk_entries)
+
+        for _, size, disk_path in disk_entries:
+            if disk_size_bytes <= self.max_disk_bytes:
+                break
+            self.__remove_disk(disk_path)
+            disk_size_bytes -= size
+            self.__evictions += 1
+
+    @staticmethod
+    def __remove_disk(disk_path: str) -> None:
+        try:
+            os.remove(disk_path)
+        except OSError:
+            pass
+
+
+class RecordingWriter:
+    """
+    A class used to forward the output to a sink while keeping a copy of it,
+    the copy is dropped once it grows past the limit.
+    """
+
+    def __init__(self, sink: Writer, limit: int) -> None:
+        self.sink = sink
+        self.limit = limit
+        self.is_complete = True
+        self.__parts: List[str] = []
+        self.__size = 0
+
+    def write(self, data: str) -> int:
+        if self.is_complete:
+            self.__size += len(data.encode("utf-8"))
+            if self.__size > self.limit:
+                self.is_complete = False
+                self.__parts = []
+            else:
+                self.__parts.append(data)
+
+        return self.sink.write(data)
+
+    def flush(self) -> None:
+        flush_sink = getattr(self.sink, "flush", None)
+        if flush_sink is not None:
+            flush_sink()
+
+    def getvalue(self) -> str:
+        return "".join(self.__parts)
+
+
+_default_result_cache: Optional[ResultCache] = None
+
+
+def default_result_cache() -> Optional[ResultCache]:
+    """
+    Share a cache between calls when LIBCSV_CACHE_SIZE or LIBCSV_CACHE_DIR is
+    set, so it can be enabled behind the C ABI. LIBCSV_CACHE_DIR_SIZE is the
+    byte budget of the directory.
+
+    @return The cache configured by the environment, None when disabled.
+    """
+    global _default_result_cache
+
+    cache_size = os.environ.get(CACHE_SIZE_ENVIRONMENT_VARIABLE)
+    cache_directory = os.environ.get(CACHE_DIRECTORY_ENVIRONMENT_VARIABLE)
+    if not cache_size and not cache_directory:
+        return None
+
+    max_bytes = DEFAULT_CACHE_SIZE
+    if cache_size:
+        try:
+            max_bytes = int(cache_size)
+        except ValueError:
+            raise ValueError(f"Invalid cache size: '{cache_size}'")
+
+    max_disk_bytes = DEFAULT_DISK_CACHE_SIZE
+    cache_directory_size = os.environ.get(CACHE_DIRECTORY_SIZE_ENVIRONMENT_VARIABLE)
+    if cache_directory_size:
+        try:
+            max_disk_bytes = int(cache_directory_size)
+        except ValueError:
+            raise ValueError(f"Invalid cache size: '{cache_directory_size}'")
+
+    configuration = (max_bytes, cache_directory or None, max_disk_bytes)
+    if _default_result_cache is None or configuration != (
+        _default_result_cache.max_bytes,
+        _default_result_cache.directory,
+        _default_result_cache.max_disk_bytes,
+    ):
+        _default_result_cache = ResultCache(*configuration)
+
+    return _default_result_cache
+
+
+def run_cached(
+    result_cache: ResultCache,
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink,
+    process: Callable[[Writer], None],
+) -> None:
+    """
+    Write the cached result of a query, or run it and cache its output.
+
+    The output is only stored when the file identity did not change while the
+    query was running.
+
+    @param result_cache The cache to read from and store to.
+    @param csv_file_path The path to the CSV file.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed.
+    @param process Runs the query, writing to the given writer.
+
+    @return void
+    """
+    key = build_cache_key(csv_file_path, selected_columns, row_filter_definitions)
+    cached_output = result_cache.get(key)
+
+    with open_sink(output) as sink:
+        if cached_output is not None:
+            sink.write(cached_output)
+            flush_sink = getattr(sink, "flush", None)
+            if flush_sink is not None:
+                flush_sink()
+            return
+
+        recording_writer = RecordingWriter(sink, result_cache.max_bytes)
+        process(recording_writer)
+
+    if recording_writer.is_complete and file_identity(csv_file_path) == key[:4]:
+        result_cache.put(key, recording_writer.getvalue())
@@ -0,0 +1,381 @@
+import io
+import locale
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from processor_py.filter import CompiledComparison, compare
+from processor_py.lexer import tokenize
+from processor_py.mmap_reader import Buffer, open_buffer, strip_line
+from processor_py.query import (
+    QueryPlan,
+    compile_query,
+    is_limited,
+    iter_block_lines,
+    iter_matching_lines,
+    limit_lines,
+    serialize_headers,
+)
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE, SchemaDefinition
+from processor_py.writer import OutputSink, open_line_writer
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore[assignment]
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_WINDOW_SIZE = 4 * 1024 * 1024
+
+_NEWLINE = ord("\n")
+_CARRIAGE_RETURN = ord("\r")
+_DELIMITER = ord(",")
+_SPACE = ord(" ")
+_MINUS = ord("-")
+_PLUS = ord("+")
+_ZERO = ord("0")
+_MAX_INT64_DIGITS = 18
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def ensure_numpy() -> None:
+    if np is None:
+        raise ValueError(
+            "The columnar engine requires numpy, install the 'columnar' extra"
+        )
+
+
+def _fits_int64(value: int) -> bool:
+    return _INT64_MIN <= value <= _INT64_MAX
+
+
+class ColumnBlock(NamedTuple):
+    """
+    A block of lines with the byte offsets of their delimiters.
+
+    Row r of the delimiters holds the offsets of the delimiters of line r.
+    """
+
+    data: bytes
+    array: Any
+    line_starts: Any
+    content_ends: Any
+    delimiters: Any
+    encoding: str
+
+    @property
+    def row_count(self) -> int:
+        return len(self.line_starts)
+
+    def column_bounds(self, column_index: int) -> Tuple[Any, Any]:
+        """
+        @return The (starts, ends) offsets of the cells of a column.
+        """
+        starts = self.line_starts
+        if column_index > 0:
+            starts = self.delimiters[:, column_index - 1] + 1
+
+        ends = self.content_ends
+        if column_index < self.delimiters.shape[1]:
+            ends = self.delimiters[:, column_index]
+
+        return starts, ends
+
+    def decode_column(self, column_index: int, rows: Any = None) -> List[str]:
+        starts, ends = self.column_bounds(column_index)
+        if rows is not None:
+            starts, ends = starts[rows], ends[rows]
+
+        data, encoding = self.data, self.encoding
+        return [
+            data[start:end].decode(encoding)
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ]
+
+
+def split_block(data: bytes, column_count: int, encoding: str) -> Optional[ColumnBlock]:
+    """
+    Locate the fields of a block of lines without decoding them.
+
+    @param data Complete lines, only the last one may miss the line break.
+    @param column_count The amount of columns of the CSV data.
+    @param encoding The encoding of the CSV data.
+
+    @return The block, None when a line has to go through the row engine: lone
+    carriage returns, whitespace stripped from the line edges or a field count
+    different from the headers.
+    """
+    if b"\r" in data and data.count(b"\r") != data.count(b"\r\n"):
+        return None
+
+    array = np.frombuffer(data, dtype=np.uint8)
+    line_ends = np.flatnonzero(array == _NEWLINE)
+    if not data.endswith(b"\n"):
+        line_ends = np.append(line_ends, len(data))
+
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    has_carriage_return = array[np.maximum(line_ends - 1, 0)] == _CARRIAGE_RETURN
+    content_ends = line_ends - (has_carriage_return & (line_ends > line_starts))
+
+    is_empty = content_ends == line_starts
+    edge_bytes = np.concatenate(
+        (
+            array[np.minimum(line_starts, len(data) - 1)],
+            array[np.maximum(content_ends - 1, 0)],
+        )
+    )
+    may_strip = np.flatnonzero(
+        ~np.tile(is_empty, 2) & ((edge_bytes <= _SPACE) | (edge_bytes >= 0x80))
+    )
+    for row in set((may_strip % len(line_starts)).tolist()):
+        line = data[line_starts[row] : content_ends[row]].decode(encoding)
+        if line != line.strip():
+            return None
+
+    delimiters = np.flatnonzero(array == _DELIMITER)
+    delimiter_counts = np.diff(np.searchsorted(delimiters, line_ends), prepend=0)
+    if np.any(delimiter_counts != column_count - 1):
+        return None
+
+    return ColumnBlock(
+        data=data,
+        array=array,
+        line_starts=line_starts,
+        content_ends=content_ends,
+        delimiters=delimiters.reshape(len(line_starts), column_count - 1),
+        encoding=encoding,
+    )
+
+
+def parse_int_column(
+    block: ColumnBlock, column_index: int
+) -> Tuple[Any, Dict[int, str]]:
+    """
+    Convert the cells of a column to ints like int() does.
+
+    Cells made of up to 18 ASCII digits with an optional sign are parsed over
+    the whole column at once, the other ones go through int() one by one.
+
+    @return The (numbers, texts) of the column, texts maps the rows of the cells
+    that int() rejects to the decoded cell.
+    """
+    array = block.array
+    starts, ends = block.column_bounds(column_index)
+    last_byte = max(len(array) - 1, 0)
+
+    first_bytes = array[np.minimum(starts, last_byte)]
+    has_sign = ((first_bytes == _MINUS) | (first_bytes == _PLUS)) & (ends > starts)
+    digit_starts = starts + has_sign
+    digit_counts = ends - digit_starts
+
+    is_parsed = (digit_counts >= 1) & (digit_counts <= _MAX_INT64_DIGITS)
+    numbers = np.zeros(block.row_count, dtype=np.int64)
+    for offset in range(int(digit_counts.max(initial=0))):
+        is_active = is_parsed & (offset < digit_counts)
+        digits = array[np.where(is_active, digit_starts + offset, 0)].astype(np.int64)
+        digits -= _ZERO
+        is_parsed &= ~is_active | ((digits >= 0) & (digits <= 9))
+        numbers = np.where(is_active, numbers * 10 + digits, numbers)
+
+    numbers = np.where(is_parsed, numbers, 0)
+    numbers = np.where(has_sign & (first_bytes == _MINUS), -numbers, numbers)
+
+    texts: Dict[int, str] = {}
+    rows = np.flatnonzero(~is_parsed)
+    for row, text in zip(rows.tolist(), block.decode_column(column_index, rows)):
+        try:
+            number = int(text)
+        except ValueError:
+            texts[row] = text
+            continue
+
+        if not _fits_int64(number) and numbers.dtype != object:
+            numbers = numbers.astype(object)
+        numbers[row] = number
+
+    return numbers, texts
+
+
+def comparison_mask(
+    comparison: CompiledComparison,
+    block: ColumnBlock,
+    parsed_columns: Dict[Any, Any],
+) -> Any:
+    """
+    Evaluate one comparison over a column of the block.
+
+    The cells are compared like the row engine does: as ints when both the cell
+    and the reference value are ints, as strings otherwise.
+    """
+    compare_values: Callable[[Any, Any], Any] = compare[comparison.comparison_type]
+    reference_value = comparison.reference_value
+    column_index = comparison.column_index
+
+    if isinstance(reference_value, str):
+        key = ("text", column_index)
+        if key not in parsed_columns:
+            parsed_columns[key] = np.array(
+                block.decode_column(column_index), dtype=object
+            )
+        return np.asarray(
+            compare_values(parsed_columns[key], reference_value), dtype=bool
+        )
+
+    if column_index not in parsed_columns:
+        parsed_columns[column_index] = parse_int_column(block, column_index)
+    numbers, texts = parsed_columns[column_index]
+
+    if not _fits_int64(reference_value):
+        numbers = numbers.astype(object)
+    mask = np.asarray(compare_values(numbers, reference_value), dtype=bool)
+
+    for row, text in texts.items():
+        mask[row] = compare_values(text, comparison.raw_reference_value)
+
+    return mask
+
+
+def block_mask(block: ColumnBlock, query_plan: QueryPlan) -> Any:
+    """
+    Combine every comparison of the filter plan in a single boolean mask.
+
+    @return One boolean per row, True for the rows that match every filter.
+    """
+    mask = np.ones(block.row_count, dtype=bool)
+    parsed_columns: Dict[Any, Any] = {}
+
+    for comparison in query_plan.filter_plan.comparisons:
+        mask &= comparison_mask(comparison, block, parsed_columns)
+
+    return mask
+
+
+def iter_line_blocks(
+    buffer: Buffer, block_size: int, window_size: int = DEFAULT_WINDOW_SIZE
+) -> Iterator[bytes]:
+    """
+    Read the buffer in blocks of up to block_size complete lines.
+    """
+    pending = b""
+    while True:
+        data = buffer.read(window_size)
+        if not data:
+            if pending:
+                yield pending
+            return
+
+        data = pending + data
+        line_ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == _NEWLINE)
+
+        start = 0
+        for line_index in range(block_size - 1, len(line_ends), block_size):
+            end = int(line_ends[line_index]) + 1
+            yield data[start:end]
+            start = end
+
+        if len(line_ends) and start <= line_ends[-1]:
+            end = int(line_ends[-1]) + 1
+            yield data[start:end]
+            start = end
+
+        pending = data[start:]
+
+
+def iter_matching_blocks(
+    buffer: Buffer,
+    query_plan: QueryPlan,
+    encoding: str,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    window_size: int = DEFAULT_WINDOW_SIZE,
+) -> Iterator[str]:
+    """
+    Filter the lines of the buffer in blocks, evaluating the filters as masks.
+
+    Blocks that split_block rejects are decoded and go through the row engine,
+    so they are matched, and fail, exactly like it.
+
+    @param buffer The CSV data after the header line.
+    @param query_plan The compiled query.
+    @param encoding The encoding of the CSV data.
+    @param block_size Amount of rows loaded in each block.
+    @param window_size Amount of bytes read at once.
+
+    @return The serialized matching lines, each text ends with a line break.
+    """
+    column_count = len(query_plan.headers)
+    selected_column_indexes = sorted(query_plan.selected_column_indexes)
+
+    for data in iter_line_blocks(buffer, block_size, window_size):
+        block = split_block(data, column_count, encoding)
+        if block is None:
+            lines = io.StringIO(data.decode(encoding), newline=None)
+            for line in iter_matching_lines(map(str.strip, lines), query_plan):
+                yield line + "\n"
+            continue
+
+        rows = np.flatnonzero(block_mask(block, query_plan))
+        if not len(rows):
+            continue
+
+        selected_columns = [
+            block.decode_column(index, rows) for index in selected_column_indexes
+        ]
+        yield "\n".join(
+            ",".join(filter(None, values)) for values in zip(*selected_columns)
+        ) + "\n"
+
+
+def process_csv_file_columnar(
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> None:
+    """
+    Process the CSV file in blocks of rows held as NumPy arrays.
+
+    @param csv_file_path The path to the CSV file to be processed.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed.
+    @param schema Optional column types of the filtered columns.
+    @param block_size Amount of rows evaluated at once.
+    @param limit The maximum amount of matching rows written, all when None.
+    @param offset The amount of matching rows skipped before the first written.
+
+    @return void
+    """
+    ensure_numpy()
+    encoding = locale.getpreferredencoding(False)
+
+    with open_buffer(csv_file_path) as buffer:
+        headers = tokenize(
+            strip_line(buffer.readline(), encoding).decode(encoding), ","
+        )
+        data_start = buffer.tell()
+        sampled_rows = [
+            tokenize(strip_line(line, encoding).decode(encoding), ",")
+            for line in islice(iter(buffer.readline, b""), DEFAULT_SCHEMA_SAMPLE_SIZE)
+        ]
+        buffer.seek(data_start)
+
+        query_plan = compile_query(
+            headers, selected_columns, row_filter_definitions, sampled_rows, schema
+        )
+
+        blocks = iter_matching_blocks(buffer, query_plan, encoding, block_size)
+        limited = is_limited(limit, offset)
+
+        with open_line_writer(output) as writer:
+            writer.write_line(serialize_headers(query_plan))
+            if not limited:
+                for text in blocks:
+                    writer.write_text(text)
+                return
+
+            for line in limit_lines(iter_block_lines(blocks), limit, offset):
+                writer.write_line(line)
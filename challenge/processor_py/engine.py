@@ -0,0 +1,35 @@
+import os
+from enum import Enum
+from typing import Optional, Union
+
+ENGINE_ENVIRONMENT_VARIABLE = "LIBCSV_ENGINE"
+
+
+class EngineEnum(Enum):
+    TEXT = "text"
+    MMAP = "mmap"
+    COLUMNAR = "columnar"
+
+
+def resolve_engine(engine: Union[EngineEnum, str, None] = None) -> EngineEnum:
+    """
+    Resolve the engine used to read and filter a CSV file.
+
+    @param engine The engine name, when None the LIBCSV_ENGINE environment
+    variable is used so the engine can be chosen behind the C ABI.
+
+    @return The engine, text when nothing was selected.
+    """
+    if isinstance(engine, EngineEnum):
+        return engine
+
+    selected_engine: Optional[str] = engine or os.environ.get(
+        ENGINE_ENVIRONMENT_VARIABLE
+    )
+    if not selected_engine:
+        return EngineEnum.TEXT
+
+    try:
+        return EngineEnum(selected_engine.strip().lower())
+    except ValueError:
+        raise ValueError(f"Invalid engine: '{selected_engine}'")
@@ -1,6 +1,23 @@
-from typing import Callable, List, Dict, Union
+from typing import (
+    Any,
+    Callable,
+    List,
+    Dict,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from enum import Enum
+from functools import partial
+import math
+import operator
 import re
+import time
+
+from processor_py.schema import ColumnTypeEnum
 
 
 class ComparisonTypeEnum(Enum):
@@ -37,7 +54,6 @@ def parse_filters(
 ) -> Dict[str, List[Dict[str, Union[ComparisonTypeEnum, str]]]]:
     filters: Dict[str, List[Dict[str, Union[ComparisonTypeEnum, str]]]] = {}
     filter_list = row_filter_definitions.split("\n")
-    print(row_filter_definitions)
     for filter in filter_list:
         if not filter.strip():
             continue
@@ -65,24 +81,12 @@ def parse_filters(
 compare: Dict[
     ComparisonTypeEnum, Callable[[Union[int, str], Union[int, str]], bool]
 ] = {
-    ComparisonTypeEnum.EQUAL: lambda comparison_value, reference_value: (
-        comparison_value == reference_value
-    ),
-    ComparisonTypeEnum.GREATER_THAN: lambda comparison_value, reference_value: (
-        comparison_value > reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.LESS_THAN: lambda comparison_value, reference_value: (
-        comparison_value < reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.NOT_EQUAL: lambda comparison_value, reference_value: (
-        comparison_value != reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.GREATER_OR_EQUAL: lambda comparison_value, reference_value: (
-        comparison_value >= reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.LESS_OR_EQUAL: lambda comparison_value, reference_value: (
-        comparison_value <= reference_value
-    ),  # type: ignore
+    ComparisonTypeEnum.EQUAL: operator.eq,
+    ComparisonTypeEnum.GREATER_THAN: operator.gt,
+    ComparisonTypeEnum.LESS_THAN: operator.lt,
+    ComparisonTypeEnum.NOT_EQUAL: operator.ne,
+    ComparisonTypeEnum.GREATER_OR_EQUAL: operator.ge,
+    ComparisonTypeEnum.LESS_OR_EQUAL: operator.le,
 }
 
 
@@ -142,3 +146,297 @@ def line_match(
             return False
 
     return True
+
+
+Row = Union[Sequence[str], Mapping[int, str]]
+RowPredicate = Callable[[Row], bool]
+
+
+class CompiledComparison(NamedTuple):
+    header: str
+    column_index: int
+    comparison_type: ComparisonTypeEnum
+    reference_value: Union[int, str]
+    raw_reference_value: str
+    predicate: RowPredicate
+
+
+class PredicateStats(NamedTuple):
+    definition: str
+    pass_rate: float
+    seconds_per_row: float
+
+
+class FilterPlan(NamedTuple):
+    """
+    The compiled comparisons of a query, in evaluation order. Rows shorter
+    than row_length are evaluated with short_row_predicates instead, in the
+    order of the definitions.
+    """
+
+    comparisons: Tuple[CompiledComparison, ...]
+    predicates: Tuple[RowPredicate, ...]
+    statistics: Tuple[PredicateStats, ...] = ()
+    short_row_predicates: Tuple[RowPredicate, ...] = ()
+    row_length: int = 0
+
+
+def _match_number(
+    column_index: int,
+    compare_values: Callable[[Any, Any], bool],
+    reference_value: int,
+    raw_reference_value: str,
+    row: Row,
+) -> bool:
+    comparison_value = row[column_index]
+    try:
+        return compare_values(int(comparison_value), reference_value)
+    except ValueError:
+        return compare_values(comparison_value, raw_reference_value)
+
+
+def _match_float_column(
+    column_index: int,
+    compare_values: Callable[[Any, Any], bool],
+    reference_value: int,
+    raw_reference_value: str,
+    row: Row,
+) -> bool:
+    comparison_value = row[column_index]
+    if "." in comparison_value:
+        return compare_values(comparison_value, raw_reference_value)
+
+    try:
+        return compare_values(int(comparison_value), reference_value)
+    except ValueError:
+        return compare_values(comparison_value, raw_reference_value)
+
+
+_INT_SIGNS = frozenset(["+", "-"])
+
+
+def _match_string_column(
+    column_index: int,
+    compare_values: Callable[[Any, Any], bool],
+    reference_value: int,
+    raw_reference_value: str,
+    row: Row,
+) -> bool:
+    comparison_value = row[column_index]
+    head = comparison_value[:1]
+    if not (head.isdigit() or head in _INT_SIGNS or head.isspace()):
+        return compare_values(comparison_value, raw_reference_value)
+
+    try:
+        return compare_values(int(comparison_value), reference_value)
+    except ValueError:
+        return compare_values(comparison_value, raw_reference_value)
+
+
+_number_matchers: Dict[Optional[ColumnTypeEnum], Callable[..., bool]] = {
+    None: _match_number,
+    ColumnTypeEnum.INT: _match_number,
+    ColumnTypeEnum.FLOAT: _match_float_column,
+    ColumnTypeEnum.STRING: _match_string_column,
+}
+
+
+def _match_text(
+    column_index: int,
+    compare_values: Callable[[Any, Any], bool],
+    reference_value: str,
+    row: Row,
+) -> bool:
+    return compare_values(row[column_index], reference_value)
+
+
+def compile_comparison(
+    header: str,
+    column_index: int,
+    comparison_type: ComparisonTypeEnum,
+    raw_reference_value: str,
+    column_type: Optional[ColumnTypeEnum] = None,
+) -> CompiledComparison:
+    if comparison_type not in compare:
+        raise ValueError(f"Invalid comparison type: '{comparison_type}'")
+
+    compare_values = compare[comparison_type]
+    try:
+        reference_value: Union[int, str] = int(raw_reference_value)
+        predicate: RowPredicate = partial(
+            _number_matchers[column_type],
+            column_index,
+            compare_values,
+            reference_value,
+            raw_reference_value,
+        )
+    except ValueError:
+        reference_value = raw_reference_value
+        predicate = partial(
+            _match_text, column_index, compare_values, raw_reference_value
+        )
+
+    return CompiledComparison(
+        header=header,
+        column_index=column_index,
+        comparison_type=comparison_type,
+        reference_value=reference_value,
+        raw_reference_value=raw_reference_value,
+        predicate=predicate,
+    )
+
+
+def compile_filters(
+    comparison_map: Dict[str, List[Dict[str, Union[ComparisonTypeEnum, str]]]],
+    headers: List[str],
+    column_types: Optional[Dict[str, ColumnTypeEnum]] = None,
+) -> FilterPlan:
+    """
+    Resolve the parsed filters against the headers once per query.
+
+    @param comparison_map The filters returned by parse_filters.
+    @param headers The headers of the CSV file/string.
+    @param column_types The inferred or declared type of the filtered columns,
+    used to pick a comparator that avoids int() on cells that cannot be ints.
+
+    @return A filter plan with the column indexes, the cast reference values and
+    the comparison functions already bound.
+    """
+    comparisons: List[CompiledComparison] = []
+
+    for comparison_header, header_comparisons in comparison_map.items():
+        if comparison_header not in headers:
+            raise ValueError(
+                f"Header '{comparison_header}' not found in CSV file/string"
+            )
+
+        column_index = headers.index(comparison_header)
+        for header_comparison in header_comparisons:
+            comparison_type: ComparisonTypeEnum = header_comparison.get(
+                "comparison_type"
+            )  # type: ignore
+            comparisons.append(
+                compile_comparison(
+                    header=comparison_header,
+                    column_index=column_index,
+                    comparison_type=comparison_type,
+                    raw_reference_value=str(header_comparison.get("reference_value")),
+                    column_type=(column_types or {}).get(comparison_header),
+                )
+            )
+
+    return FilterPlan(
+        comparisons=tuple(comparisons),
+        predicates=tuple(comparison.predicate for comparison in comparisons),
+    )
+
+
+def plan_match(row: Row, filter_plan: FilterPlan) -> bool:
+    predicates = filter_plan.predicates
+    if len(row) < filter_plan.row_length:
+        predicates = filter_plan.short_row_predicates
+
+    for predicate in predicates:
+        if not predicate(row):
+            return False
+
+    return True
+
+
+def describe_comparison(comparison: CompiledComparison) -> str:
+    return (
+        f"{comparison.header}{comparison.comparison_type.value}"
+        f"{comparison.raw_reference_value}"
+    )
+
+
+def measure_predicates(
+    definitions: Sequence[str],
+    predicates: Sequence[Callable[[Any], bool]],
+    sampled_rows: Sequence[Any],
+) -> List[PredicateStats]:
+    """
+    Run each predicate over every sampled row.
+
+    @return The share of rows passing each predicate and its time per row.
+    """
+    statistics = []
+    for definition, predicate in zip(definitions, predicates):
+        started_at = time.perf_counter()
+        passed_rows = sum(1 for row in sampled_rows if predicate(row))
+        seconds = time.perf_counter() - started_at
+
+        statistics.append(
+            PredicateStats(
+                definition=definition,
+                pass_rate=passed_rows / len(sampled_rows),
+                seconds_per_row=seconds / len(sampled_rows),
+            )
+        )
+
+    return statistics
+
+
+def selectivity_order(statistics: Sequence[PredicateStats]) -> List[int]:
+    """
+    Order the predicates so a row costs the least on average: each predicate
+    is ranked by its time divided by the share of rows it rejects, so cheap
+    and selective predicates run first and the ones rejecting nothing last.
+    Ties keep the definition order.
+
+    @return The indexes of the predicates in evaluation order.
+    """
+
+    def rank(index: int) -> float:
+        rejected_rate = 1 - statistics[index].pass_rate
+        if not rejected_rate:
+            return math.inf
+        return statistics[index].seconds_per_row / rejected_rate
+
+    return sorted(range(len(statistics)), key=rank)
+
+
+def order_filter_plan(
+    filter_plan: FilterPlan, sampled_rows: Sequence[Sequence[str]]
+) -> FilterPlan:
+    """
+    Reorder the comparisons of a plan by their cost and pass rate over the
+    sampled rows, see selectivity_order. Every comparison must pass for a row
+    to match, so the order does not change the matching rows of well formed
+    data. Rows too short to hold every filtered column keep the order of the
+    definitions, so they are rejected, or fail, as with the plan itself.
+
+    @param filter_plan The plan returned by compile_filters, or by the
+    compile_filters of processor_pyx/filter.pyx.
+    @param sampled_rows The first rows of the CSV data, the ones too short to
+    hold every filtered column are ignored.
+
+    @return The reordered plan, of the type of filter_plan, with the
+    statistics of its comparisons, the plan itself when no sampled row can be
+    evaluated.
+    """
+    if not filter_plan.comparisons:
+        return filter_plan
+
+    last_column_index = max(
+        comparison.column_index for comparison in filter_plan.comparisons
+    )
+    rows = [row for row in sampled_rows if len(row) > last_column_index]
+    if not rows:
+        return filter_plan
+
+    statistics = measure_predicates(
+        [describe_comparison(comparison) for comparison in filter_plan.comparisons],
+        filter_plan.predicates,
+        rows,
+    )
+    order = selectivity_order(statistics)
+    comparisons = tuple(filter_plan.comparisons[index] for index in order)
+
+    return type(filter_plan)(
+        comparisons=comparisons,
+        predicates=tuple(comparison.predicate for comparison in comparisons),
+        statistics=tuple(statistics[index] for index in order),
+        short_row_predicates=filter_plan.predicates,
+        row_length=last_column_index + 1,
+    )
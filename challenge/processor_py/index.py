@@ -0,0 +1,471 @@
+import json
+import locale
+import os
+import tempfile
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+from typing import Tuple
+
+from processor_py.filter import ComparisonTypeEnum, CompiledComparison
+from processor_py.filter import compile_comparison, tokenize_filter
+from processor_py.lexer import tokenize
+from processor_py.mmap_reader import has_lone_carriage_return, open_buffer
+from processor_py.mmap_reader import strip_line
+from processor_py.query import (
+    compile_query,
+    iter_matching_lines,
+    limit_lines,
+    serialize_headers,
+)
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE, SchemaDefinition
+from processor_py.writer import OutputSink, open_line_writer
+
+INDEX_EXTENSION = ".idx"
+INDEX_VERSION = 2
+# Above this fraction of candidate rows, seeking to each row is slower than a
+# sequential scan of the file.
+DEFAULT_MAX_CANDIDATE_FRACTION = 0.25
+
+
+class ColumnIndex(NamedTuple):
+    """
+    The rows of a column grouped by value.
+
+    values holds the distinct cells in string order and offsets the start of
+    the rows of each value. Cells that int() parses are also kept in numeric
+    order, the other ones in string order, as the filters compare them. Rows
+    too short to have the column are always candidates.
+    """
+
+    values: List[str]
+    offsets: List[List[int]]
+    numbers: List[int]
+    number_positions: List[int]
+    texts: List[str]
+    text_positions: List[int]
+    missing: List[int]
+
+
+class CsvIndex(NamedTuple):
+    """
+    The indexed columns of a CSV file. ragged holds the offsets of the rows
+    whose amount of fields differs from the headers, they are always
+    candidates so the row engine treats them as a scan does.
+    """
+
+    headers: List[str]
+    row_count: int
+    columns: Dict[str, ColumnIndex]
+    ragged: List[int]
+
+
+def index_path(csv_file_path: str) -> str:
+    return csv_file_path + INDEX_EXTENSION
+
+
+def file_signature(csv_file_path: str) -> Tuple[int, int]:
+    file_stat = os.stat(csv_file_path)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+def write_sidecar(destination: str, document: Dict[str, Any]) -> None:
+    """
+    Write a sidecar document as JSON, readers never see a partial file.
+    """
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(destination))
+    )
+    try:
+        with open(file_descriptor, "w", encoding="utf-8") as temporary_file:
+            json.dump(document, temporary_file, separators=(",", ":"))
+        os.replace(temporary_path, destination)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def parse_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def build_index(
+    csv_file_path: str, indexed_columns: str = "", destination: Optional[str] = None
+) -> str:
+    """
+    Write an index sidecar mapping the values of columns to their rows.
+
+    @param csv_file_path The path to the CSV file to be indexed.
+    @param indexed_columns The columns to be indexed, all when empty.
+    @param destination Where the index is written, defaults to the CSV file
+    path followed by ".idx", where process_csv_file looks for it.
+
+    @return The path of the index.
+    """
+    encoding = locale.getpreferredencoding(False)
+    mtime_ns, size = file_signature(csv_file_path)
+
+    with open_buffer(csv_file_path) as buffer:
+        headers = tokenize(
+            strip_line(buffer.readline(), encoding).decode(encoding), ","
+        )
+
+        column_names = headers
+        if indexed_columns:
+            column_names = tokenize(indexed_columns, ",")
+        for column_name in column_names:
+            if column_name not in headers:
+                raise ValueError(f"Header '{column_name}' not found in CSV file/string")
+
+        column_indexes = {name: headers.index(name) for name in column_names}
+        value_offsets: Dict[str, Dict[str, List[int]]] = {
+            name: {} for name in column_names
+        }
+        missing: Dict[str, List[int]] = {name: [] for name in column_names}
+        ragged: List[int] = []
+
+        row_count = 0
+        row_offset = buffer.tell()
+        for raw_line in iter(buffer.readline, b""):
+            row = tokenize(strip_line(raw_line, encoding).decode(encoding), ",")
+            if len(row) != len(headers):
+                ragged.append(row_offset)
+            for column_name, column_index in column_indexes.items():
+                if column_index >= len(row):
+                    missing[column_name].append(row_offset)
+                    continue
+
+                offsets = value_offsets[column_name].get(row[column_index])
+                if offsets is None:
+                    offsets = value_offsets[column_name][row[column_index]] = []
+                offsets.append(row_offset)
+
+            row_count += 1
+            row_offset += len(raw_line)
+
+    columns: Dict[str, Any] = {}
+    for column_name in column_names:
+        values = sorted(value_offsets[column_name])
+        numbers = sorted(
+            (number, position)
+            for position, number in enumerate(map(parse_int, values))
+            if number is not None
+        )
+        columns[column_name] = {
+            "values": values,
+            "offsets": [value_offsets[column_name][value] for value in values],
+            "numbers": numbers,
+            "missing": missing[column_name],
+        }
+
+    destination = destination or index_path(csv_file_path)
+    document = {
+        "version": INDEX_VERSION,
+        "mtime_ns": mtime_ns,
+        "size": size,
+        "encoding": encoding,
+        "headers": headers,
+        "row_count": row_count,
+        "columns": columns,
+        "ragged": ragged,
+    }
+
+    write_sidecar(destination, document)
+    return destination
+
+
+def _column_index(column: Dict[str, Any]) -> ColumnIndex:
+    values: List[str] = column["values"]
+    is_number = [False] * len(values)
+    numbers: List[int] = []
+    number_positions: List[int] = []
+
+    for number, position in column["numbers"]:
+        numbers.append(number)
+        number_positions.append(position)
+        is_number[position] = True
+
+    text_positions = [
+        position for position in range(len(values)) if not is_number[position]
+    ]
+
+    return ColumnIndex(
+        values=values,
+        offsets=column["offsets"],
+        numbers=numbers,
+        number_positions=number_positions,
+        texts=[values[position] for position in text_positions],
+        text_positions=text_positions,
+        missing=column["missing"],
+    )
+
+
+_loaded_indexes: Dict[str, Tuple[Tuple[int, int], CsvIndex]] = {}
+
+
+def load_index(csv_file_path: str) -> Optional[CsvIndex]:
+    """
+    Load the index sidecar of a CSV file, loaded indexes are kept in memory.
+
+    @return The index, None when there is none or the CSV file changed since
+    it was built.
+    """
+    sidecar_path = index_path(csv_file_path)
+    if not os.path.exists(sidecar_path):
+        return None
+
+    signature = file_signature(csv_file_path)
+    loaded = _loaded_indexes.get(sidecar_path)
+    if loaded is not None and loaded[0] == signature:
+        return loaded[1]
+
+    try:
+        with open(sidecar_path, "r", encoding="utf-8") as file:
+            document = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    expected = (INDEX_VERSION, *signature, locale.getpreferredencoding(False))
+    built_for = tuple(
+        document.get(name) for name in ("version", "mtime_ns", "size", "encoding")
+    )
+    if built_for != expected:
+        _loaded_indexes.pop(sidecar_path, None)
+        return None
+
+    csv_index = CsvIndex(
+        headers=document["headers"],
+        row_count=document["row_count"],
+        columns={
+            name: _column_index(column) for name, column in document["columns"].items()
+        },
+        ragged=document["ragged"],
+    )
+    _loaded_indexes[sidecar_path] = (signature, csv_index)
+    return csv_index
+
+
+def _key_range(
+    keys: List[Any], comparison_type: ComparisonTypeEnum, reference_value: Any
+) -> range:
+    if comparison_type is ComparisonTypeEnum.EQUAL:
+        return range(
+            bisect_left(keys, reference_value), bisect_right(keys, reference_value)
+        )
+    if comparison_type is ComparisonTypeEnum.GREATER_THAN:
+        return range(bisect_right(keys, reference_value), len(keys))
+    if comparison_type is ComparisonTypeEnum.GREATER_OR_EQUAL:
+        return range(bisect_left(keys, reference_value), len(keys))
+    if comparison_type is ComparisonTypeEnum.LESS_THAN:
+        return range(bisect_left(keys, reference_value))
+    return range(bisect_right(keys, reference_value))
+
+
+def comparison_offsets(
+    column_index: ColumnIndex,
+    comparison: CompiledComparison,
+    max_candidates: Optional[int] = None,
+) -> Optional[Set[int]]:
+    """
+    Look up the rows that may satisfy a comparison.
+
+    Int references compare int cells as numbers and the other cells as text,
+    text references compare every cell as text, like the filter plan.
+
+    @param column_index The index of the compared column.
+    @param comparison The compiled comparison.
+    @param max_candidates The comparison is not narrowed down when it keeps
+    more rows, checked before the offsets are gathered.
+
+    @return The offsets of the candidate rows, None when the index does not
+    narrow the comparison down.
+    """
+    comparison_type = comparison.comparison_type
+    if comparison_type is ComparisonTypeEnum.NOT_EQUAL:
+        return None
+
+    if isinstance(comparison.reference_value, int):
+        positions = [
+            column_index.number_positions[key]
+            for key in _key_range(
+                column_index.numbers, comparison_type, comparison.reference_value
+            )
+        ] + [
+            column_index.text_positions[key]
+            for key in _key_range(
+                column_index.texts, comparison_type, comparison.raw_reference_value
+            )
+        ]
+    else:
+        positions = list(
+            _key_range(column_index.values, comparison_type, comparison.reference_value)
+        )
+
+    if max_candidates is not None:
+        candidate_count = len(column_index.missing) + sum(
+            len(column_index.offsets[position]) for position in positions
+        )
+        if candidate_count > max_candidates:
+            return None
+
+    offsets = set(column_index.missing)
+    for position in positions:
+        offsets.update(column_index.offsets[position])
+
+    return offsets
+
+
+def compile_index_comparisons(
+    headers: List[str], row_filter_definitions: str
+) -> Optional[List[CompiledComparison]]:
+    """
+    Compile the filters to look them up in an index. The filters are not
+    printed nor validated here, the query compiles them again once the index is
+    chosen.
+
+    @return The comparisons, None when a filter is invalid.
+    """
+    comparisons = []
+    for filter_definition in row_filter_definitions.split("\n"):
+        if not filter_definition.strip():
+            continue
+
+        try:
+            header, operator, value = tokenize_filter(filter_definition)
+        except ValueError:
+            return None
+        if header not in headers:
+            return None
+
+        comparisons.append(
+            compile_comparison(
+                header, headers.index(header), ComparisonTypeEnum(operator), value
+            )
+        )
+
+    return comparisons
+
+
+def candidate_offsets(
+    csv_index: CsvIndex,
+    comparisons: Iterable[CompiledComparison],
+    max_candidates: Optional[int] = None,
+) -> Optional[List[int]]:
+    """
+    Intersect the candidate rows of every indexed comparison of the filters.
+
+    @param csv_index The index of the CSV file.
+    @param comparisons The comparisons of the filters.
+    @param max_candidates Comparisons keeping more rows are left to the row
+    engine.
+
+    @return The sorted offsets of the rows that may match and of the ragged
+    rows, None when no comparison is narrowed down by the index.
+    """
+    candidates: Optional[Set[int]] = None
+
+    for comparison in comparisons:
+        column_index = csv_index.columns.get(comparison.header)
+        if column_index is None:
+            continue
+
+        offsets = comparison_offsets(column_index, comparison, max_candidates)
+        if offsets is None:
+            continue
+
+        candidates = offsets if candidates is None else candidates & offsets
+
+    if candidates is None:
+        return None
+
+    return sorted(candidates.union(csv_index.ragged))
+
+
+def iter_indexed_lines(buffer: Any, offsets: List[int], encoding: str) -> Iterator[str]:
+    for row_offset in offsets:
+        buffer.seek(row_offset)
+        yield strip_line(buffer.readline(), encoding).decode(encoding)
+
+
+def process_csv_file_indexed(
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    max_candidate_fraction: float = DEFAULT_MAX_CANDIDATE_FRACTION,
+) -> bool:
+    """
+    Process the CSV file reading only the rows its index sidecar points to.
+
+    Candidate rows go through the row engine, so the output is the same as a
+    scan of the file. Files with a lone carriage return are left to the text
+    engine, the index splits rows on LF only.
+
+    @param csv_file_path The path to the CSV file to be processed.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed.
+    @param schema Optional column types of the filtered columns.
+    @param limit The maximum amount of matching rows written, all when None.
+    @param offset The amount of matching rows skipped before the first written.
+    @param max_candidate_fraction The index is not used when the filters keep
+    more than this fraction of the rows.
+
+    @return Whether the query was answered, nothing is written otherwise.
+    """
+    csv_index = load_index(csv_file_path)
+    if csv_index is None or not row_filter_definitions.strip():
+        return False
+    if has_lone_carriage_return(csv_file_path):
+        return False
+
+    encoding = locale.getpreferredencoding(False)
+
+    with open_buffer(csv_file_path) as buffer:
+        headers = tokenize(
+            strip_line(buffer.readline(), encoding).decode(encoding), ","
+        )
+        if headers != csv_index.headers:
+            return False
+
+        comparisons = compile_index_comparisons(headers, row_filter_definitions)
+        if comparisons is None:
+            return False
+
+        offsets = candidate_offsets(
+            csv_index,
+            comparisons,
+            int(csv_index.row_count * max_candidate_fraction),
+        )
+        if offsets is None:
+            return False
+
+        sampled_rows = [
+            tokenize(strip_line(line, encoding).decode(encoding), ",")
+            for line in islice(iter(buffer.readline, b""), DEFAULT_SCHEMA_SAMPLE_SIZE)
+        ]
+        query_plan = compile_query(
+            headers, selected_columns, row_filter_definitions, sampled_rows, schema
+        )
+
+        matching_lines = limit_lines(
+            iter_matching_lines(
+                iter_indexed_lines(buffer, offsets, encoding), query_plan
+            ),
+            limit,
+            offset,
+        )
+
+        with open_line_writer(output) as writer:
+            writer.write_line(serialize_headers(query_plan))
+            for serialized_line in matching_lines:
+                writer.write_line(serialized_line)
+
+    return True
@@ -1,4 +1,5 @@
-from typing import Generator, List
+from functools import partial
+from typing import Any, AnyStr, Callable, Generator, Iterable, List, Tuple
 
 
 def tokenize(data: str, delimiter: str) -> List[str]:
@@ -10,23 +11,108 @@ def tokenize(data: str, delimiter: str) -> List[str]:
 def lines_split_lazy(
     full_string: str, line_delimiter: str = "\n"
 ) -> Generator[str, None, None]:
-    has_other_lines = line_delimiter in full_string
-
-    if not has_other_lines:
+    if line_delimiter not in full_string:
         yield full_string
         return
 
-    sliced_string = full_string
+    delimiter_length = len(line_delimiter)
+    line_start = 0
+    line_position = full_string.find(line_delimiter)
+
+    while line_position != -1:
+        yield full_string[line_start:line_position]
+
+        line_start = line_position + delimiter_length
+        line_position = full_string.find(line_delimiter, line_start)
+
+    yield full_string[line_start:]
+
+
+SplitPlan = Tuple[int, int]
+
+
+def plan_split(column_count: int, column_indexes: Iterable[int]) -> SplitPlan:
+    """
+    Choose how many fields to split from each end of a line.
+
+    The needed columns are divided in a left group, split with str.split, and a
+    right group, split with str.rsplit, so the fields between them are never
+    materialised.
+
+    @param column_count The amount of columns of the CSV data.
+    @param column_indexes The columns that are filtered or selected.
+
+    @return The (left, right) maxsplit values, (0, 0) means a full split.
+    """
+    indexes = sorted({index for index in column_indexes if 0 <= index < column_count})
+    if not indexes:
+        return (0, 0)
+
+    best_plan: SplitPlan = (0, 0)
+    best_cost = column_count
+
+    for partition in range(len(indexes) + 1):
+        left_split = indexes[partition - 1] + 1 if partition > 0 else 0
+        right_split = (
+            column_count - indexes[partition] if partition < len(indexes) else 0
+        )
+        cost = (left_split + 1 if left_split else 0) + (
+            right_split + 1 if right_split else 0
+        )
 
-    while has_other_lines:
-        line_position = sliced_string.find(line_delimiter)
-        yield sliced_string[:line_position]
+        if cost < best_cost:
+            best_plan = (left_split, right_split)
+            best_cost = cost
 
-        sliced_string = sliced_string[line_position + len(line_delimiter) :]
-        has_other_lines = line_delimiter in sliced_string
+    return best_plan
 
-    if sliced_string:
-        yield sliced_string
 
-    elif full_string.endswith(line_delimiter):
-        yield ""
+def tokenize_columns(
+    delimiter: AnyStr,
+    column_count: int,
+    left_split: int,
+    right_split: int,
+    data: AnyStr,
+) -> List[Any]:
+    """
+    Tokenize only the fields reached by the split plan.
+
+    Fields that are not materialised are None, the remaining ones keep their
+    column index. Lines whose field count differs from the headers are fully
+    split so indexing keeps the behavior of tokenize.
+    """
+    if not right_split:
+        if not left_split:
+            return data.split(delimiter)
+        return data.split(delimiter, left_split)
+
+    if data.count(delimiter) != column_count - 1:
+        return data.split(delimiter)
+
+    right_fields: List[Any] = data.rsplit(delimiter, right_split)
+    right_fields[0] = None
+    gap: List[Any] = [None] * (column_count - right_split - left_split - 1)
+
+    if not left_split:
+        return gap + right_fields
+
+    return data.split(delimiter, left_split)[:left_split] + gap + right_fields
+
+
+def compile_tokenizer(
+    delimiter: AnyStr, column_count: int, column_indexes: Iterable[int]
+) -> Callable[[AnyStr], List[Any]]:
+    """
+    Build a tokenizer that materialises as few fields as the columns allow.
+
+    @param delimiter The field delimiter, str or bytes.
+    @param column_count The amount of columns of the CSV data.
+    @param column_indexes The columns that are filtered or selected.
+
+    @return A function from a line to its fields, indexed like tokenize.
+    """
+    if not delimiter:
+        raise ValueError("Delimiter cannot be an empty string")
+
+    left_split, right_split = plan_split(column_count, column_indexes)
+    return partial(tokenize_columns, delimiter, column_count, left_split, right_split)
@@ -0,0 +1,284 @@
+import locale
+import mmap
+import re
+from contextlib import contextmanager
+from io import BytesIO
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from processor_py.filter import FilterPlan
+from processor_py.lexer import compile_tokenizer, tokenize
+from processor_py.query import QueryPlan, compile_query, limit_lines
+from processor_py.query import serialize_headers
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE, SchemaDefinition
+from processor_py.serializer import compile_projection
+from processor_py.writer import OutputSink, open_line_writer
+
+try:
+    from scanner import scan_lines  # compiled from processor_pyx/scanner.pyx
+except ImportError:
+    scan_lines = None
+
+Buffer = Union[BytesIO, mmap.mmap]
+ScanComparison = Tuple[int, str, int]
+
+DEFAULT_SCAN_WINDOW_SIZE = 1024 * 1024
+LONE_CARRIAGE_RETURN = re.compile(rb"\r(?!\n)")
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+def _may_be_unicode_space(byte: int) -> bool:
+    return byte > 0x7F or 0x1C <= byte <= 0x1F
+
+
+def strip_line(line: bytes, encoding: str) -> bytes:
+    """
+    Strip a raw line the same way str.strip() strips the decoded line.
+
+    bytes.strip() only removes ASCII whitespace, so lines ending in a byte that
+    may belong to unicode whitespace are decoded and stripped as text.
+    """
+    line = line.strip()
+    if line and (_may_be_unicode_space(line[0]) or _may_be_unicode_space(line[-1])):
+        return line.decode(encoding).strip().encode(encoding)
+
+    return line
+
+
+def compile_byte_line_serializer(
+    query_plan: QueryPlan, encoding: str
+) -> Callable[[bytes], str]:
+    """
+    @return A function serializing the selected columns of a stripped raw line.
+    """
+    column_count = len(query_plan.headers)
+    selected_column_indexes = sorted(query_plan.selected_column_indexes)
+    tokenize_selected = compile_tokenizer(b",", column_count, selected_column_indexes)
+    project = compile_projection(selected_column_indexes)
+
+    def serialize_line(line: bytes) -> str:
+        return b",".join(filter(None, project(tokenize_selected(line)))).decode(
+            encoding
+        )
+
+    return serialize_line
+
+
+def compile_byte_line_matcher(
+    query_plan: QueryPlan, encoding: str
+) -> Callable[[bytes], Optional[str]]:
+    """
+    Compile the filters of the query over raw lines.
+
+    Lines are only split up to the filtered columns, the split is extended to
+    the selected columns when the line matches. Lines with another amount of
+    fields than the headers are decoded whole.
+
+    @return A function returning the serialized line when the raw line matches
+    the filters, None otherwise.
+    """
+    filter_plan = query_plan.filter_plan
+    match_plan = query_plan.match_plan
+    column_count = len(query_plan.headers)
+    filter_column_indexes = sorted(
+        {comparison.column_index for comparison in filter_plan.comparisons}
+    )
+
+    tokenize_filtered = compile_tokenizer(b",", column_count, filter_column_indexes)
+    serialize_line = compile_byte_line_serializer(query_plan, encoding)
+    filtered_values = [""] * column_count
+
+    def match_line(raw_line: bytes) -> Optional[str]:
+        line = strip_line(raw_line, encoding)
+
+        if filter_column_indexes:
+            fields = tokenize_filtered(line)
+            if len(fields) == column_count:
+                for index in filter_column_indexes:
+                    filtered_values[index] = fields[index].decode(encoding)
+                values = filtered_values
+            else:
+                # Ragged lines are fully split, the plan checks short rows in
+                # the order of the definitions, as the text engine does.
+                values = [field.decode(encoding) for field in fields]
+
+            if not match_plan(values, filter_plan):
+                return None
+
+        return serialize_line(line)
+
+    return match_line
+
+
+def iter_matching_byte_lines(
+    lines: Iterable[bytes], query_plan: QueryPlan, encoding: str
+) -> Iterator[str]:
+    """
+    Filter raw lines decoding only the filtered and the selected columns.
+
+    @param lines The raw lines of the CSV data.
+    @param query_plan The compiled query.
+    @param encoding The encoding of the CSV data.
+
+    @return The serialized matching lines.
+    """
+    match_line = compile_byte_line_matcher(query_plan, encoding)
+
+    for raw_line in lines:
+        serialized_line = match_line(raw_line)
+        if serialized_line is not None:
+            yield serialized_line
+
+
+def scan_comparisons(filter_plan: FilterPlan) -> Optional[List[ScanComparison]]:
+    """
+    Translate the filter plan to the comparisons evaluated by the scanner.
+
+    @return The comparisons, None when the scanner is not compiled or a filter
+    does not compare against an int64.
+    """
+    if scan_lines is None:
+        return None
+
+    comparisons: List[ScanComparison] = []
+    for comparison in filter_plan.comparisons:
+        reference_value = comparison.reference_value
+        if not isinstance(reference_value, int) or not (
+            _INT64_MIN <= reference_value <= _INT64_MAX
+        ):
+            return None
+
+        comparisons.append(
+            (comparison.column_index, comparison.comparison_type.value, reference_value)
+        )
+
+    return comparisons
+
+
+def iter_scanned_byte_lines(
+    data: Any,
+    start: int,
+    query_plan: QueryPlan,
+    encoding: str,
+    comparisons: List[ScanComparison],
+    window_size: int = DEFAULT_SCAN_WINDOW_SIZE,
+) -> Iterator[str]:
+    """
+    Filter the lines of a buffer with the compiled scanner, which releases the
+    GIL while it looks for the lines matching the numeric filters.
+
+    Lines the scanner leaves undecided are matched by the row engine.
+
+    @param data The CSV data, any object exposing a bytes buffer.
+    @param start Offset of the first data line.
+    @param query_plan The compiled query.
+    @param encoding The encoding of the CSV data.
+    @param comparisons The comparisons returned by scan_comparisons.
+    @param window_size Amount of bytes scanned without the GIL at once.
+
+    @return The serialized matching lines.
+    """
+    column_count = len(query_plan.headers)
+    match_line = compile_byte_line_matcher(query_plan, encoding)
+    serialize_line = compile_byte_line_serializer(query_plan, encoding)
+
+    while start < len(data):
+        lines, start = scan_lines(
+            data, start, start + window_size, column_count, comparisons
+        )
+        for line_start, line_end, is_undecided in lines:
+            if not is_undecided:
+                yield serialize_line(data[line_start:line_end])
+                continue
+
+            serialized_line = match_line(data[line_start:line_end])
+            if serialized_line is not None:
+                yield serialized_line
+
+
+@contextmanager
+def open_buffer(csv_file_path: str) -> Iterator[Buffer]:
+    with open(csv_file_path, "rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield BytesIO()
+            return
+
+        with buffer:
+            yield buffer
+
+
+def has_lone_carriage_return(csv_file_path: str) -> bool:
+    """
+    Tell whether a CR of the file is not followed by a LF. The text engine
+    reads the file with universal newlines, where such a CR ends a line, while
+    the engines reading raw bytes only split lines on LF.
+
+    @param csv_file_path The path to the CSV file.
+
+    @return Whether the file has to be read by the text engine.
+    """
+    with open_buffer(csv_file_path) as buffer:
+        if isinstance(buffer, BytesIO) or buffer.find(b"\r") == -1:
+            return False
+
+        return LONE_CARRIAGE_RETURN.search(buffer) is not None
+
+
+def process_csv_file_mmap(
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> None:
+    """
+    Process the CSV file through a memory map, rejected rows are never decoded.
+
+    @param csv_file_path The path to the CSV file to be processed.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed.
+    @param schema Optional column types of the filtered columns.
+    @param limit The maximum amount of matching rows written, all when None.
+    @param offset The amount of matching rows skipped before the first written.
+
+    @return void
+    """
+    encoding = locale.getpreferredencoding(False)
+
+    with open_buffer(csv_file_path) as buffer:
+        headers = tokenize(
+            strip_line(buffer.readline(), encoding).decode(encoding), ","
+        )
+        data_start = buffer.tell()
+        lines = iter(buffer.readline, b"")
+
+        sampled_lines = list(islice(lines, DEFAULT_SCHEMA_SAMPLE_SIZE))
+        sampled_rows = [
+            tokenize(strip_line(line, encoding).decode(encoding), ",")
+            for line in sampled_lines
+        ]
+        query_plan = compile_query(
+            headers, selected_columns, row_filter_definitions, sampled_rows, schema
+        )
+
+        matching_lines = iter_matching_byte_lines(
+            chain(sampled_lines, lines), query_plan, encoding
+        )
+        comparisons = scan_comparisons(query_plan.filter_plan)
+        if comparisons is not None and isinstance(buffer, mmap.mmap):
+            matching_lines = iter_scanned_byte_lines(
+                buffer, data_start, query_plan, encoding, comparisons
+            )
+
+        matching_lines = limit_lines(matching_lines, limit, offset)
+
+        with open_line_writer(output) as writer:
+            writer.write_line(serialize_headers(query_plan))
+            for serialized_line in matching_lines:
+                writer.write_line(serialized_line)
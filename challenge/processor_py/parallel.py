@@ -0,0 +1,285 @@
+import locale
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from multiprocessing.context import BaseContext
+from typing import Deque, Generator, List, NamedTuple, Optional, Tuple
+
+from processor_py.lexer import tokenize
+from processor_py.query import (
+    QueryPlan,
+    compile_query,
+    is_limited,
+    iter_block_lines,
+    iter_matching_lines,
+    limit_lines,
+    serialize_headers,
+)
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE, SchemaDefinition
+from processor_py.writer import OutputSink, open_line_writer
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+ByteRange = Tuple[int, int]
+RangeTask = Tuple[str, int, int, str]
+
+
+class QueryDefinition(NamedTuple):
+    """
+    The arguments of compile_query. Workers compile their own plan from them,
+    the plan of the caller may hold filters of the modules compiled into
+    libcsv, which a worker started from a fresh interpreter cannot import.
+    """
+
+    headers: List[str]
+    selected_columns: str
+    row_filter_definitions: str
+    sampled_rows: List[List[str]]
+    schema: SchemaDefinition
+
+
+_worker_query_plan: Optional[QueryPlan] = None
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    if workers is None or workers == 0:
+        return os.cpu_count() or 1
+
+    if workers < 0:
+        raise ValueError(f"Invalid workers: '{workers}'")
+
+    return workers
+
+
+def split_byte_ranges(
+    csv_file_path: str, data_start: int, range_count: int
+) -> List[ByteRange]:
+    """
+    Split the data section of a file into byte ranges aligned to line breaks.
+
+    @param csv_file_path The path to the CSV file.
+    @param data_start The offset of the first byte after the header line.
+    @param range_count The amount of ranges wanted, the last one may be shorter.
+
+    @return The (start, end) offsets of each range, every range but the last one
+    ends right after a line break.
+    """
+    file_size = os.path.getsize(csv_file_path)
+    if data_start >= file_size:
+        return []
+
+    range_size = max(1, -(-(file_size - data_start) // max(range_count, 1)))
+    byte_ranges: List[ByteRange] = []
+
+    with open(csv_file_path, "rb") as file:
+        start = data_start
+        while start < file_size:
+            end = start + range_size
+            if end >= file_size:
+                end = file_size
+            else:
+                file.seek(end - 1)
+                file.readline()
+                end = file.tell()
+
+            byte_ranges.append((start, end))
+            start = end
+
+    return byte_ranges
+
+
+def python_executable() -> Optional[str]:
+    """
+    @return The interpreter of the Python installation in use, None when it
+    cannot be found.
+    """
+    version = f"{sys.version_info[0]}.{sys.version_info[1]}"
+    for executable in (
+        os.path.join(sys.exec_prefix, "bin", f"python{version}"),
+        os.path.join(sys.exec_prefix, "bin", f"python{sys.version_info[0]}"),
+        os.path.join(sys.exec_prefix, "python.exe"),
+    ):
+        if os.access(executable, os.X_OK):
+            return executable
+
+    return None
+
+
+def worker_context() -> Tuple[bool, Optional[BaseContext]]:
+    """
+    Pick how the worker processes are started.
+
+    A fork only copies the calling thread, so a lock held by another thread of
+    the process stays locked in the worker. The interpreter embedded by libcsv
+    has no executable and runs inside hosts that may have threads of their
+    own, so there the workers are forked from a fork server, or spawned,
+    started from the interpreter of the Python installation. Otherwise they
+    are forked, as a fork does not import the modules again.
+
+    @return Whether worker processes can be started, and their context.
+    """
+    start_methods = multiprocessing.get_all_start_methods()
+    if sys.executable:
+        if "fork" in start_methods:
+            return True, multiprocessing.get_context("fork")
+        return True, None
+
+    executable = python_executable()
+    if executable is None:
+        return False, None
+
+    context = multiprocessing.get_context(
+        "forkserver" if "forkserver" in start_methods else "spawn"
+    )
+    context.set_executable(executable)
+    return True, context
+
+
+def initialize_worker(query: QueryDefinition) -> None:
+    global _worker_query_plan
+    _worker_query_plan = compile_query(*query)
+
+
+def read_range_lines(
+    csv_file_path: str, start: int, end: int, encoding: str
+) -> List[str]:
+    with open(csv_file_path, "rb") as file:
+        file.seek(start)
+        data = file.read(end - start)
+
+    lines = data.decode(encoding).split("\n")
+    if lines and not lines[-1]:
+        lines.pop()
+
+    return lines
+
+
+def process_worker_range(task: RangeTask) -> str:
+    if _worker_query_plan is None:
+        raise RuntimeError("The worker was not initialized")
+
+    return process_byte_range(task, _worker_query_plan)
+
+
+def process_byte_range(task: RangeTask, query_plan: QueryPlan) -> str:
+    csv_file_path, start, end, encoding = task
+
+    lines = map(str.strip, read_range_lines(csv_file_path, start, end, encoding))
+    matching_lines = list(iter_matching_lines(lines, query_plan))
+    if not matching_lines:
+        return ""
+
+    matching_lines.append("")
+    return "\n".join(matching_lines)
+
+
+def iter_parallel_blocks(
+    csv_file_path: str,
+    data_start: int,
+    query: QueryDefinition,
+    query_plan: QueryPlan,
+    workers: int,
+    encoding: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Generator[str, None, None]:
+    """
+    Process the byte ranges of a file in a process pool, see worker_context.
+    The ranges are processed in this process when no worker can be started.
+
+    @param query The definition of query_plan, compiled again by each worker.
+    @param query_plan The plan used when the ranges are processed here.
+
+    @return The serialized matching lines of each range, in file order.
+    """
+    data_size = os.path.getsize(csv_file_path) - data_start
+    range_count = max(workers, -(-data_size // chunk_size))
+    byte_ranges = split_byte_ranges(csv_file_path, data_start, range_count)
+    can_start_workers, context = worker_context()
+
+    if len(byte_ranges) <= 1 or workers == 1 or not can_start_workers:
+        for start, end in byte_ranges:
+            yield process_byte_range((csv_file_path, start, end, encoding), query_plan)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=initialize_worker,
+        initargs=(query,),
+    ) as executor:
+        pending: Deque[Future[str]] = deque()
+        try:
+            for start, end in byte_ranges:
+                task = (csv_file_path, start, end, encoding)
+                pending.append(executor.submit(process_worker_range, task))
+
+                if len(pending) > workers * 2:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def process_csv_file_parallel(
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    workers: Optional[int] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> None:
+    """
+    Process the CSV file in newline aligned byte ranges across worker processes.
+
+    @param csv_file_path The path to the CSV file to be processed.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed.
+    @param schema Optional column types of the filtered columns.
+    @param workers Amount of worker processes, all the CPUs when None or 0.
+    @param limit The maximum amount of matching rows written, all when None.
+    @param offset The amount of matching rows skipped before the first written.
+
+    @return void
+    """
+    worker_count = resolve_workers(workers)
+    encoding = locale.getpreferredencoding(False)
+
+    with open(csv_file_path, "rb") as file:
+        headers = tokenize(file.readline().decode(encoding).strip(), ",")
+        data_start = file.tell()
+        sampled_rows = [
+            tokenize(line.decode(encoding).strip(), ",")
+            for line in islice(file, DEFAULT_SCHEMA_SAMPLE_SIZE)
+        ]
+
+    query = QueryDefinition(
+        headers, selected_columns, row_filter_definitions, sampled_rows, schema
+    )
+    query_plan = compile_query(*query)
+
+    blocks = iter_parallel_blocks(
+        csv_file_path, data_start, query, query_plan, worker_count, encoding
+    )
+    limited = is_limited(limit, offset)
+
+    with open_line_writer(output) as writer:
+        writer.write_line(serialize_headers(query_plan))
+        if not limited:
+            for block in blocks:
+                writer.write_text(block)
+            return
+
+        for line in limit_lines(iter_block_lines(blocks), limit, offset):
+            writer.write_line(line)
+
+        # Stop the pool now, the ranges still pending are never processed.
+        blocks.close()
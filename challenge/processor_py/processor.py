@@ -1,12 +1,49 @@
 import sys
-from typing import List, Set, Dict, Union
-from processor_py.serializer import stringify_line
+from functools import partial
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Union
+from processor_py.aio import aprocess_csv_file
+from processor_py.batch import BatchQuery, process_lines_batch
+from processor_py.cache import ResultCache, default_result_cache, run_cached
+from processor_py.columnar import process_csv_file_columnar
+from processor_py.engine import EngineEnum, resolve_engine
+from processor_py.index import build_index, process_csv_file_indexed
 from processor_py.lexer import tokenize, lines_split_lazy
-from processor_py.filter import line_match, parse_filters
+from processor_py.mmap_reader import has_lone_carriage_return, process_csv_file_mmap
+from processor_py.parallel import process_csv_file_parallel
+from processor_py.profiling import ProfileOption, Profiler, measure, profile_query
+from processor_py.query import (
+    compile_query,
+    is_limited,
+    iter_matching_lines,
+    limit_lines,
+    parse_columns,
+    serialize_headers,
+)
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE, SchemaDefinition
+from processor_py.writer import OutputSink, echo_filters, open_line_writer
+from processor_py.zonemap import iter_zoned_read, plan_zoned_read, resolve_zone_maps
+
+__all__ = [
+    "process_csv",
+    "process_csv_file",
+    "process_lines",
+    "parse_columns",
+    "index_csv_file",
+    "process_csv_file_batch",
+    "aprocess_csv_file",
+]
 
 
 def process_csv(
-    csv_data: str, selected_columns: str, row_filter_definitions: str
+    csv_data: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    profile: ProfileOption = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
 ) -> None:
     """
     Process the CSV data by applying filters and selecting columns.
@@ -14,37 +51,37 @@ def process_csv(
     @param csv_data The CSV data to be processed.
     @param selected_columns The columns to be selected from the CSV data.
     @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed: stdout when None, a file
+    descriptor or an object with a write(str) method.
+    @param schema Optional column types such as "age:int", the filtered columns
+    missing from it are inferred from the first rows.
+    @param profile Records the time, calls and rows of each stage: True or
+    "stderr" writes a summary to stderr, a path writes JSON, a Profiler is only
+    filled. Defaults to the LIBCSV_PROFILE environment variable.
+    @param limit The maximum amount of matching rows written, all when None.
+    @param offset The amount of matching rows skipped before the first written.
 
     @return void
     """
     try:
-        splitted_lines = lines_split_lazy(csv_data)
-        headers = tokenize(next(splitted_lines), ",")
-
-        filter_comparisons = {}
-        if row_filter_definitions:
-            filter_comparisons = parse_filters(row_filter_definitions)
-
-        selected_column_indexes: set[int] = parse_columns(
-            selected_columns, headers
-        ).get(
-            "selected_column_indexes"
-        )  # type: ignore
-
-        serialized_headers_response = stringify_line(
-            {index: headers[index] for index in selected_column_indexes}
-        )
+        echo_filters(row_filter_definitions, output)
+        with profile_query(profile) as profiler:
+            splitted_lines: Iterator[str] = lines_split_lazy(csv_data)
+            if profiler is not None:
+                splitted_lines = profiler.wrap_iter("lines_split_lazy", splitted_lines)
+            headers = tokenize(next(splitted_lines), ",")
 
-        serialized_response = serialized_headers_response
-        for line in splitted_lines:
-            tokenized_line = tokenize(line, ",")
-            if line_match(tokenized_line, headers, filter_comparisons):
-                serialized_line = stringify_line(
-                    {index: tokenized_line[index] for index in selected_column_indexes}
-                )
-                serialized_response = "\n".join([serialized_response, serialized_line])
-
-        print(serialized_response)
+            process_lines(
+                headers,
+                splitted_lines,
+                selected_columns,
+                row_filter_definitions,
+                output,
+                schema,
+                profiler,
+                limit,
+                offset,
+            )
 
     except Exception as error:
         sys.stderr.write(str(error))
@@ -52,7 +89,18 @@ def process_csv(
 
 
 def process_csv_file(
-    csv_file_path: str, selected_columns: str, row_filter_definitions: str
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    workers: Optional[int] = 1,
+    engine: Union[EngineEnum, str, None] = None,
+    cache: Optional[ResultCache] = None,
+    profile: ProfileOption = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    zone_maps: Optional[bool] = None,
 ) -> None:
     """
     Process the CSV file by applying filters and selecting columns.
@@ -60,72 +108,305 @@ def process_csv_file(
     @param csv_file_path The path to the CSV file to be processed.
     @param selected_columns The columns to be selected from the CSV data.
     @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed: stdout when None, a file
+    descriptor or an object with a write(str) method.
+    @param schema Optional column types such as "age:int", the filtered columns
+    missing from it are inferred from the first rows.
+    @param workers Amount of worker processes, values other than 1 split the
+    file in byte ranges processed in parallel, None or 0 uses all the CPUs.
+    @param engine How the file is read: "text" decodes every line, "mmap" scans
+    the raw bytes and decodes only the filtered and selected columns, "columnar"
+    evaluates the filters over blocks of rows as NumPy arrays. Defaults to the
+    LIBCSV_ENGINE environment variable, then to "text".
+    @param cache Keeps the output of repeated queries until the file changes.
+    Defaults to a cache shared between calls when the LIBCSV_CACHE_SIZE or
+    LIBCSV_CACHE_DIR environment variable is set, otherwise nothing is cached.
+    LIBCSV_CACHE_DIR_SIZE bounds the bytes kept in LIBCSV_CACHE_DIR.
+    When the file has an index sidecar built by index_csv_file, selective
+    filters on its columns only read the candidate rows, whatever the engine.
+    @param profile Records the time, calls and rows of each stage, as in
+    process_csv. Only the text engine is timed stage by stage.
+    @param limit The maximum amount of matching rows written, all when None.
+    The file is no longer read once they are written.
+    @param offset The amount of matching rows skipped before the first written.
+    Limited queries are not cached.
+    @param zone_maps Keeps the min/max and the distinct values of the filtered
+    columns per block of about 1MB in a ".zones" sidecar, built by the first
+    query filtering them, so blocks where the filters cannot match are not
+    read. Defaults to the LIBCSV_ZONE_MAPS environment variable, disabled
+    when unset. Blocks are skipped by the text reader, whatever the engine,
+    unless the query runs on several workers.
 
     @return void
     """
     try:
-        serialized_response = ""
+        echo_filters(row_filter_definitions, output)
+        with profile_query(profile) as profiler:
+            input_engine = resolve_engine(engine)
+            use_zone_maps = resolve_zone_maps(zone_maps)
+            result_cache = cache if cache is not None else default_result_cache()
 
-        with open(csv_file_path, "r") as file:
-            headers = tokenize(file.readline().strip(), ",")
+            if result_cache is None or is_limited(limit, offset):
+                dispatch_csv_file(
+                    csv_file_path,
+                    selected_columns,
+                    row_filter_definitions,
+                    output,
+                    schema,
+                    workers,
+                    input_engine,
+                    profiler,
+                    limit,
+                    offset,
+                    use_zone_maps,
+                )
+                return
 
-            filter_comparisons = {}
-            if row_filter_definitions:
-                filter_comparisons = parse_filters(row_filter_definitions)
+            run_cached(
+                result_cache,
+                csv_file_path,
+                selected_columns,
+                row_filter_definitions,
+                output,
+                partial(
+                    dispatch_csv_file,
+                    csv_file_path,
+                    selected_columns,
+                    row_filter_definitions,
+                    schema=schema,
+                    workers=workers,
+                    engine=input_engine,
+                    profiler=profiler,
+                    zone_maps=use_zone_maps,
+                ),
+            )
+
+    except Exception as error:
+        sys.stderr.write(str(error))
+        sys.exit(1)
 
-            selected_column_indexes: set[int] = parse_columns(
-                selected_columns, headers
-            ).get(
-                "selected_column_indexes"
-            )  # type: ignore
 
-            serialized_headers_response = stringify_line(
-                {index: headers[index] for index in selected_column_indexes}
+def dispatch_csv_file(
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    workers: Optional[int] = 1,
+    engine: EngineEnum = EngineEnum.TEXT,
+    profiler: Optional[Profiler] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    zone_maps: bool = False,
+) -> None:
+    """
+    Run the query with the engine chosen by process_csv_file, or through the
+    index sidecar of the file when it narrows the filters down, or over the
+    blocks its zone map keeps. Files with a line ending in a lone CR are read
+    by the text engine, the only one splitting lines on it, as zone maps do.
+
+    @return void
+    """
+    if process_csv_file_indexed(
+        csv_file_path,
+        selected_columns,
+        row_filter_definitions,
+        output,
+        schema,
+        limit,
+        offset,
+    ):
+        return
+
+    if zone_maps and workers == 1:
+        with measure(profiler, "zone_map"):
+            zoned_read = plan_zoned_read(
+                csv_file_path, row_filter_definitions, map_on_read=True
             )
 
-            serialized_response = serialized_headers_response
-            for line in file:
-                tokenized_line = tokenize(line.strip(), ",")
-                if line_match(tokenized_line, headers, filter_comparisons):
-                    serialized_line = stringify_line(
-                        {
-                            index: tokenized_line[index]
-                            for index in selected_column_indexes
-                        }
-                    )
-                    serialized_response = "\n".join(
-                        [serialized_response, serialized_line]
-                    )
-
-        print(serialized_response)
+        if zoned_read is not None:
+            zoned_lines = iter_zoned_read(csv_file_path, zoned_read)
+            if profiler is not None:
+                zoned_lines = profiler.wrap_iter("read_lines", zoned_lines)
+
+            process_lines(
+                zoned_read.headers,
+                zoned_lines,
+                selected_columns,
+                row_filter_definitions,
+                output,
+                schema,
+                profiler,
+                limit,
+                offset,
+            )
+            return
+
+    if (workers != 1 or engine is not EngineEnum.TEXT) and has_lone_carriage_return(
+        csv_file_path
+    ):
+        workers = 1
+        engine = EngineEnum.TEXT
+
+    if workers != 1:
+        process_csv_file_parallel(
+            csv_file_path,
+            selected_columns,
+            row_filter_definitions,
+            output,
+            schema,
+            workers,
+            limit=limit,
+            offset=offset,
+        )
+        return
+
+    if engine is EngineEnum.COLUMNAR:
+        process_csv_file_columnar(
+            csv_file_path,
+            selected_columns,
+            row_filter_definitions,
+            output,
+            schema,
+            limit=limit,
+            offset=offset,
+        )
+        return
+
+    if engine is EngineEnum.MMAP:
+        process_csv_file_mmap(
+            csv_file_path,
+            selected_columns,
+            row_filter_definitions,
+            output,
+            schema,
+            limit,
+            offset,
+        )
+        return
+
+    with open(csv_file_path, "r") as file:
+        headers = tokenize(file.readline().strip(), ",")
+        lines: Iterator[str] = map(str.strip, file)
+        if profiler is not None:
+            lines = profiler.wrap_iter("read_lines", lines)
+
+        process_lines(
+            headers,
+            lines,
+            selected_columns,
+            row_filter_definitions,
+            output,
+            schema,
+            profiler,
+            limit,
+            offset,
+        )
+
 
+def process_lines(
+    headers: List[str],
+    lines: Iterator[str],
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    schema: SchemaDefinition = None,
+    profiler: Optional[Profiler] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> None:
+    """
+    Filter the lines and stream the selected columns to the output.
+
+    Only the sampled lines are fully tokenized, the other ones are split up to
+    the filtered and selected columns.
+
+    @param headers The headers of the CSV data.
+    @param lines The lines of the CSV data, without the line break.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param output Where serialized rows are streamed.
+    @param schema Optional column types of the filtered columns.
+    @param profiler Times the stages of the query when set.
+    @param limit The maximum amount of matching rows written, all when None.
+    @param offset The amount of matching rows skipped before the first written.
+
+    @return void
+    """
+    with measure(profiler, "compile_query"):
+        sampled_lines = list(islice(lines, DEFAULT_SCHEMA_SAMPLE_SIZE))
+        sampled_rows = [tokenize(line, ",") for line in sampled_lines]
+        query_plan = compile_query(
+            headers, selected_columns, row_filter_definitions, sampled_rows, schema
+        )
+    if profiler is not None and query_plan.filter_plan.statistics:
+        profiler.describe(
+            "filter_order",
+            (stats._asdict() for stats in query_plan.filter_plan.statistics),
+        )
+
+    matching_lines = limit_lines(
+        iter_matching_lines(chain(sampled_lines, lines), query_plan, profiler),
+        limit,
+        offset,
+    )
+
+    with open_line_writer(output) as writer:
+        write_line = writer.write_line
+        if profiler is not None:
+            write_line = profiler.wrap("write", write_line)
+
+        write_line(serialize_headers(query_plan))
+        for serialized_line in matching_lines:
+            write_line(serialized_line)
+
+
+def index_csv_file(csv_file_path: str, indexed_columns: str = "") -> None:
+    """
+    Build the index sidecar of a CSV file, process_csv_file then seeks to the
+    rows matching equality and range filters on its columns instead of scanning
+    the file. The index is ignored once the file is modified.
+
+    @param csv_file_path The path to the CSV file to be indexed.
+    @param indexed_columns The columns to be indexed, all when empty.
+
+    @return void
+    """
+    try:
+        build_index(csv_file_path, indexed_columns)
     except Exception as error:
         sys.stderr.write(str(error))
         sys.exit(1)
 
 
-def parse_columns(
-    selected_columns: str, headers: List[str]
-) -> dict[str, Union[List[str], Set[int]]]:
+def process_csv_file_batch(
+    csv_file_path: str,
+    queries: Iterable[Sequence[Any]],
+    schema: SchemaDefinition = None,
+) -> None:
     """
-    Parse the columns from the CSV data.
+    Process many queries over the CSV file in a single pass, the file is read
+    and each line tokenized once for the whole batch.
+
+    @param csv_file_path The path to the CSV file to be processed.
+    @param queries The queries, as BatchQuery or (selected_columns,
+    row_filter_definitions[, output]) sequences. Each output receives the rows
+    of its query as process_csv_file writes them, stdout when None. Queries
+    sharing an output write to it one after the other, in query order.
+    @param schema Optional column types such as "age:int", shared by the
+    queries.
 
-    @return The columns from the CSV data.
+    @return void
     """
-    selected_column_tokens = []
-
-    if selected_columns:
-        selected_column_tokens = tokenize(selected_columns, ",")
-
-        selected_column_indexes: Set[int] = set()
-        for column in selected_column_tokens:
-            if column not in headers:
-                raise ValueError(f"Header '{column}' not found in CSV file/string")
-            selected_column_indexes.add(headers.index(column))
-    else:
-        selected_column_indexes = set(range(len(headers)))
-
-    return {
-        "selected_column_indexes": selected_column_indexes,
-        "selected_columns": selected_column_tokens,
-    }
+    try:
+        batch_queries = [BatchQuery(*query) for query in queries]
+        for batch_query in batch_queries:
+            echo_filters(batch_query.row_filter_definitions, batch_query.output)
+
+        with open(csv_file_path, "r") as file:
+            headers = tokenize(file.readline().strip(), ",")
+            process_lines_batch(headers, map(str.strip, file), batch_queries, schema)
+
+    except Exception as error:
+        sys.stderr.write(str(error))
+        sys.exit(1)
@@ -0,0 +1,264 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+PROFILE_ENVIRONMENT_VARIABLE = "LIBCSV_PROFILE"
+STDERR_DESTINATION = "stderr"
+
+Item = TypeVar("Item")
+Result = TypeVar("Result")
+
+
+class StageStats:
+    """
+    A class used to accumulate the counters of a stage.
+
+    seconds includes the stages run inside it, self_seconds excludes them.
+    """
+
+    __slots__ = ("seconds", "self_seconds", "calls", "rows_in", "rows_out")
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.self_seconds = 0.0
+        self.calls = 0
+        self.rows_in = 0
+        self.rows_out = 0
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Profiler:
+    """
+    A class used to record the wall time, calls and rows of each stage of a
+    query. Stages nest: the time of a stage run inside another one, such as a
+    lazy tokenizer consumed by the serializer, is not counted twice in the
+    self time.
+
+    Details describe choices made by the query, such as the order its filters
+    are evaluated in, and are written after the stages.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageStats] = {}
+        self.details: Dict[str, List[Dict[str, Any]]] = {}
+        self.__nested_seconds: List[float] = [0.0]
+
+    def stage(self, name: str) -> StageStats:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = StageStats()
+        return stage
+
+    def __enter_stage(self) -> float:
+        self.__nested_seconds.append(0.0)
+        return time.perf_counter()
+
+    def __exit_stage(self, stage: StageStats, started_at: float) -> None:
+        seconds = time.perf_counter() - started_at
+        nested_seconds = self.__nested_seconds.pop()
+        self.__nested_seconds[-1] += seconds
+
+        stage.seconds += seconds
+        stage.self_seconds += seconds - nested_seconds
+        stage.calls += 1
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[StageStats]:
+        """
+        Time a block as one call of the stage, its rows are counted by the
+        caller through the yielded stats.
+        """
+        stage = self.stage(name)
+        started_at = self.__enter_stage()
+        try:
+            yield stage
+        finally:
+            self.__exit_stage(stage, started_at)
+
+    def wrap(
+        self, name: str, function: Callable[..., Result], is_filter: bool = False
+    ) -> Callable[..., Result]:
+        """
+        Time every call of a function that handles one row.
+
+        @param name The stage name.
+        @param function The function to be timed.
+        @param is_filter Only count the calls returning a truthy value as rows
+        out, for predicates.
+
+        @return The timed function.
+        """
+        stage = self.stage(name)
+        enter_stage = self.__enter_stage
+        exit_stage = self.__exit_stage
+
+        def timed(*arguments: Any) -> Result:
+            started_at = enter_stage()
+            try:
+                result = function(*arguments)
+            finally:
+                exit_stage(stage, started_at)
+
+            stage.rows_in += 1
+            if not is_filter or result:
+                stage.rows_out += 1
+            return result
+
+        return timed
+
+    def wrap_iter(self, name: str, iterable: Iterable[Item]) -> Iterator[Item]:
+        """
+        Time every item produced by a lazy iterable, each item is a row out.
+        """
+        stage = self.stage(name)
+        iterator = iter(iterable)
+
+        while True:
+            started_at = self.__enter_stage()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.__exit_stage(stage, started_at)
+
+            stage.rows_out += 1
+            yield item
+
+    def describe(self, name: str, entries: Iterable[Dict[str, Any]]) -> None:
+        """
+        Record a detail of the query as a list of entries, replacing the
+        previous one with the same name.
+
+        @return void
+        """
+        self.details[name] = list(entries)
+
+    def to_dict(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        return {name: stage.to_dict() for name, stage in self.stages.items()}
+
+    def summary(self) -> str:
+        total_seconds = sum(stage.self_seconds for stage in self.stages.values())
+        lines = [
+            f"{'stage':<18} {'calls':>10} {'rows in':>10} {'rows out':>10} "
+            f"{'seconds':>9} {'self s':>9} {'self %':>7}"
+        ]
+        for name, stage in self.stages.items():
+            share = stage.self_seconds / total_seconds * 100 if total_seconds else 0
+            lines.append(
+                f"{name:<18} {stage.calls:>10} {stage.rows_in:>10} "
+                f"{stage.rows_out:>10} {stage.seconds:>9.4f} "
+                f"{stage.self_seconds:>9.4f} {share:>6.1f}%"
+            )
+        for name, entries in self.details.items():
+            lines.append(f"{name}:")
+            for position, entry in enumerate(entries, 1):
+                fields = ", ".join(
+                    (
+                        f"{key} {value:.4g}"
+                        if isinstance(value, float)
+                        else f"{key} {value}"
+                    )
+                    for key, value in entry.items()
+                )
+                lines.append(f"  {position}. {fields}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, destination: str) -> None:
+        """
+        Write the summary to stderr, or the counters as JSON to a file.
+
+        @param destination "stderr", or the path of the JSON file.
+
+        @return void
+        """
+        if destination == STDERR_DESTINATION:
+            sys.stderr.write(self.summary())
+            return
+
+        with open(destination, "w") as file:
+            json.dump(
+                {"stages": self.to_dict(), "details": self.details}, file, indent=2
+            )
+
+
+ProfileOption = Union[Profiler, bool, str, None]
+
+
+def resolve_profile(profile: ProfileOption = None) -> Optional[str]:
+    """
+    Resolve where the profile of a query is written.
+
+    @param profile False disables profiling, True writes the summary to stderr,
+    a string is "stderr" or the path of a JSON file. When None the
+    LIBCSV_PROFILE environment variable is used, so profiling can be enabled
+    behind the C ABI.
+
+    @return The destination, None when profiling is disabled.
+    """
+    if profile is None:
+        profile = os.environ.get(PROFILE_ENVIRONMENT_VARIABLE) or False
+
+    if isinstance(profile, str):
+        profile = profile.strip()
+        if profile.lower() in ("", "0", "false"):
+            return None
+        if profile.lower() in ("1", "true", STDERR_DESTINATION):
+            return STDERR_DESTINATION
+        return profile
+
+    return STDERR_DESTINATION if profile else None
+
+
+@contextmanager
+def profile_query(profile: ProfileOption = None) -> Iterator[Optional[Profiler]]:
+    """
+    Profile a whole query under the "total" stage and write the profile once
+    the query ends, even when it fails.
+
+    @param profile A Profiler to record into, nothing is written then, or any
+    value accepted by resolve_profile.
+
+    @return The profiler, None when profiling is disabled.
+    """
+    if isinstance(profile, Profiler):
+        with profile.measure("total"):
+            yield profile
+        return
+
+    destination = resolve_profile(profile)
+    if destination is None:
+        yield None
+        return
+
+    profiler = Profiler()
+    try:
+        with profiler.measure("total"):
+            yield profiler
+    finally:
+        profiler.dump(destination)
+
+
+def measure(profiler: Optional[Profiler], name: str) -> ContextManager[Any]:
+    """
+    @return profiler.measure(name), a no-op context when profiling is disabled.
+    """
+    if profiler is None:
+        return nullcontext()
+    return profiler.measure(name)
@@ -0,0 +1,187 @@
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Sequence, Set
+from typing import Optional, Union
+from processor_py.serializer import compile_line_serializer
+from processor_py.lexer import compile_tokenizer, tokenize
+from processor_py.filter import FilterPlan, compile_filters, parse_filters, plan_match
+from processor_py.filter import order_filter_plan
+from processor_py.profiling import Profiler
+from processor_py.schema import SchemaDefinition, infer_schema
+
+try:
+    # compiled from processor_pyx/filter.pyx
+    from filter import compile_filters as compile_typed_filters
+    from filter import plan_match as typed_plan_match
+except ImportError:
+    compile_typed_filters = None
+    typed_plan_match = None
+
+
+class QueryPlan(NamedTuple):
+    headers: List[str]
+    selected_column_indexes: Set[int]
+    filter_plan: FilterPlan
+    tokenize_line: Callable[[str], List[Any]]
+    serialize_line: Callable[[Sequence[Any]], str]
+    match_plan: Callable[[Sequence[str], FilterPlan], bool] = plan_match
+
+
+def compile_query(
+    headers: List[str],
+    selected_columns: str,
+    row_filter_definitions: str,
+    sampled_rows: Sequence[Sequence[str]] = (),
+    schema: SchemaDefinition = None,
+) -> QueryPlan:
+    """
+    Parse the filters and the selected columns once per query. The filters
+    are compiled to the typed plan of processor_pyx/filter.pyx when it is
+    compiled, as in libcsv.
+
+    @param headers The headers of the CSV data.
+    @param selected_columns The columns to be selected from the CSV data.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param sampled_rows The first rows of the CSV data, used to infer the type
+    of the filtered columns and to run the cheapest and most selective filters
+    first.
+    @param schema Optional column types of the filtered columns.
+
+    @return The query plan shared by every row of the CSV data.
+    """
+    filter_comparisons = {}
+    if row_filter_definitions:
+        filter_comparisons = parse_filters(row_filter_definitions)
+
+    selected_column_indexes: Set[int] = parse_columns(selected_columns, headers).get(
+        "selected_column_indexes"
+    )  # type: ignore
+
+    column_types = infer_schema(headers, filter_comparisons, sampled_rows, schema)
+    if compile_typed_filters is not None:
+        filter_plan = compile_typed_filters(filter_comparisons, headers, column_types)
+        match_plan = typed_plan_match
+    else:
+        filter_plan = compile_filters(filter_comparisons, headers, column_types)
+        match_plan = plan_match
+    filter_plan = order_filter_plan(filter_plan, sampled_rows)
+
+    used_column_indexes = selected_column_indexes | {
+        comparison.column_index for comparison in filter_plan.comparisons
+    }
+
+    return QueryPlan(
+        headers=headers,
+        selected_column_indexes=selected_column_indexes,
+        filter_plan=filter_plan,
+        tokenize_line=compile_tokenizer(",", len(headers), used_column_indexes),
+        serialize_line=compile_line_serializer(selected_column_indexes),
+        match_plan=match_plan,
+    )
+
+
+def serialize_headers(query_plan: QueryPlan) -> str:
+    return query_plan.serialize_line(query_plan.headers)
+
+
+def iter_matching_lines(
+    lines: Iterable[str], query_plan: QueryPlan, profiler: Optional[Profiler] = None
+) -> Iterator[str]:
+    if profiler is not None:
+        yield from iter_profiled_matching_lines(lines, query_plan, profiler)
+        return
+
+    filter_plan = query_plan.filter_plan
+    match_plan = query_plan.match_plan
+    tokenize_line = query_plan.tokenize_line
+    serialize_line = query_plan.serialize_line
+
+    for line in lines:
+        tokenized_line = tokenize_line(line)
+        if match_plan(tokenized_line, filter_plan):
+            yield serialize_line(tokenized_line)
+
+
+def iter_profiled_matching_lines(
+    lines: Iterable[str], query_plan: QueryPlan, profiler: Profiler
+) -> Iterator[str]:
+    """
+    iter_matching_lines with the tokenize, line_match and stringify_line stages
+    timed row by row.
+    """
+    filter_plan = query_plan.filter_plan
+    tokenize_line = profiler.wrap("tokenize", query_plan.tokenize_line)
+    line_match = profiler.wrap("line_match", query_plan.match_plan, is_filter=True)
+    serialize_line = profiler.wrap("stringify_line", query_plan.serialize_line)
+
+    for line in lines:
+        tokenized_line = tokenize_line(line)
+        if line_match(tokenized_line, filter_plan):
+            yield serialize_line(tokenized_line)
+
+
+def is_limited(limit: Optional[int] = None, offset: int = 0) -> bool:
+    """
+    Validate the limit and the offset of a query.
+
+    @return Whether the query stops before the end of the CSV data.
+    """
+    if limit is not None and limit < 0:
+        raise ValueError(f"Invalid limit: {limit}")
+    if offset < 0:
+        raise ValueError(f"Invalid offset: {offset}")
+
+    return limit is not None or offset > 0
+
+
+def limit_lines(
+    lines: Iterable[str], limit: Optional[int] = None, offset: int = 0
+) -> Iterator[str]:
+    """
+    Skip the first offset serialized lines and stop after limit lines, the
+    lines that follow are never read.
+
+    @param lines The serialized matching lines.
+    @param limit The amount of lines kept, every line when None.
+    @param offset The amount of matching lines skipped.
+
+    @return The kept lines.
+    """
+    if not is_limited(limit, offset):
+        return iter(lines)
+
+    return islice(lines, offset, None if limit is None else offset + limit)
+
+
+def iter_block_lines(blocks: Iterable[str]) -> Iterator[str]:
+    """
+    Split blocks of serialized lines that end with a line break into lines.
+    """
+    for block in blocks:
+        yield from block.split("\n")[:-1]
+
+
+def parse_columns(
+    selected_columns: str, headers: List[str]
+) -> dict[str, Union[List[str], Set[int]]]:
+    """
+    Parse the columns from the CSV data.
+
+    @return The columns from the CSV data.
+    """
+    selected_column_tokens = []
+
+    if selected_columns:
+        selected_column_tokens = tokenize(selected_columns, ",")
+
+        selected_column_indexes: Set[int] = set()
+        for column in selected_column_tokens:
+            if column not in headers:
+                raise ValueError(f"Header '{column}' not found in CSV file/string")
+            selected_column_indexes.add(headers.index(column))
+    else:
+        selected_column_indexes = set(range(len(headers)))
+
+    return {
+        "selected_column_indexes": selected_column_indexes,
+        "selected_columns": selected_column_tokens,
+    }
@@ -0,0 +1,101 @@
+from enum import Enum
+from typing import Dict, Iterable, List, Sequence, Union
+
+from processor_py.lexer import tokenize
+
+
+class ColumnTypeEnum(Enum):
+    INT = "int"
+    FLOAT = "float"
+    STRING = "string"
+
+
+SchemaDefinition = Union[str, Dict[str, str], None]
+
+DEFAULT_SCHEMA_SAMPLE_SIZE = 100
+
+
+def parse_schema(schema: SchemaDefinition) -> Dict[str, ColumnTypeEnum]:
+    """
+    Parse an explicit schema such as "age:int,name:string".
+
+    @param schema A "header:type" list separated by commas or a dict of header to
+    type name.
+
+    @return The column type of each header in the schema.
+    """
+    if not schema:
+        return {}
+
+    if isinstance(schema, dict):
+        entries = [f"{header}:{column_type}" for header, column_type in schema.items()]
+    else:
+        entries = tokenize(schema, ",")
+
+    column_types: Dict[str, ColumnTypeEnum] = {}
+    for entry in entries:
+        header, separator, column_type = entry.rpartition(":")
+        header = header.strip()
+        column_type = column_type.strip().lower()
+
+        if not separator or not header:
+            raise ValueError(f"Invalid schema: '{entry}'")
+
+        try:
+            column_types[header] = ColumnTypeEnum(column_type)
+        except ValueError:
+            raise ValueError(f"Invalid schema: '{entry}'")
+
+    return column_types
+
+
+def infer_column_type(values: Iterable[str]) -> ColumnTypeEnum:
+    column_type = ColumnTypeEnum.INT
+
+    for value in values:
+        if not value:
+            continue
+
+        if column_type is ColumnTypeEnum.INT:
+            try:
+                int(value)
+                continue
+            except ValueError:
+                column_type = ColumnTypeEnum.FLOAT
+
+        try:
+            float(value)
+        except ValueError:
+            return ColumnTypeEnum.STRING
+
+    return column_type
+
+
+def infer_schema(
+    headers: List[str],
+    column_names: Iterable[str],
+    sampled_rows: Sequence[Sequence[str]],
+    schema: SchemaDefinition = None,
+) -> Dict[str, ColumnTypeEnum]:
+    """
+    Classify the given columns as int, float or string.
+
+    @param headers The headers of the CSV file/string.
+    @param column_names The columns to classify, usually the filtered ones.
+    @param sampled_rows The first rows of the CSV used for the inference.
+    @param schema An optional explicit schema, its entries are not inferred.
+
+    @return The column type of each column name found in the headers.
+    """
+    column_types = parse_schema(schema)
+
+    for column_name in column_names:
+        if column_name in column_types or column_name not in headers:
+            continue
+
+        column_index = headers.index(column_name)
+        column_types[column_name] = infer_column_type(
+            row[column_index] for row in sampled_rows if column_index < len(row)
+        )
+
+    return column_types
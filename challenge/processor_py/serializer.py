@@ -1,4 +1,8 @@
-from typing import Dict
+from functools import partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Sequence, Tuple, TypeVar
+
+Field = TypeVar("Field")
 
 
 def stringify_line(line_map: Dict[int, str]) -> str:
@@ -10,3 +14,55 @@ def stringify_line(line_map: Dict[int, str]) -> str:
     ]
 
     return ",".join(sorted_columns)
+
+
+def project_nothing(fields: Sequence[Field]) -> Tuple[Field, ...]:
+    return ()
+
+
+def project_column(column_index: int, fields: Sequence[Field]) -> Tuple[Field, ...]:
+    return (fields[column_index],)
+
+
+def serialize_projection(
+    project: Callable[[Sequence[Any]], Tuple[Any, ...]], fields: Sequence[Any]
+) -> str:
+    return ",".join(filter(None, project(fields)))
+
+
+def compile_projection(
+    column_indexes: Iterable[int],
+) -> Callable[[Sequence[Field]], Tuple[Field, ...]]:
+    """
+    Compile the projection of the selected columns once per query.
+
+    @param column_indexes The selected column indexes.
+
+    @return A picklable function from the fields of a row to the selected
+    fields, in column order. Its cost only depends on the amount of selected
+    columns.
+    """
+    sorted_indexes = sorted(set(column_indexes))
+
+    if not sorted_indexes:
+        return project_nothing
+
+    if len(sorted_indexes) == 1:
+        return partial(project_column, sorted_indexes[0])
+
+    return itemgetter(*sorted_indexes)
+
+
+def compile_line_serializer(
+    column_indexes: Iterable[int],
+) -> Callable[[Sequence[Any]], str]:
+    """
+    Compile stringify_line for the selected columns: the fields of a row are
+    projected without building a dict, empty values are dropped the same way.
+
+    @param column_indexes The selected column indexes.
+
+    @return A picklable function from the fields of a row to its serialized
+    line, so query plans can be sent to worker processes.
+    """
+    return partial(serialize_projection, compile_projection(column_indexes))
@@ -0,0 +1,392 @@
+"""
+Query server keeping a warm pool of worker processes behind a Unix socket, so
+each query skips the interpreter start up and the compilation of its filters.
+
+Requests are length prefixed, integers are big endian:
+    u32 length of the request body, then the body:
+    u32 length + UTF-8 csv_file_path
+    u32 length + UTF-8 selected_columns
+    u32 length + UTF-8 row_filter_definitions
+    i64 limit, negative for no limit
+    i64 offset
+
+Each request is answered by frames of a u8 kind, a u32 length and a payload:
+"D" carries serialized rows, the last frame is "K" on success or "E" with
+the error message. A connection may send several requests in a row.
+
+Usage:
+    python -m processor_py.server --socket /tmp/libcsv.sock --workers 4
+"""
+
+import argparse
+import errno
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+from collections import OrderedDict
+from itertools import chain, islice
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from processor_py.lexer import tokenize
+from processor_py.query import QueryPlan, compile_query, is_limited
+from processor_py.query import iter_matching_lines, limit_lines, serialize_headers
+from processor_py.schema import DEFAULT_SCHEMA_SAMPLE_SIZE
+from processor_py.writer import OutputSink, open_line_writer, open_sink
+
+SOCKET_ENVIRONMENT_VARIABLE = "LIBCSV_SERVER_SOCKET"
+DEFAULT_SOCKET_PATH = "/tmp/libcsv.sock"
+DEFAULT_PLAN_CACHE_SIZE = 256
+
+DATA_FRAME = b"D"
+END_FRAME = b"K"
+ERROR_FRAME = b"E"
+
+_LENGTH = struct.Struct(">I")
+_INTEGER = struct.Struct(">q")
+_FRAME_HEADER = struct.Struct(">cI")
+
+
+class QueryRequest(NamedTuple):
+    csv_file_path: str
+    selected_columns: str
+    row_filter_definitions: str
+    limit: Optional[int] = None
+    offset: int = 0
+
+
+def resolve_socket_path(socket_path: Optional[str] = None) -> str:
+    """
+    @return The socket path, from the LIBCSV_SERVER_SOCKET environment
+    variable when None, then /tmp/libcsv.sock.
+    """
+    if socket_path:
+        return socket_path
+    return os.environ.get(SOCKET_ENVIRONMENT_VARIABLE) or DEFAULT_SOCKET_PATH
+
+
+def encode_request(request: QueryRequest) -> bytes:
+    body = b"".join(
+        _LENGTH.pack(len(field)) + field
+        for field in (
+            request.csv_file_path.encode("utf-8"),
+            request.selected_columns.encode("utf-8"),
+            request.row_filter_definitions.encode("utf-8"),
+        )
+    )
+    body += _INTEGER.pack(-1 if request.limit is None else request.limit)
+    body += _INTEGER.pack(request.offset)
+    return _LENGTH.pack(len(body)) + body
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated message")
+    return data
+
+
+def read_request(stream: BinaryIO) -> Optional[QueryRequest]:
+    """
+    Read the next request of a connection.
+
+    @return The request, None once the client closed the connection.
+    """
+    prefix = stream.read(_LENGTH.size)
+    if not prefix:
+        return None
+    if len(prefix) != _LENGTH.size:
+        raise ValueError("Truncated message")
+
+    body = _read_exactly(stream, _LENGTH.unpack(prefix)[0])
+    fields: List[str] = []
+    position = 0
+    try:
+        for _ in range(3):
+            (length,) = _LENGTH.unpack_from(body, position)
+            position += _LENGTH.size
+            if position + length > len(body):
+                raise ValueError("Truncated message")
+            fields.append(body[position : position + length].decode("utf-8"))
+            position += length
+
+        limit, offset = struct.unpack_from(">qq", body, position)
+    except struct.error:
+        raise ValueError("Truncated message")
+
+    csv_file_path, selected_columns, row_filter_definitions = fields
+    return QueryRequest(
+        csv_file_path,
+        selected_columns,
+        row_filter_definitions,
+        None if limit < 0 else limit,
+        offset,
+    )
+
+
+def send_frame(connection: socket.socket, kind: bytes, payload: bytes = b"") -> None:
+    connection.sendall(_FRAME_HEADER.pack(kind, len(payload)) + payload)
+
+
+class FrameWriter:
+    """
+    A class used as the output of a query, every write is sent as a data frame.
+    """
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.connection = connection
+
+    def write(self, data: str) -> int:
+        send_frame(self.connection, DATA_FRAME, data.encode("utf-8"))
+        return len(data)
+
+
+PlanKey = Tuple[str, int, int, Tuple[str, ...], str, str]
+
+
+class QueryPlanCache:
+    """
+    A class used to keep the compiled plans of recent queries.
+
+    Plans are keyed by the file, its modification time and size, its headers
+    and the query: the rows sampled from the file choose how the cells are
+    compared and the order of the comparisons, so a plan is only reused for
+    the file it was compiled for, until it changes.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_PLAN_CACHE_SIZE) -> None:
+        self.max_entries = max_entries
+        self.__plans: "OrderedDict[PlanKey, QueryPlan]" = OrderedDict()
+
+    def get(self, key: PlanKey) -> Optional[QueryPlan]:
+        query_plan = self.__plans.get(key)
+        if query_plan is not None:
+            self.__plans.move_to_end(key)
+        return query_plan
+
+    def put(self, key: PlanKey, query_plan: QueryPlan) -> None:
+        self.__plans[key] = query_plan
+        self.__plans.move_to_end(key)
+        while len(self.__plans) > self.max_entries:
+            self.__plans.popitem(last=False)
+
+
+def run_query(
+    request: QueryRequest, output: OutputSink, plan_cache: QueryPlanCache
+) -> None:
+    """
+    Run a query with the text engine, reusing the compiled plan of a previous
+    query with the same file, columns and filters.
+
+    @return void
+    """
+    is_limited(request.limit, request.offset)
+
+    with open(request.csv_file_path, "r") as file:
+        file_stat = os.fstat(file.fileno())
+        headers = tokenize(file.readline().strip(), ",")
+        lines: Iterator[str] = map(str.strip, file)
+
+        key = (
+            os.path.abspath(request.csv_file_path),
+            file_stat.st_mtime_ns,
+            file_stat.st_size,
+            tuple(headers),
+            request.selected_columns,
+            request.row_filter_definitions,
+        )
+        query_plan = plan_cache.get(key)
+        if query_plan is None:
+            sampled_lines = list(islice(lines, DEFAULT_SCHEMA_SAMPLE_SIZE))
+            query_plan = compile_query(
+                headers,
+                request.selected_columns,
+                request.row_filter_definitions,
+                [tokenize(line, ",") for line in sampled_lines],
+            )
+            plan_cache.put(key, query_plan)
+            lines = chain(sampled_lines, lines)
+
+        matching_lines = limit_lines(
+            iter_matching_lines(lines, query_plan), request.limit, request.offset
+        )
+
+        with open_line_writer(output) as writer:
+            writer.write_line(serialize_headers(query_plan))
+            for serialized_line in matching_lines:
+                writer.write_line(serialized_line)
+
+
+def handle_connection(connection: socket.socket, plan_cache: QueryPlanCache) -> None:
+    """
+    Answer the requests of a connection until the client closes it.
+
+    @return void
+    """
+    with connection.makefile("rb") as stream:
+        while True:
+            try:
+                request = read_request(stream)
+            except ValueError as error:
+                send_frame(connection, ERROR_FRAME, str(error).encode("utf-8"))
+                return
+            if request is None:
+                return
+
+            try:
+                run_query(request, FrameWriter(connection), plan_cache)
+            except ConnectionError:
+                return
+            except Exception as error:
+                send_frame(connection, ERROR_FRAME, str(error).encode("utf-8"))
+            else:
+                send_frame(connection, END_FRAME)
+
+
+def run_worker(listener: socket.socket, plan_cache_size: int) -> None:
+    """
+    Accept and answer connections forever, run in each process of the pool.
+
+    @return void
+    """
+    plan_cache = QueryPlanCache(plan_cache_size)
+    while True:
+        connection, _ = listener.accept()
+        with connection:
+            try:
+                handle_connection(connection, plan_cache)
+            except ConnectionError:
+                pass
+
+
+def open_listener(socket_path: str) -> socket.socket:
+    """
+    Listen on the socket path, replacing the socket left by a previous server.
+    Any other file at the path is kept and FileExistsError is raised.
+
+    The socket is bound to a temporary path and moved to the socket path once
+    it listens, so clients never find a socket refusing their connection.
+    """
+    try:
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), socket_path)
+    except FileNotFoundError:
+        pass
+
+    temporary_path = f"{socket_path}.{os.getpid()}"
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        listener.bind(temporary_path)
+        listener.listen(socket.SOMAXCONN)
+        os.replace(temporary_path, socket_path)
+    except OSError:
+        listener.close()
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    return listener
+
+
+def serve(
+    socket_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    plan_cache_size: int = DEFAULT_PLAN_CACHE_SIZE,
+) -> None:
+    """
+    Serve queries until SIGINT or SIGTERM. The workers are forked once and
+    accept connections from the shared socket, a worker that dies is replaced.
+
+    @param socket_path The path of the Unix socket, see resolve_socket_path.
+    @param workers Amount of worker processes, all the CPUs when None or 0.
+    @param plan_cache_size The amount of compiled plans kept by each worker.
+
+    @return void
+    """
+    socket_path = resolve_socket_path(socket_path)
+    worker_count = workers or os.cpu_count() or 1
+    listener = open_listener(socket_path)
+    worker_pids = set()
+
+    def spawn_worker() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                run_worker(listener, plan_cache_size)
+            finally:
+                os._exit(1)
+        worker_pids.add(pid)
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for _ in range(worker_count):
+            spawn_worker()
+
+        while True:
+            pid, _ = os.wait()
+            worker_pids.discard(pid)
+            spawn_worker()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for pid in worker_pids:
+            os.kill(pid, signal.SIGTERM)
+        for pid in worker_pids:
+            os.waitpid(pid, 0)
+        listener.close()
+        os.remove(socket_path)
+
+
+def query_server(
+    csv_file_path: str,
+    selected_columns: str,
+    row_filter_definitions: str,
+    output: OutputSink = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    socket_path: Optional[str] = None,
+) -> None:
+    """
+    Run a query on the server, writing the rows as process_csv_file would.
+
+    @return void
+    """
+    request = QueryRequest(
+        csv_file_path, selected_columns, row_filter_definitions, limit, offset
+    )
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(resolve_socket_path(socket_path))
+        connection.sendall(encode_request(request))
+
+        with connection.makefile("rb") as stream, open_sink(output) as sink:
+            while True:
+                kind, length = _FRAME_HEADER.unpack(
+                    _read_exactly(stream, _FRAME_HEADER.size)
+                )
+                payload = _read_exactly(stream, length)
+                if kind == END_FRAME:
+                    return
+                if kind == ERROR_FRAME:
+                    raise ValueError(payload.decode("utf-8"))
+                sink.write(payload.decode("utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--socket", help="Defaults to LIBCSV_SERVER_SOCKET.")
+    parser.add_argument("--workers", type=int, default=0)
+    parser.add_argument("--plan-cache-size", type=int, default=DEFAULT_PLAN_CACHE_SIZE)
+    arguments = parser.parse_args()
+
+    serve(arguments.socket, arguments.workers, arguments.plan_cache_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import sys
+from contextlib import contextmanager
+from typing import Iterator, List, Protocol, Union
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class Writer(Protocol):
+    def write(self, data: str) -> int:
+        raise NotImplementedError("This method should be overridden.")
+
+
+OutputSink = Union[Writer, int, None]
+
+
+class BufferedLineWriter:
+    """
+    A class used to stream serialized lines to a sink in bounded chunks.
+    """
+
+    def __init__(self, sink: Writer, buffer_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.__pending: List[str] = []
+        self.__pending_size = 0
+
+    def write_line(self, line: str) -> None:
+        self.__pending.append(line)
+        self.__pending_size += len(line) + 1
+
+        if self.__pending_size >= self.buffer_size:
+            self.__write_pending()
+
+    def write_text(self, text: str) -> None:
+        """
+        Write a block of serialized lines that already ends with a line break.
+        """
+        if text:
+            self.__write_pending()
+            self.sink.write(text)
+
+    def flush(self) -> None:
+        self.__write_pending()
+
+        flush_sink = getattr(self.sink, "flush", None)
+        if flush_sink is not None:
+            flush_sink()
+
+    def __write_pending(self) -> None:
+        if self.__pending:
+            self.__pending.append("")
+            self.sink.write("\n".join(self.__pending))
+            self.__pending = []
+            self.__pending_size = 0
+
+
+def echo_filters(row_filter_definitions: str, output: OutputSink = None) -> None:
+    """
+    Print the filters of a query ahead of its rows when they are written to
+    stdout, as processCsv and processCsvFile always did. Rows written to a
+    file descriptor, a writer or a callback are not preceded by anything.
+
+    @return void
+    """
+    if output is None and row_filter_definitions:
+        print(row_filter_definitions)
+
+
+@contextmanager
+def open_sink(output: OutputSink = None) -> Iterator[Writer]:
+    """
+    Resolve an output to a writer.
+
+    @param output None for stdout, an open file descriptor or any object with a
+    write(str) method.
+
+    @return The writer, file descriptors are wrapped and left open on exit.
+    """
+    if isinstance(output, int):
+        with open(output, "w", closefd=False) as stream:
+            yield stream
+        return
+
+    yield sys.stdout if output is None else output
+
+
+@contextmanager
+def open_line_writer(
+    output: OutputSink = None, buffer_size: int = DEFAULT_BUFFER_SIZE
+) -> Iterator[BufferedLineWriter]:
+    """
+    Open a buffered line writer over stdout, a file descriptor or a writer.
+
+    @param output None for stdout, an open file descriptor or any object with a
+    write(str) method.
+    @param buffer_size Amount of characters held before writing to the sink.
+
+    @return The buffered line writer, flushed when the context exits.
+    """
+    with open_sink(output) as sink:
+        writer = BufferedLineWriter(sink, buffer_size)
+        try:
+            yield writer
+        finally:
+            writer.flush()
@@ -0,0 +1,547 @@
+import json
+import locale
+import os
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+from typing import Tuple
+
+from processor_py.filter import ComparisonTypeEnum, CompiledComparison, compare
+from processor_py.index import compile_index_comparisons, file_signature, parse_int
+from processor_py.index import write_sidecar
+from processor_py.lexer import tokenize
+from processor_py.mmap_reader import Buffer, has_lone_carriage_return, open_buffer
+from processor_py.mmap_reader import strip_line
+
+ZONE_MAPS_ENVIRONMENT_VARIABLE = "LIBCSV_ZONE_MAPS"
+ZONE_MAP_EXTENSION = ".zones"
+ZONE_MAP_VERSION = 1
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+# Columns with at most this amount of distinct values in a block keep them,
+# so equality filters skip the blocks without the value.
+DEFAULT_DISTINCT_LIMIT = 16
+
+BlockRange = Tuple[int, int]
+
+
+class BlockStats(NamedTuple):
+    """
+    The statistics of a column over a block of rows.
+
+    numbers holds the (min, max) of the cells int() parses and texts the
+    (min, max) of the other ones, as the filters compare them, values the
+    (min, max) of every cell as text. distinct holds the sorted values of the
+    block when there are few of them. Blocks with rows too short to have the
+    column are never skipped.
+    """
+
+    numbers: Optional[Tuple[int, int]]
+    texts: Optional[Tuple[str, str]]
+    values: Optional[Tuple[str, str]]
+    distinct: Optional[List[str]]
+    missing: bool
+
+
+class ZoneMap(NamedTuple):
+    headers: List[str]
+    blocks: List[BlockRange]
+    columns: Dict[str, List[BlockStats]]
+
+
+class ZonedRead(NamedTuple):
+    """
+    The blocks of a CSV file to be read. When unmapped_columns is not empty
+    they are the whole data, iter_zoned_read maps those columns while the
+    query reads it.
+    """
+
+    headers: List[str]
+    block_ranges: List[BlockRange]
+    unmapped_columns: Tuple[str, ...] = ()
+
+
+def resolve_zone_maps(zone_maps: Optional[bool] = None) -> bool:
+    """
+    Resolve whether the zone maps of CSV files are built and used.
+
+    @param zone_maps When None the LIBCSV_ZONE_MAPS environment variable is
+    used, so zone maps can be enabled behind the C ABI.
+
+    @return Whether zone maps are enabled, disabled by default.
+    """
+    if zone_maps is not None:
+        return zone_maps
+
+    environment = os.environ.get(ZONE_MAPS_ENVIRONMENT_VARIABLE, "")
+    return environment.strip().lower() not in ("", "0", "false")
+
+
+def zone_map_path(csv_file_path: str) -> str:
+    return csv_file_path + ZONE_MAP_EXTENSION
+
+
+def _range(values: Iterable[Any]) -> Optional[Tuple[Any, Any]]:
+    values = list(values)
+    if not values:
+        return None
+    return min(values), max(values)
+
+
+def _block_stats(cells: Set[str], missing: bool, distinct_limit: int) -> BlockStats:
+    numbers: List[int] = []
+    texts: List[str] = []
+    for cell in cells:
+        number = parse_int(cell)
+        if number is None:
+            texts.append(cell)
+        else:
+            numbers.append(number)
+
+    return BlockStats(
+        numbers=_range(numbers),
+        texts=_range(texts),
+        values=_range(cells),
+        distinct=sorted(cells) if len(cells) <= distinct_limit else None,
+        missing=missing,
+    )
+
+
+def _map_lines(
+    buffer: Buffer,
+    encoding: str,
+    headers: List[str],
+    column_names: List[str],
+    block_size: int,
+    distinct_limit: int,
+    blocks: List[BlockRange],
+    columns: Dict[str, List[BlockStats]],
+) -> Iterator[str]:
+    """
+    Read the stripped lines following the headers, gathering the statistics of
+    the columns over blocks of about block_size bytes into blocks and columns.
+    The last block is added once every line is read.
+    """
+    column_indexes = [headers.index(name) for name in column_names]
+    max_split = max(column_indexes) + 1
+
+    block_cells: List[Set[str]] = [set() for _ in column_names]
+    block_missing = [False] * len(column_names)
+    block_start = row_end = buffer.tell()
+
+    for raw_line in iter(buffer.readline, b""):
+        line = strip_line(raw_line, encoding).decode(encoding)
+        yield line
+
+        row = line.split(",", max_split)
+        for position, column_index in enumerate(column_indexes):
+            if column_index < len(row):
+                block_cells[position].add(row[column_index])
+            else:
+                block_missing[position] = True
+
+        row_end += len(raw_line)
+        if row_end - block_start < block_size:
+            continue
+
+        blocks.append((block_start, row_end))
+        for position, column_name in enumerate(column_names):
+            columns[column_name].append(
+                _block_stats(
+                    block_cells[position], block_missing[position], distinct_limit
+                )
+            )
+        block_cells = [set() for _ in column_names]
+        block_missing = [False] * len(column_names)
+        block_start = row_end
+
+    if row_end > block_start:
+        blocks.append((block_start, row_end))
+        for position, column_name in enumerate(column_names):
+            columns[column_name].append(
+                _block_stats(
+                    block_cells[position], block_missing[position], distinct_limit
+                )
+            )
+
+
+def build_zone_map(
+    csv_file_path: str,
+    column_names: List[str],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    distinct_limit: int = DEFAULT_DISTINCT_LIMIT,
+) -> Optional[ZoneMap]:
+    """
+    Split the rows of the CSV file in blocks of about block_size bytes and
+    gather the statistics of the columns over each block.
+
+    Only the distinct cells of a block are compared, so clustered columns are
+    cheap to map.
+
+    @param csv_file_path The path to the CSV file to be mapped.
+    @param column_names The columns to be mapped, they must exist.
+    @param block_size The amount of bytes after which a block ends, at the
+    next line break.
+    @param distinct_limit The most distinct values kept per block and column.
+
+    @return The zone map, None when the file has carriage returns inside lines,
+    which the text reader would split in more rows than the map.
+    """
+    encoding = locale.getpreferredencoding(False)
+
+    with open_buffer(csv_file_path) as buffer:
+        headers = tokenize(
+            strip_line(buffer.readline(), encoding).decode(encoding), ","
+        )
+        blocks: List[BlockRange] = []
+        columns: Dict[str, List[BlockStats]] = {name: [] for name in column_names}
+
+        for line in _map_lines(
+            buffer,
+            encoding,
+            headers,
+            column_names,
+            block_size,
+            distinct_limit,
+            blocks,
+            columns,
+        ):
+            if "\r" in line:
+                return None
+
+    return ZoneMap(headers=headers, blocks=blocks, columns=columns)
+
+
+def _stats_from_json(entry: List[Any]) -> BlockStats:
+    numbers, texts, values, distinct, missing = entry
+    return BlockStats(
+        numbers=None if numbers is None else tuple(numbers),
+        texts=None if texts is None else tuple(texts),
+        values=None if values is None else tuple(values),
+        distinct=distinct,
+        missing=missing,
+    )
+
+
+_loaded_zone_maps: Dict[str, Tuple[Tuple[int, int, int], ZoneMap]] = {}
+
+
+def load_zone_map(
+    csv_file_path: str, block_size: int = DEFAULT_BLOCK_SIZE
+) -> Optional[ZoneMap]:
+    """
+    Load the zone map sidecar of a CSV file, loaded maps are kept in memory.
+
+    @return The zone map, None when there is none, the CSV file changed since
+    it was built or its blocks have another size.
+    """
+    sidecar_path = zone_map_path(csv_file_path)
+    signature = file_signature(csv_file_path)
+    loaded = _loaded_zone_maps.get(sidecar_path)
+    if loaded is not None and loaded[0] == (*signature, block_size):
+        return loaded[1]
+
+    try:
+        with open(sidecar_path, "r", encoding="utf-8") as file:
+            document = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    expected = (
+        ZONE_MAP_VERSION,
+        *signature,
+        locale.getpreferredencoding(False),
+        block_size,
+    )
+    built_for = tuple(
+        document.get(name)
+        for name in ("version", "mtime_ns", "size", "encoding", "block_size")
+    )
+    if built_for != expected:
+        return None
+
+    zone_map = ZoneMap(
+        headers=document["headers"],
+        blocks=[(start, end) for start, end in document["blocks"]],
+        columns={
+            name: list(map(_stats_from_json, column))
+            for name, column in document["columns"].items()
+        },
+    )
+    _loaded_zone_maps[sidecar_path] = ((*signature, block_size), zone_map)
+    return zone_map
+
+
+def store_zone_map(
+    csv_file_path: str,
+    signature: Tuple[int, int],
+    built_zone_map: ZoneMap,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> ZoneMap:
+    """
+    Add the columns of the loaded zone map to a built one when they share
+    their blocks, and save the result in the sidecar for the next queries. The
+    map is still used when the sidecar cannot be written.
+
+    @param signature The file_signature of the CSV file the map was built from.
+
+    @return The stored zone map.
+    """
+    zone_map = load_zone_map(csv_file_path, block_size)
+    if zone_map is not None and zone_map.blocks == built_zone_map.blocks:
+        built_zone_map.columns.update(
+            {
+                name: column
+                for name, column in zone_map.columns.items()
+                if name not in built_zone_map.columns
+            }
+        )
+
+    _loaded_zone_maps[zone_map_path(csv_file_path)] = (
+        (*signature, block_size),
+        built_zone_map,
+    )
+    document = {
+        "version": ZONE_MAP_VERSION,
+        "mtime_ns": signature[0],
+        "size": signature[1],
+        "encoding": locale.getpreferredencoding(False),
+        "block_size": block_size,
+        "headers": built_zone_map.headers,
+        "blocks": built_zone_map.blocks,
+        "columns": built_zone_map.columns,
+    }
+    try:
+        write_sidecar(zone_map_path(csv_file_path), document)
+    except OSError:
+        pass
+
+    return built_zone_map
+
+
+def unmapped_columns(
+    csv_file_path: str,
+    column_names: List[str],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> List[str]:
+    """
+    @return The columns of column_names the zone map of the file lacks.
+    """
+    zone_map = load_zone_map(csv_file_path, block_size)
+    return [
+        name
+        for name in column_names
+        if zone_map is None or name not in zone_map.columns
+    ]
+
+
+def ensure_zone_map(
+    csv_file_path: str,
+    column_names: List[str],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Optional[ZoneMap]:
+    """
+    Load the zone map of a CSV file, the columns it does not map yet are
+    mapped with one pass over the file and saved in the sidecar for the next
+    queries, see store_zone_map.
+
+    @return The zone map with every column of column_names, None when the file
+    cannot be mapped.
+    """
+    columns_to_map = unmapped_columns(csv_file_path, column_names, block_size)
+    if not columns_to_map:
+        return load_zone_map(csv_file_path, block_size)
+
+    signature = file_signature(csv_file_path)
+    built_zone_map = build_zone_map(csv_file_path, columns_to_map, block_size)
+    if built_zone_map is None:
+        return None
+
+    return store_zone_map(csv_file_path, signature, built_zone_map, block_size)
+
+
+def _bounds_may_match(
+    bounds: Optional[Tuple[Any, Any]],
+    comparison_type: ComparisonTypeEnum,
+    reference_value: Any,
+) -> bool:
+    if bounds is None:
+        return False
+
+    low, high = bounds
+    if comparison_type is ComparisonTypeEnum.EQUAL:
+        return bool(low <= reference_value <= high)
+    if comparison_type is ComparisonTypeEnum.NOT_EQUAL:
+        return not low == high == reference_value
+    if comparison_type in (
+        ComparisonTypeEnum.GREATER_THAN,
+        ComparisonTypeEnum.GREATER_OR_EQUAL,
+    ):
+        return compare[comparison_type](high, reference_value)
+    return compare[comparison_type](low, reference_value)
+
+
+def block_may_match(stats: BlockStats, comparison: CompiledComparison) -> bool:
+    """
+    @return Whether a row of the block may satisfy the comparison.
+    """
+    if stats.missing:
+        return True
+
+    if stats.distinct is not None:
+        return any(
+            comparison.predicate({comparison.column_index: value})
+            for value in stats.distinct
+        )
+
+    comparison_type = comparison.comparison_type
+    if isinstance(comparison.reference_value, int):
+        return _bounds_may_match(
+            stats.numbers, comparison_type, comparison.reference_value
+        ) or _bounds_may_match(
+            stats.texts, comparison_type, comparison.raw_reference_value
+        )
+
+    return _bounds_may_match(stats.values, comparison_type, comparison.reference_value)
+
+
+def plan_zoned_read(
+    csv_file_path: str,
+    row_filter_definitions: str,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    map_on_read: bool = False,
+) -> Optional[ZonedRead]:
+    """
+    Choose the blocks of the CSV file where the filters may match, mapping the
+    filtered columns on the first query that filters them.
+
+    @param csv_file_path The path to the CSV file to be processed.
+    @param row_filter_definitions The filters to be applied to the CSV data.
+    @param block_size The size of the blocks of the zone map.
+    @param map_on_read Whether the columns not mapped yet are mapped while the
+    query reads the whole file, see iter_zoned_read, instead of by a pass of
+    their own before the read.
+
+    @return The headers and the byte ranges of the blocks to be read, None when
+    no block can be skipped and the whole file is read instead.
+    """
+    if not row_filter_definitions.strip():
+        return None
+
+    encoding = locale.getpreferredencoding(False)
+    with open(csv_file_path, "rb") as file:
+        headers = tokenize(strip_line(file.readline(), encoding).decode(encoding), ",")
+        data_start = file.tell()
+
+    comparisons = compile_index_comparisons(headers, row_filter_definitions)
+    if not comparisons:
+        return None
+
+    column_names = sorted({comparison.header for comparison in comparisons})
+    if map_on_read:
+        columns_to_map = unmapped_columns(csv_file_path, column_names, block_size)
+        if columns_to_map:
+            if has_lone_carriage_return(csv_file_path):
+                return None
+            return ZonedRead(
+                headers=headers,
+                block_ranges=[(data_start, os.path.getsize(csv_file_path))],
+                unmapped_columns=tuple(columns_to_map),
+            )
+
+    zone_map = ensure_zone_map(csv_file_path, column_names, block_size)
+    if zone_map is None or zone_map.headers != headers:
+        return None
+
+    block_ranges = []
+    for block_position, block_range in enumerate(zone_map.blocks):
+        block_stats = [
+            zone_map.columns[comparison.header][block_position]
+            for comparison in comparisons
+        ]
+        # Short rows fail the scan, blocks holding them are always read so
+        # they still do.
+        if any(stats.missing for stats in block_stats) or all(
+            map(block_may_match, block_stats, comparisons)
+        ):
+            block_ranges.append(block_range)
+    if len(block_ranges) == len(zone_map.blocks):
+        return None
+
+    return ZonedRead(headers=headers, block_ranges=block_ranges)
+
+
+def iter_mapping_lines(
+    csv_file_path: str,
+    column_names: List[str],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    distinct_limit: int = DEFAULT_DISTINCT_LIMIT,
+) -> Iterator[str]:
+    """
+    Read the stripped lines of the CSV file, as the text reader does, while
+    mapping the columns as build_zone_map does. The zone map is stored once
+    every line is read, a query stopped early by its limit maps nothing.
+
+    @param column_names The columns to be mapped, they must exist. The file
+    must not have a lone carriage return, see has_lone_carriage_return.
+    """
+    encoding = locale.getpreferredencoding(False)
+    signature = file_signature(csv_file_path)
+    blocks: List[BlockRange] = []
+    columns: Dict[str, List[BlockStats]] = {name: [] for name in column_names}
+
+    with open_buffer(csv_file_path) as buffer:
+        headers = tokenize(
+            strip_line(buffer.readline(), encoding).decode(encoding), ","
+        )
+        yield from _map_lines(
+            buffer,
+            encoding,
+            headers,
+            column_names,
+            block_size,
+            distinct_limit,
+            blocks,
+            columns,
+        )
+
+    store_zone_map(
+        csv_file_path,
+        signature,
+        ZoneMap(headers=headers, blocks=blocks, columns=columns),
+        block_size,
+    )
+
+
+def iter_zoned_read(
+    csv_file_path: str,
+    zoned_read: ZonedRead,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Iterator[str]:
+    """
+    Read the stripped lines of the blocks chosen by plan_zoned_read, mapping
+    its unmapped columns along the way.
+    """
+    if zoned_read.unmapped_columns:
+        return iter_mapping_lines(
+            csv_file_path, list(zoned_read.unmapped_columns), block_size
+        )
+
+    return iter_zoned_lines(csv_file_path, zoned_read.block_ranges)
+
+
+def iter_zoned_lines(
+    csv_file_path: str, block_ranges: Iterable[BlockRange]
+) -> Iterator[str]:
+    """
+    Read the stripped lines of the given blocks of the CSV file, as the text
+    reader does.
+    """
+    encoding = locale.getpreferredencoding(False)
+
+    with open(csv_file_path, "rb") as file:
+        for start, end in block_ranges:
+            file.seek(start)
+            block = file.read(end - start).decode(encoding)
+
+            lines = block.split("\n")
+            if block.endswith("\n"):
+                lines.pop()
+            yield from map(str.strip, lines)
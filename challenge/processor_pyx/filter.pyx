@@ -1,5 +1,10 @@
-from typing import Callable, List, Dict, Union
+from typing import List, Dict, Union
 from enum import Enum
+from libc.limits cimport LLONG_MIN, LLONG_MAX
+from cpython.object cimport Py_EQ, Py_GT, Py_LT, Py_NE, Py_GE, Py_LE, PyObject_RichCompareBool
+from cpython.unicode cimport PyUnicode_KIND, PyUnicode_DATA, PyUnicode_GET_LENGTH, PyUnicode_1BYTE_KIND
+from int64 cimport Operation, compare_numbers, parse_number
+from int64 cimport EQUAL, GREATER_THAN, LESS_THAN, NOT_EQUAL, GREATER_OR_EQUAL, LESS_OR_EQUAL
 import re
 import cython
 
@@ -37,7 +42,6 @@ def parse_filters(
 ) -> Dict[str, List[Dict[str, Union[ComparisonTypeEnum, str]]]]:
     filters: Dict[str, List[Dict[str, Union[ComparisonTypeEnum, str]]]] = {}
     filter_list = row_filter_definitions.split("\n")
-    print(row_filter_definitions)
     for filter in filter_list:
         if not filter.strip():
             continue
@@ -62,83 +66,180 @@ def parse_filters(
     return filters
 
 
-compare: Dict[
-    ComparisonTypeEnum, Callable[[Union[int, str], Union[int, str]], bool]
-] = {
-    ComparisonTypeEnum.EQUAL: lambda comparison_value, reference_value: (
-        comparison_value == reference_value
-    ),
-    ComparisonTypeEnum.GREATER_THAN: lambda comparison_value, reference_value: (
-        comparison_value > reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.LESS_THAN: lambda comparison_value, reference_value: (
-        comparison_value < reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.NOT_EQUAL: lambda comparison_value, reference_value: (
-        comparison_value != reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.GREATER_OR_EQUAL: lambda comparison_value, reference_value: (
-        comparison_value >= reference_value
-    ),  # type: ignore
-    ComparisonTypeEnum.LESS_OR_EQUAL: lambda comparison_value, reference_value: (
-        comparison_value <= reference_value
-    ),  # type: ignore
+
+operations = {
+    "=": EQUAL,
+    ">": GREATER_THAN,
+    "<": LESS_THAN,
+    "!=": NOT_EQUAL,
+    ">=": GREATER_OR_EQUAL,
+    "<=": LESS_OR_EQUAL,
 }
 
-@cython.cfunc
-def is_satisfied_by(
-    reference_value: Union[str, int],
-    comparison_value: Union[str, int],
-    comparison_type: ComparisonTypeEnum,
-):
-    try:
-        ref_value = int(reference_value)
-        comp_value = int(comparison_value)
-    except ValueError:
-        if isinstance(reference_value, str) and isinstance(comparison_value, str):
-            ref_value = reference_value
-            comp_value = comparison_value
-        else:
-            raise ValueError(
-                "Both reference_value and comparison_value must be either int or str"
-            )
+rich_operations = {
+    "=": Py_EQ,
+    ">": Py_GT,
+    "<": Py_LT,
+    "!=": Py_NE,
+    ">=": Py_GE,
+    "<=": Py_LE,
+}
 
-    if comparison_type not in compare:
-        raise ValueError(f"Invalid comparison type: '{comparison_type}'")
 
-    return compare[comparison_type](comp_value, ref_value)
+cdef inline bint parse_cell_number(str cell, long long *value) noexcept:
+    # Digits are ASCII, so a cell holding an int64 is stored one byte per character.
+    if PyUnicode_KIND(cell) != PyUnicode_1BYTE_KIND:
+        return False
+    return parse_number(
+        <const unsigned char *>PyUnicode_DATA(cell), 0, PyUnicode_GET_LENGTH(cell), value
+    )
 
-@cython.cfunc
-def line_match(
-    row: List[str],
-    headers: List[str],
+
+cdef class CompiledComparison:
+    """
+    A comparison resolved against the headers, evaluated over the cells of a
+    row the same way processor_py.filter does: as ints when both the cell and
+    the reference value are ints, as strings otherwise.
+    """
+
+    cdef readonly str header
+    cdef readonly Py_ssize_t column_index
+    cdef readonly object comparison_type
+    cdef readonly object reference_value
+    cdef readonly str raw_reference_value
+    cdef Operation operation
+    cdef int rich_operation
+    cdef bint is_number
+    cdef bint is_int64
+    cdef long long int_reference
+
+    def __init__(self, str header, Py_ssize_t column_index, comparison_type, str raw_reference_value):
+        self.header = header
+        self.column_index = column_index
+        # The enum of the caller is kept, processor_py looks comparisons up by it.
+        self.comparison_type = (
+            comparison_type if hasattr(comparison_type, "value") else ComparisonTypeEnum(comparison_type)
+        )
+        self.operation = operations[self.comparison_type.value]
+        self.rich_operation = rich_operations[self.comparison_type.value]
+        self.raw_reference_value = raw_reference_value
+
+        try:
+            self.reference_value = int(raw_reference_value)
+            self.is_number = True
+        except ValueError:
+            self.reference_value = raw_reference_value
+            self.is_number = False
+
+        self.is_int64 = self.is_number and LLONG_MIN <= self.reference_value <= LLONG_MAX
+        if self.is_int64:
+            self.int_reference = self.reference_value
+
+    cdef bint matches(self, str cell) except -1:
+        cdef long long value
+
+        if not self.is_number:
+            return PyObject_RichCompareBool(cell, self.raw_reference_value, self.rich_operation)
+
+        if self.is_int64 and parse_cell_number(cell, &value):
+            return compare_numbers(value, self.operation, self.int_reference)
+
+        try:
+            number = int(cell)
+        except ValueError:
+            return PyObject_RichCompareBool(cell, self.raw_reference_value, self.rich_operation)
+
+        return PyObject_RichCompareBool(number, self.reference_value, self.rich_operation)
+
+    def __call__(self, row):
+        return self.matches(row[self.column_index])
+
+    @property
+    def predicate(self):
+        return self
+
+
+cdef class FilterPlan:
+    """
+    The compiled comparisons of a query, in evaluation order, with the fields
+    of processor_py.filter.FilterPlan. The comparisons are their own
+    predicates, so predicates is only accepted for compatibility.
+    """
+
+    cdef readonly tuple comparisons
+    cdef readonly tuple statistics
+    cdef readonly tuple short_row_comparisons
+    cdef readonly Py_ssize_t row_length
+
+    def __init__(self, comparisons, predicates=None, statistics=(), short_row_predicates=(), row_length=0):
+        self.comparisons = tuple(comparisons)
+        self.statistics = tuple(statistics)
+        self.short_row_comparisons = tuple(short_row_predicates)
+        self.row_length = row_length
+
+    @property
+    def predicates(self):
+        return self.comparisons
+
+    @property
+    def short_row_predicates(self):
+        return self.short_row_comparisons
+
+
+def compile_filters(
     comparison_map: Dict[str, List[Dict[str, Union[ComparisonTypeEnum, str]]]],
+    headers: List[str],
+    column_types=None,
 ):
-    for comparison_header in comparison_map:
+    """
+    Resolve the parsed filters against the headers once per query.
+
+    @param comparison_map The filters returned by parse_filters.
+    @param headers The headers of the CSV file/string.
+    @param column_types Accepted for compatibility with processor_py, cells are
+    parsed without int() so no comparator has to be picked per column type.
+
+    @return A filter plan with the column indexes and the typed reference values.
+    """
+    cdef list comparisons = []
+
+    for comparison_header, header_comparisons in comparison_map.items():
         if comparison_header not in headers:
             raise ValueError(
                 f"Header '{comparison_header}' not found in CSV file/string"
             )
 
-        header_comparisons = comparison_map[comparison_header]
-        comparison_value = row[headers.index(comparison_header)]
-        try:
-            comparison_header_matches = [
-                is_satisfied_by(
-                    reference_value=header_comparison.get("reference_value"),
-                    comparison_value=comparison_value,
-                    comparison_type=header_comparison.get("comparison_type"),
+        column_index = headers.index(comparison_header)
+        for header_comparison in header_comparisons:
+            comparisons.append(
+                CompiledComparison(
+                    comparison_header,
+                    column_index,
+                    header_comparison.get("comparison_type"),
+                    str(header_comparison.get("reference_value")),
                 )
-                for header_comparison in header_comparisons
-            ]
-
-            is_match = all(comparison_header_matches)
-        except Exception:
-            raise ValueError(
-                f"Invalid reference value for header '{comparison_header}'"
             )
 
-        if not is_match:
+    return FilterPlan(comparisons)
+
+
+cpdef bint plan_match(row, FilterPlan filter_plan) except -1:
+    cdef CompiledComparison comparison
+    cdef tuple comparisons = filter_plan.comparisons
+
+    if len(row) < filter_plan.row_length:
+        comparisons = filter_plan.short_row_comparisons
+
+    for comparison in comparisons:
+        if not comparison.matches(row[comparison.column_index]):
             return False
 
     return True
+
+@cython.cfunc
+def line_match(
+    row: List[str],
+    headers: List[str],
+    comparison_map: Dict[str, List[Dict[str, Union[ComparisonTypeEnum, str]]]],
+):
+    return plan_match(row, compile_filters(comparison_map, headers))
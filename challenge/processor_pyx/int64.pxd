@@ -0,0 +1,50 @@
+# Comparisons of int64 cells shared by filter.pyx and scanner.pyx.
+
+cdef enum:
+    MAX_INT64_DIGITS = 18
+
+cdef enum Operation:
+    EQUAL
+    GREATER_THAN
+    LESS_THAN
+    NOT_EQUAL
+    GREATER_OR_EQUAL
+    LESS_OR_EQUAL
+
+
+cdef inline bint compare_numbers(long long value, Operation operation, long long reference) noexcept nogil:
+    if operation == EQUAL:
+        return value == reference
+    if operation == GREATER_THAN:
+        return value > reference
+    if operation == LESS_THAN:
+        return value < reference
+    if operation == NOT_EQUAL:
+        return value != reference
+    if operation == GREATER_OR_EQUAL:
+        return value >= reference
+    return value <= reference
+
+
+cdef inline bint parse_number(const unsigned char *data, Py_ssize_t start, Py_ssize_t end, long long *value) noexcept nogil:
+    cdef:
+        bint is_negative = False
+        long long number = 0
+        unsigned char digit
+
+    if start < end and (data[start] == c'-' or data[start] == c'+'):
+        is_negative = data[start] == c'-'
+        start += 1
+
+    if end - start < 1 or end - start > MAX_INT64_DIGITS:
+        return False
+
+    while start < end:
+        digit = data[start] - c'0'
+        if digit > 9:
+            return False
+        number = number * 10 + digit
+        start += 1
+
+    value[0] = -number if is_negative else number
+    return True
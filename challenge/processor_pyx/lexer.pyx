@@ -7,25 +7,20 @@ def tokenize(data: str, delimiter: str):
         raise ValueError("Delimiter cannot be an empty string")
     return data.split(delimiter)
 
-@cython.locals(line_delimiter=str, full_string=str, line_position=int, sliced_string=str, has_other_lines=cython.bint)
+@cython.locals(line_delimiter=str, full_string=str, delimiter_length=cython.Py_ssize_t, line_start=cython.Py_ssize_t, line_position=cython.Py_ssize_t)
 def lines_split_lazy(full_string: str, line_delimiter: str = "\n"):
-    has_other_lines = line_delimiter in full_string
-
-    if not has_other_lines:
+    if line_delimiter not in full_string:
         yield full_string
         return
 
-    sliced_string = full_string
-
-    while has_other_lines:
-        line_position = sliced_string.find(line_delimiter)
-        yield sliced_string[:line_position]
+    delimiter_length = len(line_delimiter)
+    line_start = 0
+    line_position = full_string.find(line_delimiter)
 
-        sliced_string = sliced_string[line_position + len(line_delimiter) :]
-        has_other_lines = line_delimiter in sliced_string
+    while line_position != -1:
+        yield full_string[line_start:line_position]
 
-    if sliced_string:
-        yield sliced_string
+        line_start = line_position + delimiter_length
+        line_position = full_string.find(line_delimiter, line_start)
 
-    elif full_string.endswith(line_delimiter):
-        yield ""
\ No newline at end of file
+    yield full_string[line_start:]
\ No newline at end of file
@@ -0,0 +1,192 @@
+from libc.stdlib cimport malloc, realloc, free
+from libc.string cimport memchr
+from cpython.exc cimport PyErr_NoMemory
+from int64 cimport Operation, compare_numbers, parse_number
+from int64 cimport EQUAL, GREATER_THAN, LESS_THAN, NOT_EQUAL, GREATER_OR_EQUAL, LESS_OR_EQUAL
+
+cdef enum LineStatus:
+    REJECTED
+    MATCHED
+    UNDECIDED
+
+cdef struct ScanComparison:
+    Py_ssize_t column_index
+    Operation operation
+    long long reference
+
+cdef struct ScanResult:
+    Py_ssize_t *lines
+    Py_ssize_t count
+    Py_ssize_t capacity
+    Py_ssize_t end
+
+operations = {
+    "=": EQUAL,
+    ">": GREATER_THAN,
+    "<": LESS_THAN,
+    "!=": NOT_EQUAL,
+    ">=": GREATER_OR_EQUAL,
+    "<=": LESS_OR_EQUAL,
+}
+
+
+cdef inline bint is_stripped_byte(unsigned char byte) noexcept nogil:
+    # ASCII whitespace, control bytes and the lead bytes of unicode whitespace.
+    return byte <= 0x20 or byte >= 0x80
+
+
+cdef LineStatus scan_line(
+    const unsigned char *data,
+    Py_ssize_t line_start,
+    Py_ssize_t content_end,
+    Py_ssize_t column_count,
+    const ScanComparison *comparisons,
+    Py_ssize_t comparison_count,
+    Py_ssize_t *field_starts,
+) noexcept nogil:
+    cdef:
+        Py_ssize_t field_count = 1
+        Py_ssize_t position = line_start
+        Py_ssize_t index, column_index, cell_end
+        const unsigned char *delimiter
+        long long value
+
+    if content_end == line_start:
+        return UNDECIDED
+    if is_stripped_byte(data[line_start]) or is_stripped_byte(data[content_end - 1]):
+        return UNDECIDED
+
+    field_starts[0] = line_start
+    while True:
+        delimiter = <const unsigned char *>memchr(data + position, c',', content_end - position)
+        if delimiter == NULL:
+            break
+        if field_count == column_count:
+            return UNDECIDED
+        position = delimiter - data + 1
+        field_starts[field_count] = position
+        field_count += 1
+
+    if field_count != column_count:
+        return UNDECIDED
+    field_starts[column_count] = content_end + 1
+
+    for index in range(comparison_count):
+        column_index = comparisons[index].column_index
+        cell_end = field_starts[column_index + 1] - 1
+        if not parse_number(data, field_starts[column_index], cell_end, &value):
+            return UNDECIDED
+        if not compare_numbers(value, comparisons[index].operation, comparisons[index].reference):
+            return REJECTED
+
+    return MATCHED
+
+
+cdef int scan_range(
+    const unsigned char *data,
+    Py_ssize_t length,
+    Py_ssize_t start,
+    Py_ssize_t stop,
+    Py_ssize_t column_count,
+    const ScanComparison *comparisons,
+    Py_ssize_t comparison_count,
+    Py_ssize_t *field_starts,
+    ScanResult *result,
+) noexcept nogil:
+    cdef:
+        Py_ssize_t line_start = start
+        Py_ssize_t line_end, content_end, next_start
+        const unsigned char *line_break
+        LineStatus status
+        Py_ssize_t *lines
+
+    while line_start < length and line_start < stop:
+        line_break = <const unsigned char *>memchr(data + line_start, c'\n', length - line_start)
+        if line_break == NULL:
+            line_end = length
+            next_start = length
+        else:
+            line_end = line_break - data
+            next_start = line_end + 1
+
+        content_end = line_end
+        if content_end > line_start and data[content_end - 1] == c'\r':
+            content_end -= 1
+
+        status = scan_line(data, line_start, content_end, column_count, comparisons, comparison_count, field_starts)
+        if status != REJECTED:
+            if result.count + 3 > result.capacity:
+                result.capacity = result.capacity * 2 + 3 * 1024
+                lines = <Py_ssize_t *>realloc(result.lines, result.capacity * sizeof(Py_ssize_t))
+                if lines == NULL:
+                    return -1
+                result.lines = lines
+
+            result.lines[result.count] = line_start
+            result.lines[result.count + 1] = content_end if status == MATCHED else next_start
+            result.lines[result.count + 2] = status == UNDECIDED
+            result.count += 3
+
+        line_start = next_start
+
+    result.end = line_start
+    return 0
+
+
+def scan_lines(const unsigned char[::1] data, Py_ssize_t start, Py_ssize_t stop, Py_ssize_t column_count, comparisons):
+    """
+    Filter the lines starting in data[start:stop] on numeric comparisons with
+    the GIL released.
+
+    A line is only decided here when it has column_count fields, no whitespace
+    to strip and every compared cell is an int of up to 18 digits, otherwise
+    it is returned as undecided so the row engine evaluates it.
+
+    @param data The CSV data, usually a memory mapped file.
+    @param start Offset of the first line to scan.
+    @param stop Lines starting at or after this offset are left for the next call.
+    @param column_count The amount of columns of the CSV data.
+    @param comparisons (column_index, operator, reference_value) tuples.
+
+    @return The (lines, end) pair: lines holds (start, end, is_undecided) for the
+    lines that are not rejected, the end of matching lines excludes the line
+    break, and end is the offset where the next call starts.
+    """
+    cdef:
+        Py_ssize_t comparison_count = len(comparisons)
+        ScanComparison *scan_comparisons = <ScanComparison *>malloc((comparison_count + 1) * sizeof(ScanComparison))
+        Py_ssize_t *field_starts = <Py_ssize_t *>malloc((column_count + 1) * sizeof(Py_ssize_t))
+        ScanResult result = ScanResult(NULL, 0, 0, start)
+        const unsigned char *buffer = NULL
+        Py_ssize_t index
+        int status = 0
+        list lines = []
+
+    try:
+        if scan_comparisons == NULL or field_starts == NULL:
+            PyErr_NoMemory()
+
+        for index, (column_index, operator, reference_value) in enumerate(comparisons):
+            if not 0 <= column_index < column_count:
+                raise ValueError(f"Invalid column index: {column_index}")
+            scan_comparisons[index].column_index = column_index
+            scan_comparisons[index].operation = operations[operator]
+            scan_comparisons[index].reference = reference_value
+
+        if data.shape[0]:
+            buffer = &data[0]
+
+        with nogil:
+            status = scan_range(buffer, data.shape[0], start, stop, column_count, scan_comparisons, comparison_count, field_starts, &result)
+
+        if status != 0:
+            PyErr_NoMemory()
+
+        for index in range(0, result.count, 3):
+            lines.append((result.lines[index], result.lines[index + 1], result.lines[index + 2] != 0))
+
+        return lines, result.end
+    finally:
+        free(result.lines)
+        free(field_starts)
+        free(scan_comparisons)
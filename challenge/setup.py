@@ -29,6 +29,14 @@ extensions = [
         libraries=["python3.10"],
         define_macros=[("CYTHON_NO_PYINIT_EXPORT", "1")],
     ),
+    Extension(
+        name="scanner",
+        sources=["processor_pyx/scanner.pyx"],
+        include_dirs=[python_include_dir],
+        library_dirs=[python_lib_dir],
+        libraries=["python3.10"],
+        define_macros=[("CYTHON_NO_PYINIT_EXPORT", "1")],
+    ),
     Extension(
         name="serializer",
         sources=["processor_pyx/serializer.pyx"],
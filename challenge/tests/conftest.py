@@ -1,5 +1,7 @@
 import pytest
+from types import ModuleType
 from unittest.mock import MagicMock
+from _pytest.tmpdir import TempPathFactory
 from pytest_mock import MockerFixture
 from processor.processor.filter import Filter
 from processor.processor.processor import Processor
@@ -101,3 +103,29 @@ def invalid_rows() -> Dict[str, List[str]]:
         "many_item_invalid_row": ["5", "15", "25", "35"],
         "comma_item_invalid_row": ['"val,ue"', "19", "30"],
     }
+
+
+@pytest.fixture(scope="session")
+def compile_pyx(tmp_path_factory: TempPathFactory) -> Callable[[str], ModuleType]:
+    """
+    Compile a module of processor_pyx with pyximport, the tests using it are
+    skipped when Cython or a C compiler is missing.
+    """
+    pytest.importorskip("pyximport")
+    from benchmarks.pyx import PYX_DIRECTORY, load_pyx_module
+
+    build_directory = str(tmp_path_factory.mktemp("pyxbld"))
+    modules: Dict[str, ModuleType] = {}
+
+    def compile_module(name: str) -> ModuleType:
+        if name not in modules:
+            try:
+                modules[name] = load_pyx_module(
+                    name, PYX_DIRECTORY / f"{name}.pyx", build_directory
+                )
+            except ImportError as error:
+                pytest.skip(f"The {name} module could not be compiled: {error}")
+
+        return modules[name]
+
+    return compile_module
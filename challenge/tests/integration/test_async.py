@@ -0,0 +1,125 @@
+import asyncio
+import io
+import pytest
+from pathlib import Path
+from typing import List, Optional
+from _pytest.capture import CaptureFixture
+from processor_py.aio import LineChunkReader, aprocess_csv_file
+from processor_py.processor import process_csv_file
+
+mock_rows = [f"name{index},{index % 60},{index % 11}" for index in range(500)]
+mock_csv_data = "\n".join(["name,age,experience", *mock_rows])
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> str:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return str(file_path)
+
+
+def collect(
+    csv_file: str,
+    selected_columns: str,
+    filters: str,
+    chunk_size: int = 64,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[List[str]]:
+    async def run() -> List[List[str]]:
+        return [
+            batch
+            async for batch in aprocess_csv_file(
+                csv_file,
+                selected_columns,
+                filters,
+                chunk_size=chunk_size,
+                limit=limit,
+                offset=offset,
+            )
+        ]
+
+    return asyncio.run(run())
+
+
+def test_nothing_is_written_to_stdout(
+    capfd: CaptureFixture[str], csv_file: str
+) -> None:
+    batches = collect(csv_file, "name", "age=1\nexperience=1")
+
+    assert [line for batch in batches for line in batch] == ["name", "name1"]
+    assert capfd.readouterr() == ("", "")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1024 * 1024])
+@pytest.mark.parametrize("filters", ["", "age>50", "experience=3\nage<20", "age>99"])
+def test_batches_match_process_csv_file(
+    csv_file: str, chunk_size: int, filters: str
+) -> None:
+    output = io.StringIO()
+    process_csv_file(csv_file, "name,age", filters, output)
+
+    batches = collect(csv_file, "name,age", filters, chunk_size)
+
+    assert batches[0][0] == "name,age"
+    assert all(batches)
+    lines = [line for batch in batches for line in batch]
+    assert "\n".join(lines) + "\n" == output.getvalue()
+
+
+@pytest.mark.parametrize(
+    "limit, offset, expected",
+    [(2, 0, ["name50", "name51"]), (1, 3, ["name53"]), (0, 0, []), (None, 80, [])],
+)
+def test_limit_and_offset(
+    csv_file: str, limit: Optional[int], offset: int, expected: List[str]
+) -> None:
+    batches = collect(csv_file, "name", "age>=50", 32, limit, offset)
+    lines = [line for batch in batches for line in batch]
+
+    assert lines == ["name", *expected]
+
+
+def test_consumer_controls_the_reading(csv_file: str) -> None:
+    async def run() -> List[str]:
+        batches = aprocess_csv_file(csv_file, "name", "", chunk_size=64)
+        first_batch = await batches.__anext__()
+        await batches.aclose()
+        return first_batch
+
+    assert asyncio.run(run())[:2] == ["name", "name0"]
+
+
+def test_queries_run_concurrently(csv_file: str) -> None:
+    async def run() -> List[int]:
+        async def count(filters: str) -> int:
+            batches = [
+                batch
+                async for batch in aprocess_csv_file(
+                    csv_file, "name", filters, chunk_size=256
+                )
+            ]
+            return sum(map(len, batches))
+
+        return list(await asyncio.gather(*(count(f"age>{age}") for age in range(10))))
+
+    assert asyncio.run(run()) == [
+        1 + sum(1 for index in range(500) if index % 60 > age) for age in range(10)
+    ]
+
+
+def test_errors_are_raised(csv_file: str) -> None:
+    with pytest.raises(ValueError, match="Header 'unknown' not found"):
+        collect(csv_file, "unknown", "")
+
+    with pytest.raises(ValueError, match="Invalid limit: -1"):
+        collect(csv_file, "name", "", limit=-1)
+
+
+def test_line_chunk_reader_completes_lines() -> None:
+    reader = LineChunkReader(io.StringIO("a,1\nbb,2 \n\nc"), chunk_size=3)
+    lines = []
+    while (chunk := reader.read_lines()) is not None:
+        lines.extend(chunk)
+
+    assert lines == ["a,1", "bb,2", "", "c"]
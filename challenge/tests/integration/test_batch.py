@@ -0,0 +1,115 @@
+import io
+import pytest
+from pathlib import Path
+from typing import List, Tuple
+from _pytest.capture import CaptureFixture
+from processor_py.batch import BatchQuery, compile_batch
+from processor_py.processor import process_csv_file, process_csv_file_batch
+
+mock_rows = [
+    f"name{index},{index % 60},{index % 11},city{index % 4}" for index in range(500)
+]
+mock_csv_data = "\n".join(["name,age,experience,city", *mock_rows])
+
+queries: List[Tuple[str, str]] = [
+    ("name,age", "age>50"),
+    ("name", "age>50"),
+    ("city,name", "experience=3\nage<10"),
+    ("age", "age<10\nexperience=3"),
+    ("", ""),
+    ("experience", "city=city2\nage!=0\nexperience>=9"),
+    ("name", "name=name42"),
+]
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> str:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return str(file_path)
+
+
+def test_batch_matches_separate_queries(csv_file: str) -> None:
+    expected = []
+    for selected_columns, filters in queries:
+        output = io.StringIO()
+        process_csv_file(csv_file, selected_columns, filters, output)
+        expected.append(output.getvalue())
+
+    outputs = [io.StringIO() for _ in queries]
+    process_csv_file_batch(
+        csv_file,
+        [
+            BatchQuery(selected_columns, filters, output)
+            for (selected_columns, filters), output in zip(queries, outputs)
+        ],
+    )
+
+    assert [output.getvalue() for output in outputs] == expected
+
+
+def test_batch_accepts_tuples_and_stdout(
+    capfd: CaptureFixture[str], csv_file: str
+) -> None:
+    output = io.StringIO()
+    process_csv_file_batch(
+        csv_file,
+        [
+            ("age", "name=name9"),
+            ("name", "name=name7", output),
+            ("name,city", "age=7"),
+        ],
+    )
+
+    out, _ = capfd.readouterr()
+    assert output.getvalue() == "name\nname7\n"
+    assert out == (
+        "name=name9\nage=7\n"
+        "age\n9\n"
+        "name,city\nname7,city3\nname67,city3\nname127,city3\nname187,city3\n"
+        "name247,city3\nname307,city3\nname367,city3\nname427,city3\n"
+        "name487,city3\n"
+    )
+
+
+@pytest.mark.parametrize("spool_size", [16, 1024 * 1024])
+def test_batch_queries_sharing_an_output_write_in_query_order(
+    monkeypatch: pytest.MonkeyPatch, csv_file: str, spool_size: int
+) -> None:
+    monkeypatch.setattr("processor_py.batch.DEFAULT_SPOOL_SIZE", spool_size)
+    expected = ""
+    for selected_columns, filters in queries:
+        output = io.StringIO()
+        process_csv_file(csv_file, selected_columns, filters, output)
+        expected += output.getvalue()
+
+    shared_output = io.StringIO()
+    process_csv_file_batch(
+        csv_file,
+        [
+            BatchQuery(selected_columns, filters, shared_output)
+            for selected_columns, filters in queries
+        ],
+    )
+
+    assert shared_output.getvalue() == expected
+
+
+def test_compile_batch_tokenizes_the_used_columns_once() -> None:
+    headers = ["name", "age", "experience", "city"]
+    query_plans, tokenize_line = compile_batch(
+        headers, [BatchQuery("name", "age>1"), BatchQuery("name", "")]
+    )
+
+    assert len(query_plans) == 2
+    assert tokenize_line("a,2,3,c")[:2] == ["a", "2"]
+
+
+def test_batch_header_not_found(capfd: CaptureFixture[str], csv_file: str) -> None:
+    output = io.StringIO()
+    with pytest.raises(SystemExit):
+        process_csv_file_batch(csv_file, [("name", "", output), ("unknown", "")])
+
+    _, err = capfd.readouterr()
+    assert err == "Header 'unknown' not found in CSV file/string"
+    assert output.getvalue() == ""
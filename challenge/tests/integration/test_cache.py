@@ -0,0 +1,67 @@
+import io
+import pytest
+from pathlib import Path
+from _pytest.capture import CaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
+from processor_py.cache import ResultCache
+from processor_py.processor import process_csv_file
+
+mock_csv_data = "name,age,experience\nAlice,30,5\nBob,25,3\nCharlie,35,10\n"
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> Path:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return file_path
+
+
+def run(csv_file: Path, cache: ResultCache, columns: str, filters: str) -> str:
+    output = io.StringIO()
+    process_csv_file(str(csv_file), columns, filters, output, cache=cache)
+    return output.getvalue()
+
+
+def test_cached_output_matches_uncached_output(csv_file: Path) -> None:
+    cache = ResultCache()
+    uncached_output = io.StringIO()
+    process_csv_file(str(csv_file), "name", "age>26", uncached_output)
+
+    assert run(csv_file, cache, "name", "age>26") == uncached_output.getvalue()
+    assert run(csv_file, cache, "name", "age > 26") == uncached_output.getvalue()
+    assert cache.stats().hits == 1
+    assert cache.stats().misses == 1
+
+
+def test_cache_is_invalidated_when_the_file_changes(csv_file: Path) -> None:
+    cache = ResultCache()
+    run(csv_file, cache, "name", "age>26")
+    csv_file.write_text(mock_csv_data + "Dora,40,7\n", encoding="utf-8")
+
+    assert run(csv_file, cache, "name", "age>26") == "name\nAlice\nCharlie\nDora\n"
+    assert cache.stats().misses == 2
+
+
+def test_cache_from_environment(
+    csv_file: Path, capfd: CaptureFixture[str], monkeypatch: MonkeyPatch
+) -> None:
+    monkeypatch.setenv("LIBCSV_CACHE_SIZE", "1024")
+
+    process_csv_file(str(csv_file), "name", "experience>4")
+    process_csv_file(str(csv_file), "name", "experience>4")
+    out, _ = capfd.readouterr()
+
+    assert out.count("Alice\nCharlie\n") == 2
+
+
+def test_cache_errors_are_not_cached(
+    csv_file: Path, capfd: CaptureFixture[str]
+) -> None:
+    cache = ResultCache()
+    for _ in range(2):
+        with pytest.raises(SystemExit):
+            process_csv_file(str(csv_file), "height", "", cache=cache)
+
+    _, err = capfd.readouterr()
+    assert err.count("Header 'height' not found in CSV file/string") == 2
+    assert cache.stats().entries == 0
@@ -0,0 +1,184 @@
+import io
+import pytest
+from pathlib import Path
+from types import ModuleType
+from typing import Callable
+from _pytest.capture import CaptureFixture
+from _pytest.monkeypatch import MonkeyPatch
+from processor_py import mmap_reader
+from processor_py.processor import process_csv_file
+
+mock_csv_data = (
+    "name,age,experience,city\n"
+    "Alice,30,5,São Paulo\n"
+    "Bob,25,3,Recife\n"
+    "Charlie,35,10,Curitiba \n"
+    "Dora,n/a,7,Natal"
+)
+
+
+def run(csv_file: Path, engine: str, columns: str, filters: str) -> str:
+    output = io.StringIO()
+    process_csv_file(str(csv_file), columns, filters, output, engine=engine)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("line_break", ["\n", "\r\n"])
+@pytest.mark.parametrize(
+    "columns, filters",
+    [
+        ("", ""),
+        ("name", "age>29"),
+        ("city,name", "experience<=7\ncity!=Recife"),
+        ("experience", "city>Natal"),
+        ("name", "age>abc"),
+    ],
+)
+def test_mmap_engine_output_matches_text_engine(
+    tmpdir: Path, line_break: str, columns: str, filters: str
+) -> None:
+    csv_file = tmpdir / "test.csv"
+    csv_file.write_binary(mock_csv_data.replace("\n", line_break).encode())
+
+    assert run(csv_file, "mmap", columns, filters) == run(
+        csv_file, "text", columns, filters
+    )
+
+
+@pytest.mark.parametrize(
+    "columns, filters",
+    [
+        ("", ""),
+        ("name", "age>29"),
+        ("name,city", "age>=+25\nexperience!=10"),
+        ("city,name", "experience<=7\ncity!=Recife"),
+        ("name", "age<99999999999999999999"),
+        ("name", "age>abc"),
+    ],
+)
+def test_columnar_engine_output_matches_text_engine(
+    tmpdir: Path, columns: str, filters: str
+) -> None:
+    pytest.importorskip("numpy")
+    csv_file = tmpdir / "test.csv"
+    csv_file.write_binary(mock_csv_data.encode())
+
+    assert run(csv_file, "columnar", columns, filters) == run(
+        csv_file, "text", columns, filters
+    )
+
+
+@pytest.fixture
+def scanner(compile_pyx: Callable[[str], ModuleType]) -> ModuleType:
+    return compile_pyx("scanner")
+
+
+@pytest.mark.parametrize("line_break", ["\n", "\r\n"])
+@pytest.mark.parametrize(
+    "columns, filters",
+    [
+        ("", ""),
+        ("name", "age>29"),
+        ("name,city", "age>=+25\nexperience!=10"),
+        ("name", "age<99999999999999999999"),
+        ("city,name", "experience<=7\ncity!=Recife"),
+    ],
+)
+def test_scanned_mmap_engine_output_matches_text_engine(
+    tmpdir: Path,
+    monkeypatch: MonkeyPatch,
+    scanner: ModuleType,
+    line_break: str,
+    columns: str,
+    filters: str,
+) -> None:
+    monkeypatch.setattr(mmap_reader, "scan_lines", scanner.scan_lines)
+    monkeypatch.setattr(mmap_reader, "DEFAULT_SCAN_WINDOW_SIZE", 16)
+    csv_file = tmpdir / "test.csv"
+    csv_file.write_binary(
+        (mock_csv_data + "\n Eve,40,1,Natal\nFay,41,2,Recife")
+        .replace("\n", line_break)
+        .encode()
+    )
+
+    assert run(csv_file, "mmap", columns, filters) == run(
+        csv_file, "text", columns, filters
+    )
+
+
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ("a>4\nc>1", "a,b,c\n7,8,9\n"),
+        ("c>1\na>4", None),
+    ],
+)
+def test_mmap_engine_ragged_rows_match_text_engine(
+    tmpdir: Path, filters: str, expected: str
+) -> None:
+    csv_file = tmpdir / "ragged.csv"
+    csv_file.write_binary(b"a,b,c\n1,2,3\n0\n7,8,9\n")
+
+    if expected is None:
+        with pytest.raises(SystemExit):
+            run(csv_file, "text", "a,b,c", filters)
+        with pytest.raises(SystemExit):
+            run(csv_file, "mmap", "a,b,c", filters)
+        return
+
+    assert run(csv_file, "mmap", "a,b,c", filters) == expected
+    assert run(csv_file, "text", "a,b,c", filters) == expected
+
+
+@pytest.mark.parametrize("engine", ["mmap", "columnar"])
+def test_lone_carriage_returns_fall_back_to_text_engine(
+    tmpdir: Path, engine: str
+) -> None:
+    if engine == "columnar":
+        pytest.importorskip("numpy")
+    csv_file = tmpdir / "test.csv"
+    csv_file.write_binary(b"a,b\r1,2\r3,4\n5,6\r\n7,8")
+
+    assert run(csv_file, engine, "a", "") == run(csv_file, "text", "a", "")
+    assert run(csv_file, engine, "a", "b>2") == "a\n3\n5\n7\n"
+
+
+def test_has_lone_carriage_return(tmpdir: Path) -> None:
+    csv_file = tmpdir / "test.csv"
+
+    for data, expected in [
+        (b"", False),
+        (b"a,b\n1,2", False),
+        (b"a,b\r\n1,2\r\n", False),
+        (b"a,b\r\n1,2\r", True),
+        (b"a,b\r1,2", True),
+    ]:
+        csv_file.write_binary(data)
+        assert mmap_reader.has_lone_carriage_return(str(csv_file)) is expected
+
+
+def test_mmap_engine_empty_file(tmpdir: Path) -> None:
+    csv_file = tmpdir / "empty.csv"
+    csv_file.write_binary(b"")
+
+    assert run(csv_file, "mmap", "", "") == run(csv_file, "text", "", "")
+
+
+def test_engine_from_environment(
+    tmpdir: Path, capfd: CaptureFixture[str], monkeypatch: MonkeyPatch
+) -> None:
+    csv_file = tmpdir / "test.csv"
+    csv_file.write_binary(mock_csv_data.encode())
+    monkeypatch.setenv("LIBCSV_ENGINE", "mmap")
+
+    process_csv_file(str(csv_file), "name", "experience>6")
+    out, _ = capfd.readouterr()
+
+    assert out.splitlines()[-3:] == ["name", "Charlie", "Dora"]
+
+
+def test_invalid_engine_error_logging(tmpdir: Path, capfd: CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit):
+        process_csv_file(str(tmpdir / "test.csv"), "name", "", engine="parquet")
+    _, err = capfd.readouterr()
+    assert "Invalid engine: 'parquet'" in err
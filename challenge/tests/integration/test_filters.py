@@ -134,3 +134,28 @@ def test_non_existent_columns_in_selection_string(
         process_csv_file(str(csv_file), selected_columns, row_filter_definitions)
     _, err = capfd.readouterr()
     assert "Header 'nonexistent' not found in CSV file/string" in err
+
+
+@patch("builtins.open", new_callable=mock_open, read_data=mock_csv_data)
+def test_csv_filter_with_explicit_schema(
+    _mock_file: MagicMock, capfd: CaptureFixture[str], csv_file: Path
+) -> None:
+    selected_columns = "name"
+    row_filter_definitions = "age>29\nexperience<10"
+    process_csv_file(
+        str(csv_file), selected_columns, row_filter_definitions, schema="age:string"
+    )
+    out, _ = capfd.readouterr()
+    assert "Alice" in out
+    assert "Bob" not in out
+    assert "Charlie" not in out
+
+
+@patch("builtins.open", new_callable=mock_open, read_data=mock_csv_data)
+def test_csv_filter_invalid_schema_error_logging(
+    _mock_file: MagicMock, capfd: CaptureFixture[str], csv_file: Path
+) -> None:
+    with pytest.raises(SystemExit):
+        process_csv_file(str(csv_file), "name", "age>29", schema="age:date")
+    _, err = capfd.readouterr()
+    assert "Invalid schema: 'age:date'" in err
@@ -0,0 +1,80 @@
+import io
+import pytest
+from pathlib import Path
+from _pytest.capture import CaptureFixture
+from processor_py.processor import process_csv, process_csv_file
+from processor_py.profiling import Profiler
+
+mock_csv_data = "name,age\n" + "\n".join(f"name{index},{index}" for index in range(500))
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> Path:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return file_path
+
+
+@pytest.mark.parametrize(
+    "engine, workers", [("text", 1), ("mmap", 1), ("columnar", 1), ("text", 2)]
+)
+@pytest.mark.parametrize(
+    "limit, offset, expected",
+    [
+        (2, 0, "name\nname11\nname13\n"),
+        (2, 3, "name\nname17\nname19\n"),
+        (0, 0, "name\n"),
+        (None, 482, "name\nname497\nname498\nname499\n"),
+        (5, 485, "name\n"),
+    ],
+)
+def test_limit_and_offset(
+    csv_file: Path,
+    engine: str,
+    workers: int,
+    limit: int,
+    offset: int,
+    expected: str,
+) -> None:
+    output = io.StringIO()
+    process_csv_file(
+        str(csv_file),
+        "name",
+        "age>10\nage!=12\nage!=14\nage!=16\nage!=18",
+        output,
+        engine=engine,
+        workers=workers,
+        limit=limit,
+        offset=offset,
+    )
+    assert output.getvalue() == expected
+
+
+def test_limit_stops_reading_the_file(csv_file: Path) -> None:
+    profiler = Profiler()
+    output = io.StringIO()
+
+    process_csv_file(
+        str(csv_file), "name", "age>=200", output, profile=profiler, limit=1
+    )
+
+    assert output.getvalue() == "name\nname200\n"
+    assert profiler.stage("read_lines").rows_out == 201
+    assert profiler.stage("line_match").rows_in == 201
+
+
+def test_process_csv_limit() -> None:
+    output = io.StringIO()
+    process_csv(mock_csv_data, "age", "", output, limit=2, offset=1)
+    assert output.getvalue() == "age\n1\n2\n"
+
+
+@pytest.mark.parametrize("limit, offset", [(-1, 0), (None, -1)])
+def test_invalid_limit(
+    capfd: CaptureFixture[str], csv_file: Path, limit: int, offset: int
+) -> None:
+    with pytest.raises(SystemExit):
+        process_csv_file(str(csv_file), "name", "", limit=limit, offset=offset)
+
+    _, err = capfd.readouterr()
+    assert err in (f"Invalid limit: {limit}", f"Invalid offset: {offset}")
@@ -0,0 +1,129 @@
+import io
+import json
+import os
+import pytest
+from pathlib import Path
+from _pytest.capture import CaptureFixture
+from processor_py.processor import process_csv, process_csv_file
+from processor_py.profiling import Profiler
+from processor_py.writer import BufferedLineWriter
+
+mock_csv_data = "name,age,experience\nAlice,30,5\nBob,25,3\nCharlie,35,10"
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> Path:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return file_path
+
+
+def test_stdout_output_matches_full_response(
+    capfd: CaptureFixture[str], csv_file: Path
+) -> None:
+    process_csv_file(str(csv_file), "name,age", "")
+    out, _ = capfd.readouterr()
+    assert out == "name,age\nAlice,30\nBob,25\nCharlie,35\n"
+
+
+def test_filters_are_echoed_only_on_stdout(
+    capfd: CaptureFixture[str], csv_file: Path
+) -> None:
+    process_csv_file(str(csv_file), "name", "age>26")
+    out, _ = capfd.readouterr()
+    assert out == "age>26\nname\nAlice\nCharlie\n"
+
+    output = io.StringIO()
+    process_csv_file(str(csv_file), "name", "age>26", output=output)
+    process_csv(mock_csv_data, "name", "age>26", output=output)
+    out, _ = capfd.readouterr()
+    assert out == ""
+    assert output.getvalue() == "name\nAlice\nCharlie\n" * 2
+
+
+def test_writer_output(csv_file: Path) -> None:
+    output = io.StringIO()
+    process_csv_file(str(csv_file), "name", "", output=output)
+    assert output.getvalue() == "name\nAlice\nBob\nCharlie\n"
+
+
+def test_file_descriptor_output(tmpdir: Path) -> None:
+    output_path = tmpdir / "output.csv"
+    file_descriptor = os.open(str(output_path), os.O_WRONLY | os.O_CREAT)
+    try:
+        process_csv(mock_csv_data, "name", "", output=file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+    assert output_path.read_text(encoding="utf-8") == "name\nAlice\nBob\nCharlie\n"
+
+
+def test_buffered_line_writer_flushes_in_chunks() -> None:
+    sink = io.StringIO()
+    writer = BufferedLineWriter(sink, buffer_size=8)
+
+    writer.write_line("abc")
+    assert sink.getvalue() == ""
+
+    writer.write_line("defgh")
+    assert sink.getvalue() == "abc\ndefgh\n"
+
+    writer.write_line("i")
+    writer.flush()
+    assert sink.getvalue() == "abc\ndefgh\ni\n"
+
+
+def test_profiled_output_is_unchanged(csv_file: Path) -> None:
+    profiler = Profiler()
+    output = io.StringIO()
+
+    process_csv(mock_csv_data, "name", "age>26", output=output, profile=profiler)
+
+    stages = profiler.to_dict()
+    assert output.getvalue() == "name\nAlice\nCharlie\n"
+    assert stages["lines_split_lazy"]["rows_out"] == 4
+    assert stages["tokenize"]["rows_in"] == 3
+    assert (stages["line_match"]["rows_in"], stages["line_match"]["rows_out"]) == (3, 2)
+    assert stages["stringify_line"]["rows_out"] == 2
+    assert stages["write"]["rows_out"] == 3
+
+
+def test_reordered_filters_reject_short_rows(tmpdir: Path) -> None:
+    file_path = tmpdir / "ragged.csv"
+    file_path.write_text("a,b\n1,2\n1,2\n1,2\n1,2\n5\n1,9\n", encoding="utf-8")
+    output = io.StringIO()
+
+    process_csv_file(str(file_path), "a,b", "a=1\nb=9", output=output)
+
+    assert output.getvalue() == "a,b\n1,9\n"
+
+
+def test_profiled_filter_order(csv_file: Path) -> None:
+    profiler = Profiler()
+    output = io.StringIO()
+
+    process_csv(
+        mock_csv_data, "name", "name!=Dave\nage>30", output=output, profile=profiler
+    )
+
+    assert output.getvalue() == "name\nCharlie\n"
+    assert [
+        (entry["definition"], entry["pass_rate"])
+        for entry in profiler.details["filter_order"]
+    ] == [("age>30", 1 / 3), ("name!=Dave", 1.0)]
+
+
+def test_profile_file_written_for_process_csv_file(
+    capfd: CaptureFixture[str], csv_file: Path, tmpdir: Path
+) -> None:
+    profile_path = str(tmpdir / "profile.json")
+
+    process_csv_file(str(csv_file), "name", "age>26", profile=profile_path)
+
+    out, err = capfd.readouterr()
+    with open(profile_path) as file:
+        stages = json.load(file)["stages"]
+    assert out.endswith("name\nAlice\nCharlie\n")
+    assert err == ""
+    assert stages["read_lines"]["rows_out"] == 3
+    assert stages["total"]["calls"] == 1
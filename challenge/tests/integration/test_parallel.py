@@ -0,0 +1,89 @@
+import io
+import multiprocessing.spawn
+import sys
+import pytest
+from pathlib import Path
+from _pytest.capture import CaptureFixture
+from processor_py.processor import process_csv_file
+from processor_py import parallel
+from processor_py.parallel import split_byte_ranges
+
+csv_rows = [f"name{index},{index % 50},{index % 7}" for index in range(500)]
+mock_csv_data = "name,age,experience\n" + "\n".join(csv_rows)
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> Path:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return file_path
+
+
+def run(csv_file: Path, workers: int, filters: str) -> str:
+    output = io.StringIO()
+    process_csv_file(str(csv_file), "name,experience", filters, output, workers=workers)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("workers", [2, 3, 8])
+@pytest.mark.parametrize("filters", ["", "age>25\nexperience!=3"])
+def test_parallel_output_matches_sequential_output(
+    csv_file: Path, workers: int, filters: str
+) -> None:
+    assert run(csv_file, workers, filters) == run(csv_file, 1, filters)
+
+
+def test_parallel_with_windows_line_breaks(tmpdir: Path) -> None:
+    csv_file = tmpdir / "windows.csv"
+    csv_file.write_binary(mock_csv_data.replace("\n", "\r\n").encode() + b"\r\n")
+
+    assert run(csv_file, 4, "age<10") == run(csv_file, 1, "age<10")
+
+
+def test_parallel_non_existent_column_error_logging(
+    capfd: CaptureFixture[str], csv_file: Path
+) -> None:
+    with pytest.raises(SystemExit):
+        process_csv_file(str(csv_file), "name", "height>60", workers=2)
+    _, err = capfd.readouterr()
+    assert "Header 'height' not found in CSV file/string" in err
+
+
+def test_split_byte_ranges_are_aligned_to_line_breaks(csv_file: Path) -> None:
+    data = csv_file.read_binary()
+    data_start = data.index(b"\n") + 1
+
+    byte_ranges = split_byte_ranges(str(csv_file), data_start, 7)
+
+    assert byte_ranges[0][0] == data_start
+    assert byte_ranges[-1][1] == len(data)
+    for (_, end), (next_start, _) in zip(byte_ranges, byte_ranges[1:]):
+        assert end == next_start
+        assert data[end - 1 : end] == b"\n"
+
+
+def test_embedded_interpreter_does_not_fork_its_workers(
+    csv_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    expected_output = run(csv_file, 1, "age>25")
+    monkeypatch.setattr(sys, "executable", "")
+    monkeypatch.setattr(
+        multiprocessing.spawn, "_python_exe", multiprocessing.spawn.get_executable()
+    )
+
+    can_start_workers, context = parallel.worker_context()
+
+    assert can_start_workers
+    assert context is not None and context.get_start_method() != "fork"
+    assert run(csv_file, 2, "age>25") == expected_output
+
+
+def test_workers_without_python_executable_run_in_process(
+    csv_file: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    expected_output = run(csv_file, 1, "age>25")
+    monkeypatch.setattr(sys, "executable", "")
+    monkeypatch.setattr(parallel, "python_executable", lambda: None)
+
+    assert parallel.worker_context() == (False, None)
+    assert run(csv_file, 2, "age>25") == expected_output
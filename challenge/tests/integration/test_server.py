@@ -0,0 +1,209 @@
+import io
+import os
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from pathlib import Path
+from typing import Any, Iterator, List, Tuple
+from processor_py.processor import process_csv_file
+from processor_py.query import compile_query
+from processor_py.server import (
+    END_FRAME,
+    ERROR_FRAME,
+    QueryPlanCache,
+    QueryRequest,
+    encode_request,
+    handle_connection,
+    open_listener,
+    query_server,
+    read_request,
+    run_query,
+)
+
+mock_rows = [f"name{index},{index % 60},{index % 11}" for index in range(2000)]
+mock_csv_data = "\n".join(["name,age,experience", *mock_rows])
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> str:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return str(file_path)
+
+
+def read_frames(stream: io.BufferedReader) -> Tuple[bytes, str]:
+    data = []
+    while True:
+        kind = stream.read(1)
+        length = int.from_bytes(stream.read(4), "big")
+        payload = stream.read(length).decode("utf-8")
+        if kind == b"D":
+            data.append(payload)
+        else:
+            return kind, "".join(data) if kind == END_FRAME else payload
+
+
+def send_requests(requests: List[bytes]) -> List[Tuple[bytes, str]]:
+    server_side, client_side = socket.socketpair()
+    plan_cache = QueryPlanCache()
+    handler = threading.Thread(target=handle_connection, args=(server_side, plan_cache))
+    handler.start()
+
+    with client_side, client_side.makefile("rb") as stream:
+        client_side.sendall(b"".join(requests))
+        responses = [read_frames(stream) for _ in requests]
+        client_side.shutdown(socket.SHUT_WR)
+        handler.join()
+
+    server_side.close()
+    return responses
+
+
+def test_request_round_trip() -> None:
+    request = QueryRequest("/tmp/á.csv", "name", "age>1\nname=ç", 10, 2)
+
+    assert read_request(io.BytesIO(encode_request(request))) == request
+    assert read_request(io.BytesIO(b"")) is None
+    with pytest.raises(ValueError, match="Truncated message"):
+        read_request(io.BytesIO(encode_request(request)[:-1]))
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"",
+        struct.pack(">I", 100) + b"a.csv",
+        struct.pack(">I", 1) + b"a" + struct.pack(">I", 0) * 2 + b"\x00" * 15,
+    ],
+)
+def test_malformed_requests_are_rejected(body: bytes) -> None:
+    with pytest.raises(ValueError, match="Truncated message"):
+        read_request(io.BytesIO(struct.pack(">I", len(body)) + body))
+
+
+def test_malformed_request_is_answered_with_an_error_frame() -> None:
+    body = struct.pack(">I", 100) + b"a.csv"
+
+    responses = send_requests([struct.pack(">I", len(body)) + body])
+
+    assert responses == [(ERROR_FRAME, "Truncated message")]
+
+
+def test_connection_answers_several_requests(csv_file: str) -> None:
+    queries = [
+        ("name,age", "age>50", None, 0),
+        ("name", "age>50", 2, 3),
+        ("", "", 1, 0),
+    ]
+    expected = []
+    for selected_columns, filters, limit, offset in queries:
+        output = io.StringIO()
+        process_csv_file(
+            csv_file, selected_columns, filters, output, limit=limit, offset=offset
+        )
+        expected.append((END_FRAME, output.getvalue()))
+
+    responses = send_requests(
+        [encode_request(QueryRequest(csv_file, *query)) for query in queries * 2]
+    )
+
+    assert responses == expected * 2
+
+
+def test_errors_are_sent_as_frames(csv_file: str) -> None:
+    responses = send_requests(
+        [
+            encode_request(QueryRequest(csv_file, "unknown", "")),
+            encode_request(QueryRequest(csv_file, "name", "", None, -5)),
+            encode_request(QueryRequest(csv_file, "name", "age=1", 1)),
+        ]
+    )
+
+    assert responses == [
+        (ERROR_FRAME, "Header 'unknown' not found in CSV file/string"),
+        (ERROR_FRAME, "Invalid offset: -5"),
+        (END_FRAME, "name\nname1\n"),
+    ]
+
+
+def test_plan_cache_evicts_the_least_recent() -> None:
+    plan_cache = QueryPlanCache(max_entries=2)
+    plans = [object() for _ in range(3)]
+    keys = [("/a.csv", 1, 1, ("a",), "a", str(index)) for index in range(3)]
+
+    plan_cache.put(keys[0], plans[0])  # type: ignore[arg-type]
+    plan_cache.put(keys[1], plans[1])  # type: ignore[arg-type]
+    assert plan_cache.get(keys[0]) is plans[0]
+    plan_cache.put(keys[2], plans[2])  # type: ignore[arg-type]
+
+    assert plan_cache.get(keys[1]) is None
+    assert plan_cache.get(keys[0]) is plans[0]
+    assert plan_cache.get(keys[2]) is plans[2]
+
+
+def test_plans_are_compiled_per_file(
+    monkeypatch: pytest.MonkeyPatch, tmpdir: Path, csv_file: str
+) -> None:
+    other_file = tmpdir / "other.csv"
+    other_file.write_text("name,age,experience\nname1,1,1\n", encoding="utf-8")
+    compiled_queries = []
+
+    def counting_compile_query(*arguments: Any) -> Any:
+        compiled_queries.append(arguments)
+        return compile_query(*arguments)
+
+    monkeypatch.setattr("processor_py.server.compile_query", counting_compile_query)
+    plan_cache = QueryPlanCache()
+    for path in [csv_file, str(other_file), csv_file, str(other_file)]:
+        run_query(QueryRequest(path, "name", "age=1"), io.StringIO(), plan_cache)
+
+    assert len(compiled_queries) == 2
+
+
+def test_listener_replaces_only_sockets(tmpdir: Path) -> None:
+    socket_path = str(tmpdir / "libcsv.sock")
+    open_listener(socket_path).close()
+    open_listener(socket_path).close()
+
+    file_path = str(tmpdir / "data.csv")
+    Path(file_path).write_text("a,b\n", encoding="utf-8")
+    with pytest.raises(OSError):
+        open_listener(file_path)
+    assert Path(file_path).read_text(encoding="utf-8") == "a,b\n"
+
+
+@pytest.fixture
+def server(tmpdir: Path) -> Iterator[str]:
+    socket_path = str(tmpdir / "libcsv.sock")
+    command = [sys.executable, "-m", "processor_py.server", "--socket", socket_path]
+    process = subprocess.Popen(command + ["--workers", "2"], stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 10
+    while not os.path.exists(socket_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    yield socket_path
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=10) == 0
+    assert not os.path.exists(socket_path)
+
+
+def test_query_server(server: str, csv_file: str) -> None:
+    expected = io.StringIO()
+    process_csv_file(csv_file, "name", "age>55\nexperience=3", expected)
+
+    for _ in range(3):
+        output = io.StringIO()
+        query_server(
+            csv_file, "name", "age>55\nexperience=3", output, socket_path=server
+        )
+        assert output.getvalue() == expected.getvalue()
+
+    with pytest.raises(ValueError, match="No such file or directory"):
+        query_server(csv_file + ".missing", "name", "", socket_path=server)
@@ -1,4 +1,5 @@
 import pytest
+from processor.processor.column_type import ColumnTypeEnum
 from processor.processor.comparison import Comparison
 from processor.processor.comparison_type_enum import ComparisonTypeEnum
 
@@ -55,6 +56,19 @@ def test_casting_and_data_types() -> None:
     assert not comparison.is_satisfied_by("another_string")
 
 
+@pytest.mark.parametrize("column_type", list(ColumnTypeEnum))
+@pytest.mark.parametrize("value", ["9", "10", " 9", "+9", "-9", "9.5", "a", ""])
+def test_column_type_keeps_the_casting(column_type: ColumnTypeEnum, value: str) -> None:
+    for ref_value in ["10", "9.5", "a"]:
+        typed = Comparison(
+            "header1", ComparisonTypeEnum.LESS_THAN, ref_value, column_type
+        )
+        untyped = Comparison("header1", ComparisonTypeEnum.LESS_THAN, ref_value)
+        assert typed.cast_many([value, ref_value]) == untyped.cast_many(
+            [value, ref_value]
+        )
+
+
 @pytest.mark.parametrize(
     "header, comparison_type, ref_value, value, expected",
     [
@@ -25,6 +25,23 @@ def test_tokenize_with_empty_string() -> None:
     assert lexer.tokenize(data) == expected
 
 
+def test_compile_tokenizer() -> None:
+    lexer = Lexer(delimiter=",")
+    data = "a,b,c,d,e,f"
+
+    assert lexer.compile_tokenizer(6, [0, 1, 2, 3, 4, 5])(data) == lexer.tokenize(data)
+    assert lexer.compile_tokenizer(6, [1])(data)[1] == "b"
+    assert lexer.compile_tokenizer(6, [5])(data)[5] == "f"
+
+    tokenized_data = lexer.compile_tokenizer(6, [0, 5])(data)
+    assert tokenized_data == ["a", None, None, None, None, "f"]
+
+
+def test_compile_tokenizer_with_ragged_line() -> None:
+    lexer = Lexer(delimiter=",")
+    assert lexer.compile_tokenizer(6, [0, 5])("a,b") == ["a", "b"]
+
+
 # lines_split_lazy tests
 
 
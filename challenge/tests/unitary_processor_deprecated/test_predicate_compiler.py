@@ -0,0 +1,129 @@
+import random
+from typing import List
+
+import pytest
+from processor.processor.filter import Filter
+from processor.processor.predicate_compiler import PredicateCompiler
+
+HEADERS = ["name", "age", "experience", "name"]
+
+FILTERS = [
+    "",
+    "age>29",
+    "name=Alice",
+    "age>=10\nage<50\nexperience!=3",
+    "name!=7\nexperience<=x1",
+    "age<=-5\nname>B",
+    "age=1_0",
+]
+
+CELLS = ["Alice", "Bob", "7", "10", "29", "30", "-5", "x1", "", " 12", "1_0", "4.5"]
+
+
+def random_rows(amount: int) -> List[List[str]]:
+    randomizer = random.Random(7)
+    return [[randomizer.choice(CELLS) for _ in HEADERS] for _ in range(amount)]
+
+
+@pytest.mark.parametrize("full_filter_string", FILTERS)
+def test_compiled_predicate_matches_interpreted(full_filter_string: str) -> None:
+    filter_instance = Filter(full_filter_string, HEADERS)
+
+    for row in random_rows(500):
+        assert filter_instance.is_satisfied_by(
+            row
+        ) is filter_instance.is_satisfied_by_interpreted(row)
+
+
+@pytest.mark.parametrize("full_filter_string", FILTERS)
+def test_typed_predicate_matches_interpreted(full_filter_string: str) -> None:
+    rows = random_rows(500)
+    filter_instance = Filter(full_filter_string, HEADERS, rows[:20])
+
+    for row in rows:
+        assert filter_instance.is_satisfied_by(
+            row
+        ) is filter_instance.is_satisfied_by_interpreted(row)
+
+
+def test_sampled_text_column_skips_int_on_text_cells() -> None:
+    filter_instance = Filter("name>10", HEADERS, [["Alice", "1", "1", "Bob"]])
+    source = PredicateCompiler.generate_source(HEADERS, filter_instance.comparisons)
+
+    assert "cell_0[:1].isdigit()" in source
+    assert filter_instance.is_satisfied_by(["9", "1", "1", "Bob"]) is False
+    assert filter_instance.is_satisfied_by(["Bob", "1", "1", "Bob"]) is True
+
+
+def test_compiled_predicate_compares_numbers_as_integers() -> None:
+    filter_instance = Filter("age>9", HEADERS)
+    assert filter_instance.is_satisfied_by(["Alice", "10", "1", "Alice"]) is True
+    assert filter_instance.is_satisfied_by(["Alice", "a", "1", "Alice"]) is True
+    assert filter_instance.is_satisfied_by(["Alice", "1", "1", "Alice"]) is False
+
+
+def test_compiled_predicate_stops_at_first_failing_column() -> None:
+    filter_instance = Filter("name=Bob\nexperience>1", HEADERS)
+    assert filter_instance.is_satisfied_by(["Alice"]) is False
+
+    with pytest.raises(IndexError):
+        filter_instance.is_satisfied_by(["Bob"])
+
+
+def test_compiled_predicate_checks_duplicated_headers() -> None:
+    filter_instance = Filter("name=Bob", HEADERS)
+    assert filter_instance.is_satisfied_by(["Bob", "1", "1", "Bob"]) is True
+    assert filter_instance.is_satisfied_by(["Bob", "1", "1", "Alice"]) is False
+
+
+def test_compiled_predicate_is_cached_per_filter() -> None:
+    first_filter = Filter("age>29\nname=Alice", HEADERS)
+    second_filter = Filter("age>29\nname=Alice", HEADERS)
+    other_filter = Filter("age>30", HEADERS)
+
+    assert first_filter.predicate is second_filter.predicate
+    assert first_filter.predicate is not other_filter.predicate
+
+
+def test_generated_source_quotes_references() -> None:
+    filter_instance = Filter("name=it's", ["name"])
+    source = PredicateCompiler.generate_source(
+        filter_instance.headers, filter_instance.comparisons
+    )
+
+    assert 'cell_0 == "it\'s"' in source
+    assert filter_instance.is_satisfied_by(["it's"]) is True
+    assert filter_instance.is_satisfied_by(["its"]) is False
+
+
+def test_sampled_rows_order_the_selective_columns_first() -> None:
+    sampled_rows = [[f"name{age}", str(age), "1", "Bob"] for age in range(100)]
+    filter_instance = Filter("name!=Alice\nage>97", HEADERS, sampled_rows)
+
+    assert [stats.definition for stats in filter_instance.statistics] == [
+        "age>97",
+        "name!=Alice",
+        "name!=Alice",
+    ]
+    assert filter_instance.statistics[0].pass_rate == 0.02
+    for row in sampled_rows + random_rows(200):
+        assert filter_instance.is_satisfied_by(
+            row
+        ) is filter_instance.is_satisfied_by_interpreted(row)
+
+
+def test_short_sampled_rows_keep_the_header_order() -> None:
+    filter_instance = Filter("experience>1\nname=Bob", HEADERS, [["Bob", "1"]])
+
+    assert filter_instance.statistics == []
+    assert filter_instance.is_satisfied_by(["Alice"]) is False
+
+
+def test_sampled_rows_order_keeps_short_rows_in_header_order() -> None:
+    filter_instance = Filter("a=1\nb=9", ["a", "b"], [["1", "2"]] * 4)
+
+    assert filter_instance.statistics[0].definition == "b=9"
+    assert filter_instance.is_satisfied_by(["5"]) is False
+    assert filter_instance.is_satisfied_by(["1", "9"]) is True
+    with pytest.raises(IndexError):
+        filter_instance.is_satisfied_by(["1"])
@@ -3,6 +3,7 @@ from unittest.mock import Mock
 from processor.processor.processor import Processor, ProcessedLazyDataDTO
 from processor.processor.filter import Filter
 from processor.transformer.transformer_strategy import CSVTransformedDataDTO
+from processor_py.profiling import Profiler
 
 
 @pytest.fixture
@@ -78,3 +79,39 @@ def test_processor_all_rows_satisfied(
         ["data3", "data4"],
         ["data5", "data6"],
     ]
+
+
+def test_processor_build_lazy_profiled(
+    csv_transformed_data_DTO: CSVTransformedDataDTO, mock_filter: Filter
+) -> None:
+    profiler = Profiler()
+    processor = Processor(csv_transformed_data_DTO, mock_filter, profiler)
+
+    assert list(processor.build_lazy().rows) == [["data3", "data4"]]
+    assert profiler.stage("line_match").rows_in == 3
+    assert profiler.stage("line_match").rows_out == 1
+
+
+def test_processor_build_lazy_limit_and_offset() -> None:
+    rows = iter([["data1"], ["data2"], ["data3"], ["data4"]])
+    mock_filter = Mock(spec=Filter)
+    mock_filter.is_satisfied_by.return_value = True
+
+    processor = Processor(CSVTransformedDataDTO(["header1"], rows), mock_filter)
+
+    assert list(processor.build_lazy(limit=2, offset=1).rows) == [
+        ["data2"],
+        ["data3"],
+    ]
+    assert next(rows) == ["data4"]
+
+
+def test_processor_build_lazy_invalid_limit(
+    csv_transformed_data_DTO: CSVTransformedDataDTO, mock_filter: Filter
+) -> None:
+    processor = Processor(csv_transformed_data_DTO, mock_filter)
+
+    with pytest.raises(ValueError, match="Invalid limit: -1"):
+        processor.build_lazy(limit=-1)
+    with pytest.raises(ValueError, match="Invalid offset: -1"):
+        processor.build_lazy(offset=-1)
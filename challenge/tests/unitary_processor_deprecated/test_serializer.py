@@ -0,0 +1,48 @@
+import io
+import pytest
+from processor.serializer.serializer import Serializer
+from processor.processor.processor import ProcessedLazyDataDTO
+
+rows = [["10", "20"], ["30", "40"], ["50", "60"]]
+
+
+def create_serializer() -> Serializer:
+    return Serializer(ProcessedLazyDataDTO(["header1", "header2"], iter(rows)))
+
+
+@pytest.mark.parametrize("selected_columns", ["", "header2"])
+@pytest.mark.parametrize("chunk_size", [1, 8, 64 * 1024])
+def test_serializer_stringify_iter_matches_stringify(
+    selected_columns: str, chunk_size: int
+) -> None:
+    chunks = list(create_serializer().stringify_iter(selected_columns, chunk_size))
+
+    assert "".join(chunks) == create_serializer().stringify(selected_columns)
+    assert len(chunks) == (3 if chunk_size == 1 else 1 if chunk_size > 8 else 2)
+
+
+def test_serializer_stringify_iter_is_lazy() -> None:
+    row_iterator = iter(rows)
+    serializer = Serializer(ProcessedLazyDataDTO(["header1", "header2"], row_iterator))
+    chunks = serializer.stringify_iter("header1", chunk_size=1)
+
+    assert next(chunks) == "header1\n10"
+    assert next(row_iterator) == ["30", "40"]
+
+
+def test_serializer_stringify_iter_without_rows() -> None:
+    serializer = Serializer(ProcessedLazyDataDTO(["header1"], iter([])))
+    assert list(serializer.stringify_iter("")) == ["header1\n"]
+
+
+def test_serializer_write_to() -> None:
+    stream = io.StringIO()
+    create_serializer().write_to(stream, "header1,header2", chunk_size=4)
+    assert stream.getvalue() == "header1,header2\n10,20\n30,40\n50,60"
+
+
+def test_serializer_projection_of_short_rows() -> None:
+    serializer = Serializer(
+        ProcessedLazyDataDTO(["h1", "h2", "h3"], iter([["1", "2", "3"], ["4"], []]))
+    )
+    assert serializer.stringify("h3,h1") == "h1,h3\n1,3\n4\n"
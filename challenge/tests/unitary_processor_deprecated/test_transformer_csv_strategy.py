@@ -9,6 +9,7 @@ from processor.transformer.transformer_strategy import (
     CsvTransformStrategy,
     TransformStrategy,
 )
+from processor_py.profiling import Profiler
 
 
 def test_csv_transform_strategy_file_transform_lazy(
@@ -42,6 +43,38 @@ def test_csv_transform_strategy_data_transform_lazy() -> None:
     ]
 
 
+def test_csv_transform_strategy_used_columns() -> None:
+    data = "h1,h2,h3,h4\n1,2,3,4\n5,6,7,8"
+    strategy = CsvTransformStrategy(line_delimiter=",", used_columns=["h1", "h4"])
+    result = strategy.data_transform_lazy(data)
+
+    assert result.headers == ["h1", "h2", "h3", "h4"]
+    assert [(row[0], row[3]) for row in result.rows] == [("1", "4"), ("5", "8")]
+
+
+def test_csv_transform_strategy_unknown_used_columns() -> None:
+    data = "h1,h2,h3\n1,2,3"
+    strategy = CsvTransformStrategy(line_delimiter=",", used_columns=["h9"])
+    result = strategy.data_transform_lazy(data)
+
+    assert list(result.rows) == [["1", "2", "3"]]
+
+
+def test_csv_transform_strategy_profiled() -> None:
+    profiler = Profiler()
+    strategy = CsvTransformStrategy(line_delimiter=",", profiler=profiler)
+    result = strategy.data_transform_lazy("h1,h2\n1,2\n3,4")
+
+    assert list(result.rows) == [["1", "2"], ["3", "4"]]
+    assert profiler.stage("lines_split_lazy").rows_out == 3
+    assert profiler.stage("tokenize").rows_in == 2
+
+    result = strategy.file_transform_lazy(io.StringIO("h1,h2\n1,2\n"))
+
+    assert list(result.rows) == [["1", "2"]]
+    assert profiler.stage("read_lines").rows_out == 1
+
+
 class IncompleteTransformStrategy(TransformStrategy[CSVTransformedDataDTO]):
     def file_transform_lazy(self, file: TextIO) -> CSVTransformedDataDTO:
         return super().file_transform_lazy(file)  # type: ignore
@@ -0,0 +1,103 @@
+import io
+import os
+import pytest
+from pathlib import Path
+from processor_py.cache import CacheKey, RecordingWriter, ResultCache
+from processor_py.cache import build_cache_key
+
+
+def make_key(name: str) -> CacheKey:
+    return CacheKey(name, 0, 0, 0, (), ())
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> Path:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text("name,age\nAlice,30\n", encoding="utf-8")
+    return file_path
+
+
+def test_build_cache_key_normalizes_the_query(csv_file: Path) -> None:
+    key = build_cache_key(str(csv_file), "name,age", "age>20\nname!=Bob")
+
+    assert key == build_cache_key(str(csv_file), "age,name,age", "name != Bob\nage>20")
+    assert key != build_cache_key(str(csv_file), "name", "age>20\nname!=Bob")
+    assert key != build_cache_key(str(csv_file), "name,age", "age>21\nname!=Bob")
+
+
+def test_build_cache_key_follows_the_file_identity(csv_file: Path) -> None:
+    key = build_cache_key(str(csv_file), "name", "")
+    csv_file.write_text("name,age\nAlice,30\nBob,25\n", encoding="utf-8")
+
+    assert key != build_cache_key(str(csv_file), "name", "")
+
+
+def test_build_cache_key_invalid_filter(csv_file: Path) -> None:
+    with pytest.raises(ValueError, match="Invalid filter: 'age'"):
+        build_cache_key(str(csv_file), "name", "age")
+
+
+def test_result_cache_lru_byte_budget() -> None:
+    cache = ResultCache(max_bytes=10)
+    cache.put(make_key("a"), "aaaa")
+    cache.put(make_key("b"), "bbbb")
+    assert cache.get(make_key("a")) == "aaaa"
+
+    cache.put(make_key("c"), "cccc")
+    cache.put(make_key("d"), "d" * 11)
+
+    assert cache.get(make_key("b")) is None
+    assert cache.get(make_key("c")) == "cccc"
+    assert cache.get(make_key("d")) is None
+    assert cache.stats() == (2, 0, 2, 1, 2, 8)
+
+
+def test_result_cache_disk_tier(tmpdir: Path) -> None:
+    ResultCache(directory=str(tmpdir)).put(make_key("a"), "name\r\nAlice\n")
+
+    cache = ResultCache(directory=str(tmpdir))
+
+    assert cache.get(make_key("a")) == "name\r\nAlice\n"
+    assert cache.get(make_key("a")) == "name\r\nAlice\n"
+    assert cache.get(make_key("b")) is None
+    assert cache.stats()[:3] == (1, 1, 1)
+
+
+def test_result_cache_disk_tier_byte_budget(tmpdir: Path) -> None:
+    cache = ResultCache(max_bytes=4, directory=str(tmpdir), max_disk_bytes=8)
+    cache.put(make_key("a"), "aaaa")
+    cache.put(make_key("b"), "bbbb")
+    for path in Path(tmpdir).iterdir():
+        modified_at = 1 if path.read_text() == "aaaa" else 2
+        os.utime(path, (modified_at, modified_at))
+    cache.put(make_key("c"), "cccc")
+    cache.put(make_key("d"), "d" * 9)
+
+    assert sorted(path.read_text() for path in Path(tmpdir).iterdir()) == [
+        "bbbb",
+        "cccc",
+    ]
+    assert cache.get(make_key("a")) is None
+    assert cache.get(make_key("b")) == "bbbb"
+
+
+def test_result_cache_clear_removes_the_disk_tier(tmpdir: Path) -> None:
+    other_file = Path(tmpdir) / "notes.csv"
+    other_file.write_text("kept", encoding="utf-8")
+    cache = ResultCache(directory=str(tmpdir))
+    cache.put(make_key("a"), "aaaa")
+
+    cache.clear()
+
+    assert cache.get(make_key("a")) is None
+    assert list(Path(tmpdir).iterdir()) == [other_file]
+
+
+def test_recording_writer_counts_bytes() -> None:
+    recording_writer = RecordingWriter(io.StringIO(), limit=4)
+    recording_writer.write("éé")
+    assert recording_writer.is_complete
+
+    recording_writer.write("é")
+    assert not recording_writer.is_complete
+    assert recording_writer.getvalue() == ""
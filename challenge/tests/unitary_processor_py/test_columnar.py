@@ -0,0 +1,112 @@
+import io
+import pytest
+from typing import List
+from processor_py.query import compile_query, iter_matching_lines
+
+pytest.importorskip("numpy")
+
+from processor_py.columnar import (  # noqa: E402
+    iter_line_blocks,
+    iter_matching_blocks,
+    parse_int_column,
+    split_block,
+)
+
+headers = ["name", "age", "score"]
+lines = [
+    "a,10,1",
+    "b,n/a,2",
+    "c,99999999999999999999,3",
+    "d, 7 ,4",
+    "e,+30,5",
+    "f,-4,",
+    "g,,7",
+    "h,1_000,8",
+    "i,-,9",
+    "j,٣,10",
+    "k,007,11",
+]
+
+
+def run_columnar(data: bytes, filters: str, block_size: int) -> List[str]:
+    query_plan = compile_query(headers, "name,score", filters)
+    return "".join(
+        iter_matching_blocks(io.BytesIO(data), query_plan, "utf-8", block_size, 16)
+    ).splitlines()
+
+
+def run_row_engine(data: bytes, filters: str) -> List[str]:
+    query_plan = compile_query(headers, "name,score", filters)
+    text_lines = io.StringIO(data.decode("utf-8"), newline=None)
+    return list(iter_matching_lines(map(str.strip, text_lines), query_plan))
+
+
+def test_parse_int_column() -> None:
+    block = split_block("\n".join(lines).encode(), 3, "utf-8")
+    assert block is not None
+
+    numbers, texts = parse_int_column(block, 1)
+
+    assert numbers.tolist() == [
+        10,
+        0,
+        99999999999999999999,
+        7,
+        30,
+        -4,
+        0,
+        1000,
+        0,
+        3,
+        7,
+    ]
+    assert texts == {1: "n/a", 6: "", 8: "-"}
+
+
+def test_split_block_rejects_lines_for_the_row_engine() -> None:
+    assert split_block(b"a,1,2\nb,2\n", 3, "utf-8") is None
+    assert split_block(b"a,1,2\rb,2,3\n", 3, "utf-8") is None
+    assert split_block(b"a,1,2 \nb,2,3\n", 3, "utf-8") is None
+    assert split_block(b"a,1,2\r\nb,2,3\r\n", 3, "utf-8") is not None
+
+
+def test_iter_line_blocks() -> None:
+    data = b"a\nbb\nccc\nd"
+    blocks = list(iter_line_blocks(io.BytesIO(data), block_size=2, window_size=3))
+
+    assert b"".join(blocks) == data
+    assert all(block.count(b"\n") <= 2 for block in blocks)
+
+
+@pytest.mark.parametrize("line_break", ["\n", "\r\n"])
+@pytest.mark.parametrize("block_size", [1, 3, 64])
+@pytest.mark.parametrize(
+    "filters",
+    [
+        "",
+        "age>5",
+        "age<=10\nscore!=1",
+        "age=n/a",
+        "age>m",
+        "age>-99999999999999999999",
+        "age<+8",
+        "score>=2\nname<f",
+    ],
+)
+def test_columnar_matches_row_engine(
+    line_break: str, block_size: int, filters: str
+) -> None:
+    data = line_break.join(lines).encode()
+
+    assert run_columnar(data, filters, block_size) == run_row_engine(data, filters)
+
+
+def test_columnar_short_rows_raise_like_row_engine() -> None:
+    data = b"a,1,1\nb,2,2\nc"
+    query_plan = compile_query(headers, "name", "score>1")
+
+    matching_blocks = iter_matching_blocks(io.BytesIO(data), query_plan, "utf-8")
+
+    assert next(matching_blocks) == "b\n"
+    with pytest.raises(IndexError):
+        next(matching_blocks)
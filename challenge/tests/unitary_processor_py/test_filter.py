@@ -1,13 +1,19 @@
 from unittest.mock import patch
 import pytest
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 from processor_py.filter import (
     line_match,
     tokenize_filter,
     ComparisonTypeEnum,
     parse_filters,
     is_satisfied_by,
+    compile_filters,
+    plan_match,
+    PredicateStats,
+    order_filter_plan,
+    selectivity_order,
 )
+from processor_py.schema import ColumnTypeEnum
 
 
 class TestTokenizeFilter:
@@ -257,3 +263,143 @@ class TestLineMatch:
             str, List[Dict[str, Union[ComparisonTypeEnum, str]]]
         ] = {}
         assert line_match(valid_row, valid_headers, empty_comparison_map) == True
+
+
+class TestCompileFilters:
+
+    @pytest.fixture
+    def headers(self) -> List[str]:
+        return ["id", "name", "age"]
+
+    def test_compile_filters_resolves_indexes_and_reference_values(
+        self, headers: List[str]
+    ) -> None:
+        filter_plan = compile_filters(parse_filters("age>25\nname=Alice"), headers)
+
+        assert [
+            (comparison.column_index, comparison.reference_value)
+            for comparison in filter_plan.comparisons
+        ] == [(2, 25), (1, "Alice")]
+        assert len(filter_plan.predicates) == 2
+
+    def test_compile_filters_invalid_header(self, headers: List[str]) -> None:
+        with pytest.raises(
+            ValueError, match="Header 'height' not found in CSV file/string"
+        ):
+            compile_filters(parse_filters("height>25"), headers)
+
+    def test_compile_filters_empty_plan_matches_everything(
+        self, headers: List[str]
+    ) -> None:
+        assert plan_match(["1", "Alice", "30"], compile_filters({}, headers)) is True
+
+    @pytest.mark.parametrize(
+        "row_filter_definitions",
+        [
+            "age>25",
+            "age<=30\nname!=Bob",
+            "name>B",
+            "age=030",
+            "age>abc",
+            "name<5",
+            "age>=30\nage<40",
+        ],
+    )
+    @pytest.mark.parametrize(
+        "row",
+        [
+            ["1", "Alice", "30"],
+            ["2", "Bob", "25"],
+            ["3", "Charlie", "n/a"],
+            ["4", "5", "40"],
+            ["5", " 7", "2.5"],
+            ["6", "+1", "-0"],
+        ],
+    )
+    @pytest.mark.parametrize(
+        "column_type",
+        [None, ColumnTypeEnum.INT, ColumnTypeEnum.FLOAT, ColumnTypeEnum.STRING],
+    )
+    def test_plan_match_matches_line_match(
+        self,
+        headers: List[str],
+        row_filter_definitions: str,
+        row: List[str],
+        column_type: Optional[ColumnTypeEnum],
+    ) -> None:
+        filter_comparisons = parse_filters(row_filter_definitions)
+        column_types = {header: column_type for header in headers}
+        filter_plan = compile_filters(filter_comparisons, headers, column_types)
+
+        assert plan_match(row, filter_plan) == line_match(
+            row, headers, filter_comparisons
+        )
+
+
+class TestOrderFilterPlan:
+    @pytest.fixture
+    def headers(self) -> List[str]:
+        return ["name", "age", "city"]
+
+    @pytest.fixture
+    def sampled_rows(self) -> List[List[str]]:
+        return [[f"name{age}", str(age), "Lisbon"] for age in range(100)]
+
+    def test_order_filter_plan_runs_selective_comparisons_first(
+        self, headers: List[str], sampled_rows: List[List[str]]
+    ) -> None:
+        filter_plan = compile_filters(
+            parse_filters("city!=Porto\nname!=x\nage>97"), headers
+        )
+
+        ordered_filter_plan = order_filter_plan(filter_plan, sampled_rows)
+
+        assert [stats.definition for stats in ordered_filter_plan.statistics] == [
+            "age>97",
+            "city!=Porto",
+            "name!=x",
+        ]
+        assert ordered_filter_plan.statistics[0].pass_rate == 0.02
+        assert ordered_filter_plan.predicates == tuple(
+            comparison.predicate for comparison in ordered_filter_plan.comparisons
+        )
+        assert [
+            row for row in sampled_rows if plan_match(row, ordered_filter_plan)
+        ] == [row for row in sampled_rows if plan_match(row, filter_plan)]
+
+    def test_order_filter_plan_evaluates_short_rows_in_definition_order(
+        self, headers: List[str], sampled_rows: List[List[str]]
+    ) -> None:
+        filter_plan = compile_filters(parse_filters("name=x\ncity!=Lisbon"), headers)
+
+        ordered_filter_plan = order_filter_plan(filter_plan, sampled_rows)
+
+        assert ordered_filter_plan.statistics[0].definition == "city!=Lisbon"
+        assert plan_match(["y"], ordered_filter_plan) is False
+        with pytest.raises(IndexError):
+            plan_match(["x"], ordered_filter_plan)
+
+    def test_order_filter_plan_without_rows_keeps_the_plan(
+        self, headers: List[str]
+    ) -> None:
+        filter_plan = compile_filters(parse_filters("city!=Porto\nage>97"), headers)
+
+        assert order_filter_plan(filter_plan, []) is filter_plan
+        assert order_filter_plan(filter_plan, [["name1", "1"]]) is filter_plan
+        assert order_filter_plan(filter_plan, [])[2] == ()
+
+    def test_order_filter_plan_without_comparisons(
+        self, sampled_rows: List[List[str]]
+    ) -> None:
+        filter_plan = compile_filters({}, ["name"])
+        assert order_filter_plan(filter_plan, sampled_rows) is filter_plan
+
+    def test_selectivity_order_ranks_cost_by_rejected_rows(self) -> None:
+        statistics = [
+            PredicateStats("a", pass_rate=1.0, seconds_per_row=0.1),
+            PredicateStats("b", pass_rate=0.5, seconds_per_row=2.0),
+            PredicateStats("c", pass_rate=0.9, seconds_per_row=0.1),
+            PredicateStats("d", pass_rate=0.0, seconds_per_row=0.5),
+        ]
+
+        assert selectivity_order(statistics) == [3, 2, 1, 0]
@@ -0,0 +1,156 @@
+import io
+import os
+import pytest
+from pathlib import Path
+from _pytest.capture import CaptureFixture
+from processor_py.index import (
+    build_index,
+    candidate_offsets,
+    compile_index_comparisons,
+    index_path,
+    load_index,
+    process_csv_file_indexed,
+)
+from processor_py.processor import index_csv_file, process_csv_file
+
+mock_rows = [f"name{index},{index % 50},city{index % 3}" for index in range(400)]
+mock_csv_data = "\n".join(["name,age,city", *mock_rows, "odd,x1,city0", "odd,-3,city1"])
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> str:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return str(file_path)
+
+
+def scan(csv_file: str, selected_columns: str, filters: str) -> str:
+    output = io.StringIO()
+    process_csv_file(csv_file, selected_columns, filters, output)
+    return output.getvalue()
+
+
+def test_build_and_load_index(csv_file: str) -> None:
+    assert build_index(csv_file, "name,age") == index_path(csv_file)
+
+    csv_index = load_index(csv_file)
+    assert csv_index is not None
+    assert csv_index.headers == ["name", "age", "city"]
+    assert csv_index.row_count == 402
+    assert set(csv_index.columns) == {"name", "age"}
+    assert csv_index.columns["age"].missing == []
+
+
+def test_load_index_without_sidecar(csv_file: str) -> None:
+    assert load_index(csv_file) is None
+
+
+def test_index_is_ignored_once_the_file_changes(csv_file: str) -> None:
+    build_index(csv_file)
+    assert load_index(csv_file) is not None
+
+    with open(csv_file, "a") as file:
+        file.write("\nname400,1,city0")
+
+    assert load_index(csv_file) is None
+    assert not process_csv_file_indexed(csv_file, "name", "age=1", io.StringIO())
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        "age=7",
+        "name=name123",
+        "age>47",
+        "age<1",
+        "age>=48\ncity=city2",
+        "age<=0",
+        "age>x",
+        "age>=x1",
+        "name>name95",
+        "age=7\nage!=7",
+    ],
+)
+def test_indexed_output_matches_the_scan(csv_file: str, filters: str) -> None:
+    expected = scan(csv_file, "name,age", filters)
+    build_index(csv_file, "name,age")
+
+    output = io.StringIO()
+    assert process_csv_file_indexed(csv_file, "name,age", filters, output)
+    assert output.getvalue() == expected
+    assert scan(csv_file, "name,age", filters) == expected
+
+
+@pytest.mark.parametrize("filters", ["", "age!=7", "city=city1", "age>=10", "x=1"])
+def test_index_falls_back_to_the_scan(csv_file: str, filters: str) -> None:
+    build_index(csv_file, "name,age")
+    output = io.StringIO()
+
+    assert not process_csv_file_indexed(csv_file, "name", filters, output)
+    assert output.getvalue() == ""
+
+
+def test_candidate_offsets_intersects_comparisons(csv_file: str) -> None:
+    build_index(csv_file)
+    csv_index = load_index(csv_file)
+    assert csv_index is not None
+
+    comparisons = compile_index_comparisons(csv_index.headers, "age=7\ncity=city1")
+    assert comparisons is not None
+    offsets = candidate_offsets(csv_index, comparisons)
+
+    assert offsets is not None
+    assert offsets == sorted(offsets)
+    # age=7 keeps 8 rows, 3 of them are in city1.
+    assert len(offsets) == 3
+
+
+def test_ragged_rows_are_always_candidates(tmpdir: Path) -> None:
+    csv_file = str(tmpdir / "ragged.csv")
+    Path(csv_file).write_text("a,b,c\n5,2,3\n0\n7,8,9\n", encoding="utf-8")
+    build_index(csv_file, "a")
+
+    csv_index = load_index(csv_file)
+    assert csv_index is not None and csv_index.ragged == [12]
+    output = io.StringIO()
+    assert process_csv_file_indexed(
+        csv_file, "a,c", "a=5\nc>1", output, max_candidate_fraction=1
+    )
+    assert output.getvalue() == scan(csv_file, "a,c", "a=5\nc>1") == "a,c\n5,3\n"
+
+    # The scan fails on the short row when c>1 is checked first, so does the
+    # index.
+    with pytest.raises(IndexError):
+        process_csv_file_indexed(
+            csv_file, "a,c", "c>1\na=5", io.StringIO(), max_candidate_fraction=1
+        )
+
+
+def test_lone_carriage_returns_are_not_indexed_reads(tmpdir: Path) -> None:
+    csv_file = str(tmpdir / "lone.csv")
+    Path(csv_file).write_bytes(b"a,b\n1,x\r5,y\n7,z\n")
+    expected = scan(csv_file, "a,b", "a=5")
+    build_index(csv_file, "a")
+
+    assert not process_csv_file_indexed(csv_file, "a,b", "a=5", io.StringIO())
+    assert scan(csv_file, "a,b", "a=5") == expected == "a,b\n5,y\n"
+
+
+def test_indexed_limit_and_offset(csv_file: str) -> None:
+    build_index(csv_file, "age")
+    output = io.StringIO()
+
+    process_csv_file(csv_file, "name", "age=7", output, limit=2, offset=1)
+
+    assert output.getvalue() == "name\nname57\nname107\n"
+
+
+def test_index_csv_file_header_not_found(
+    capfd: CaptureFixture[str], csv_file: str
+) -> None:
+    with pytest.raises(SystemExit):
+        index_csv_file(csv_file, "name,unknown")
+
+    _, err = capfd.readouterr()
+    assert err == "Header 'unknown' not found in CSV file/string"
+    assert not os.path.exists(index_path(csv_file))
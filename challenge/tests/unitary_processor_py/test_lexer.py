@@ -1,5 +1,11 @@
 import pytest
-from processor_py.lexer import tokenize, lines_split_lazy
+from typing import AnyStr, List
+from processor_py.lexer import (
+    compile_tokenizer,
+    lines_split_lazy,
+    plan_split,
+    tokenize,
+)
 
 
 def test_tokenize() -> None:
@@ -33,3 +39,55 @@ def test_lines_split_lazy() -> None:
 
     with pytest.raises(TypeError):
         list(lines_split_lazy(None, "\n"))
+
+
+@pytest.mark.parametrize(
+    "full_string, line_delimiter",
+    [
+        ("a\r\nb\r\nc", "\r\n"),
+        ("a\r\n\r\nb\r\n", "\r\n"),
+        ("\n\n\n", "\n"),
+        ("a||b|||c", "||"),
+    ],
+)
+def test_lines_split_lazy_matches_split(full_string: str, line_delimiter: str) -> None:
+    assert list(lines_split_lazy(full_string, line_delimiter)) == full_string.split(
+        line_delimiter
+    )
+
+
+def test_plan_split() -> None:
+    assert plan_split(10, []) == (0, 0)
+    assert plan_split(10, [0, 1]) == (2, 0)
+    assert plan_split(10, [8, 9]) == (0, 2)
+    assert plan_split(10, [0, 9]) == (1, 1)
+    assert plan_split(3, [0, 1, 2]) == (0, 0)
+
+
+@pytest.mark.parametrize("delimiter", [",", b","])
+@pytest.mark.parametrize(
+    "column_indexes", [[], [0], [2], [7], [0, 7], [1, 6], [3, 4], [0, 3, 7]]
+)
+def test_compile_tokenizer_matches_tokenize(
+    delimiter: AnyStr, column_indexes: List[int]
+) -> None:
+    line = "a,b,,d,e,f,g,h"
+    if isinstance(delimiter, bytes):
+        line = line.encode()  # type: ignore[assignment]
+    tokenize_line = compile_tokenizer(delimiter, 8, column_indexes)
+    fields = line.split(delimiter)
+
+    tokenized_line = tokenize_line(line)
+
+    for index in column_indexes:
+        assert tokenized_line[index] == fields[index]
+
+
+def test_compile_tokenizer_with_ragged_lines() -> None:
+    tokenize_line = compile_tokenizer(",", 8, [0, 7])
+
+    assert tokenize_line("a,b,c") == ["a", "b", "c"]
+    assert tokenize_line("") == [""]
+
+    with pytest.raises(ValueError, match="Delimiter cannot be an empty string"):
+        compile_tokenizer("", 8, [0])
@@ -0,0 +1,139 @@
+import json
+import pytest
+from pathlib import Path
+from typing import Optional
+from _pytest.capture import CaptureFixture
+from processor_py.profiling import (
+    PROFILE_ENVIRONMENT_VARIABLE,
+    STDERR_DESTINATION,
+    ProfileOption,
+    Profiler,
+    measure,
+    profile_query,
+    resolve_profile,
+)
+
+
+def test_profiler_wrap_counts_rows() -> None:
+    profiler = Profiler()
+    is_even = profiler.wrap("is_even", lambda value: value % 2 == 0, is_filter=True)
+    double = profiler.wrap("double", lambda value: value * 2)
+
+    assert [double(value) for value in range(5) if is_even(value)] == [0, 4, 8]
+
+    stages = profiler.to_dict()
+    assert (stages["is_even"]["calls"], stages["is_even"]["rows_in"]) == (5, 5)
+    assert stages["is_even"]["rows_out"] == 3
+    assert (stages["double"]["rows_in"], stages["double"]["rows_out"]) == (3, 3)
+
+
+def test_profiler_wrap_iter_counts_items() -> None:
+    profiler = Profiler()
+
+    assert list(profiler.wrap_iter("lines", iter("abc"))) == ["a", "b", "c"]
+    assert profiler.stage("lines").rows_out == 3
+    assert profiler.stage("lines").calls == 4
+
+
+def test_profiler_self_time_excludes_nested_stages() -> None:
+    profiler = Profiler()
+
+    with profiler.measure("outer"):
+        with profiler.measure("inner"):
+            sum(range(100_000))
+
+    outer, inner = profiler.stage("outer"), profiler.stage("inner")
+    assert outer.seconds >= inner.seconds > 0
+    assert outer.self_seconds == pytest.approx(outer.seconds - inner.seconds)
+    assert inner.self_seconds == inner.seconds
+
+
+def test_measure_without_profiler() -> None:
+    with measure(None, "stage"):
+        pass
+
+
+@pytest.mark.parametrize(
+    "profile, environment, expected",
+    [
+        (None, None, None),
+        (None, "0", None),
+        (None, "1", STDERR_DESTINATION),
+        (None, "profile.json", "profile.json"),
+        (False, "1", None),
+        (True, None, STDERR_DESTINATION),
+        ("stderr", None, STDERR_DESTINATION),
+        (" false ", "1", None),
+    ],
+)
+def test_resolve_profile(
+    monkeypatch: pytest.MonkeyPatch,
+    profile: ProfileOption,
+    environment: Optional[str],
+    expected: Optional[str],
+) -> None:
+    if environment is None:
+        monkeypatch.delenv(PROFILE_ENVIRONMENT_VARIABLE, raising=False)
+    else:
+        monkeypatch.setenv(PROFILE_ENVIRONMENT_VARIABLE, environment)
+
+    assert resolve_profile(profile) == expected
+
+
+def test_profile_query_writes_json(tmpdir: Path) -> None:
+    profile_path = str(tmpdir / "profile.json")
+
+    with profile_query(profile_path) as profiler:
+        assert profiler is not None
+        profiler.wrap("stage", len)("abc")
+
+    with open(profile_path) as file:
+        stages = json.load(file)["stages"]
+    assert set(stages) == {"total", "stage"}
+    assert stages["stage"]["rows_out"] == 1
+
+
+def test_profiler_details_are_written(tmpdir: Path) -> None:
+    profile_path = str(tmpdir / "profile.json")
+
+    with profile_query(profile_path) as profiler:
+        assert profiler is not None
+        profiler.describe("order", [{"definition": "age>1", "pass_rate": 0.25}])
+
+    with open(profile_path) as file:
+        details = json.load(file)["details"]
+    assert details == {"order": [{"definition": "age>1", "pass_rate": 0.25}]}
+    assert profiler.summary().endswith(
+        "order:\n  1. definition age>1, pass_rate 0.25\n"
+    )
+
+
+def test_profile_query_writes_summary_on_error(capfd: CaptureFixture[str]) -> None:
+    with pytest.raises(ValueError):
+        with profile_query(True):
+            raise ValueError("failed")
+
+    _, err = capfd.readouterr()
+    assert err.startswith("stage")
+    assert "total" in err
+
+
+def test_profile_query_disabled(
+    monkeypatch: pytest.MonkeyPatch, capfd: CaptureFixture[str]
+) -> None:
+    monkeypatch.delenv(PROFILE_ENVIRONMENT_VARIABLE, raising=False)
+
+    with profile_query() as profiler:
+        assert profiler is None
+
+    assert capfd.readouterr() == ("", "")
+
+
+def test_profile_query_records_into_a_profiler(capfd: CaptureFixture[str]) -> None:
+    profiler = Profiler()
+
+    with profile_query(profiler) as recording_profiler:
+        assert recording_profiler is profiler
+
+    assert profiler.stage("total").calls == 1
+    assert capfd.readouterr() == ("", "")
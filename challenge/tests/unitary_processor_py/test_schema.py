@@ -0,0 +1,51 @@
+import pytest
+from typing import List
+from processor_py.schema import (
+    ColumnTypeEnum,
+    infer_column_type,
+    infer_schema,
+    parse_schema,
+)
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["1", "2", "-3"], ColumnTypeEnum.INT),
+        (["1", "2.5", ""], ColumnTypeEnum.FLOAT),
+        (["1.5", "1e3"], ColumnTypeEnum.FLOAT),
+        (["1", "Alice"], ColumnTypeEnum.STRING),
+        ([], ColumnTypeEnum.INT),
+    ],
+)
+def test_infer_column_type(values: List[str], expected: ColumnTypeEnum) -> None:
+    assert infer_column_type(values) == expected
+
+
+def test_parse_schema() -> None:
+    assert parse_schema("age:int, price : FLOAT,name:string") == {
+        "age": ColumnTypeEnum.INT,
+        "price": ColumnTypeEnum.FLOAT,
+        "name": ColumnTypeEnum.STRING,
+    }
+    assert parse_schema({"age": "int"}) == {"age": ColumnTypeEnum.INT}
+    assert parse_schema(None) == {}
+
+
+@pytest.mark.parametrize("schema", ["age", "age:date", ":int"])
+def test_parse_schema_invalid(schema: str) -> None:
+    with pytest.raises(ValueError, match="Invalid schema"):
+        parse_schema(schema)
+
+
+def test_infer_schema_keeps_explicit_types() -> None:
+    headers = ["name", "age", "score"]
+    sampled_rows = [["Alice", "30", "1.5"], ["Bob", "25", "2"]]
+
+    assert infer_schema(
+        headers, ["name", "age", "score"], sampled_rows, "age:string"
+    ) == {
+        "name": ColumnTypeEnum.STRING,
+        "age": ColumnTypeEnum.STRING,
+        "score": ColumnTypeEnum.FLOAT,
+    }
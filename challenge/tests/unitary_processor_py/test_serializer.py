@@ -0,0 +1,41 @@
+import pickle
+import pytest
+from typing import List, Set
+from processor_py.serializer import (
+    compile_line_serializer,
+    compile_projection,
+    stringify_line,
+)
+
+fields = ["a", "", "c", "d", None]
+
+
+@pytest.mark.parametrize(
+    "column_indexes", [set(), {0}, {1}, {3, 0}, {0, 1, 2, 3}, {2, 3, 0}]
+)
+def test_compile_line_serializer_matches_stringify_line(
+    column_indexes: Set[int],
+) -> None:
+    serialize_line = compile_line_serializer(column_indexes)
+
+    assert serialize_line(fields) == stringify_line(
+        {index: fields[index] for index in column_indexes}  # type: ignore[misc]
+    )
+
+
+@pytest.mark.parametrize(
+    "column_indexes, expected",
+    [([], ()), ([3], ("d",)), ([3, 0, 3], ("a", "d"))],
+)
+def test_compile_projection(column_indexes: List[int], expected: tuple) -> None:
+    assert compile_projection(column_indexes)(fields) == expected
+
+
+def test_compiled_line_serializer_is_picklable() -> None:
+    serialize_line = pickle.loads(pickle.dumps(compile_line_serializer({2, 0})))
+    assert serialize_line(fields) == "a,c"
+
+
+def test_compiled_line_serializer_short_row() -> None:
+    with pytest.raises(IndexError):
+        compile_line_serializer({0, 9})(fields)
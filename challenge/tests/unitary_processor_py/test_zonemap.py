@@ -0,0 +1,255 @@
+import io
+import os
+import pytest
+from pathlib import Path
+from processor_py.index import compile_index_comparisons
+from processor_py.processor import process_csv_file, process_lines
+from processor_py import zonemap
+from processor_py.profiling import Profiler
+from processor_py.zonemap import (
+    ZONE_MAPS_ENVIRONMENT_VARIABLE,
+    BlockStats,
+    block_may_match,
+    build_zone_map,
+    ensure_zone_map,
+    iter_zoned_lines,
+    iter_zoned_read,
+    load_zone_map,
+    plan_zoned_read,
+    resolve_zone_maps,
+    zone_map_path,
+)
+
+BLOCK_SIZE = 256
+
+mock_rows = [
+    f"name{index},{index // 10},{'x' if index % 7 == 0 else index % 40},city{index % 2}"
+    for index in range(300)
+]
+mock_csv_data = "\n".join(["name,age,experience,city", *mock_rows])
+
+
+@pytest.fixture
+def csv_file(tmpdir: Path) -> str:
+    file_path: Path = tmpdir / "test.csv"
+    file_path.write_text(mock_csv_data, encoding="utf-8")
+    return str(file_path)
+
+
+def scan(csv_file: str, filters: str, selected_columns: str = "name,experience") -> str:
+    output = io.StringIO()
+    process_csv_file(csv_file, selected_columns, filters, output, zone_maps=False)
+    return output.getvalue()
+
+
+def test_build_zone_map(csv_file: str) -> None:
+    zone_map = build_zone_map(csv_file, ["age", "city"], BLOCK_SIZE)
+
+    assert zone_map is not None
+    assert len(zone_map.blocks) > 10
+    assert zone_map.blocks[0][0] == len("name,age,experience,city\n")
+    assert zone_map.blocks[-1][1] == len(mock_csv_data)
+    assert all(
+        previous[1] == block[0]
+        for previous, block in zip(zone_map.blocks, zone_map.blocks[1:])
+    )
+
+    first_age = zone_map.columns["age"][0]
+    assert first_age.numbers == (0, first_age.numbers[1])
+    assert first_age.texts is None
+    assert zone_map.columns["city"][0].distinct == ["city0", "city1"]
+
+
+@pytest.mark.parametrize(
+    "stats, filter_definition, expected",
+    [
+        (BlockStats((5, 9), None, ("5", "9"), None, False), "age>9", False),
+        (BlockStats((5, 9), None, ("5", "9"), None, False), "age>=9", True),
+        (BlockStats((5, 9), None, ("5", "9"), None, False), "age<5", False),
+        (BlockStats((5, 9), None, ("5", "9"), None, False), "age<=5", True),
+        (BlockStats((5, 9), None, ("5", "9"), None, False), "age=10", False),
+        (BlockStats((5, 9), None, ("5", "9"), None, False), "age!=7", True),
+        (BlockStats((5, 5), None, ("5", "5"), None, False), "age!=5", False),
+        (BlockStats((5, 9), ("a", "b"), ("5", "b"), None, False), "age>9", True),
+        (BlockStats((5, 9), None, ("5", "9"), None, False), "age>9x", False),
+        (BlockStats((5, 9), None, ("5", "9"), None, True), "age>9", True),
+        (BlockStats(None, ("a", "c"), ("a", "c"), ["a", "c"], False), "age=b", False),
+        (BlockStats(None, ("a", "c"), ("a", "c"), ["a", "c"], False), "age=c", True),
+        (BlockStats((10, 10), None, ("10", "10"), ["10"], False), "age<9", False),
+    ],
+)
+def test_block_may_match(
+    stats: BlockStats, filter_definition: str, expected: bool
+) -> None:
+    comparisons = compile_index_comparisons(["age"], filter_definition)
+    assert comparisons is not None
+
+    assert block_may_match(stats, comparisons[0]) is expected
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        "age>25",
+        "age<3",
+        "age=14",
+        "age>=10\nage<=12",
+        "age>25\nexperience=x",
+        "experience>30\nage<15",
+        "name=name42",
+        "age=14\ncity=city1",
+    ],
+)
+def test_zoned_read_matches_the_scan(csv_file: str, filters: str) -> None:
+    expected = scan(csv_file, filters)
+
+    zoned_read = plan_zoned_read(csv_file, filters, BLOCK_SIZE)
+    assert zoned_read is not None
+    assert len(zoned_read.block_ranges) < len(
+        ensure_zone_map(csv_file, ["age"], BLOCK_SIZE).blocks  # type: ignore
+    )
+
+    output = io.StringIO()
+    process_lines(
+        zoned_read.headers,
+        iter_zoned_lines(csv_file, zoned_read.block_ranges),
+        "name,experience",
+        filters,
+        output,
+    )
+    assert output.getvalue() == expected
+
+
+@pytest.mark.parametrize("filters", ["", "city=city1", "age>=0", "unknown=1", "age"])
+def test_zoned_read_falls_back_to_the_scan(csv_file: str, filters: str) -> None:
+    assert plan_zoned_read(csv_file, filters, BLOCK_SIZE) is None
+
+
+def test_zone_map_is_built_lazily_per_column(csv_file: str) -> None:
+    assert load_zone_map(csv_file, BLOCK_SIZE) is None
+
+    plan_zoned_read(csv_file, "age>25", BLOCK_SIZE)
+    zone_map = load_zone_map(csv_file, BLOCK_SIZE)
+    assert zone_map is not None and set(zone_map.columns) == {"age"}
+
+    plan_zoned_read(csv_file, "experience=x", BLOCK_SIZE)
+    zone_map = load_zone_map(csv_file, BLOCK_SIZE)
+    assert zone_map is not None and set(zone_map.columns) == {"age", "experience"}
+    assert os.path.exists(zone_map_path(csv_file))
+
+    assert load_zone_map(csv_file) is None
+
+
+def test_zone_map_is_rebuilt_once_the_file_changes(csv_file: str) -> None:
+    plan_zoned_read(csv_file, "age>25", BLOCK_SIZE)
+
+    with open(csv_file, "a") as file:
+        file.write("\nname300,0,1,city0")
+
+    assert load_zone_map(csv_file, BLOCK_SIZE) is None
+    zoned_read = plan_zoned_read(csv_file, "age<1", BLOCK_SIZE)
+    assert zoned_read is not None
+    lines = list(iter_zoned_lines(csv_file, zoned_read.block_ranges))
+    assert "name300,0,1,city0" in lines
+
+
+def test_blocks_with_short_rows_are_read(tmpdir: Path) -> None:
+    file_path = str(tmpdir / "short.csv")
+    with open(file_path, "w") as file:
+        file.write("name,age\n" + "name,1\n" * 40 + "short\n" + "name,1\n" * 40)
+
+    zoned_read = plan_zoned_read(file_path, "age>1", 64)
+    assert zoned_read is not None
+    assert any(
+        "short" in iter_zoned_lines(file_path, [block_range])
+        for block_range in zoned_read.block_ranges
+    )
+
+
+def test_process_csv_file_skips_blocks(tmpdir: Path) -> None:
+    file_path = str(tmpdir / "large.csv")
+    with open(file_path, "w") as file:
+        file.write("name,age\n")
+        file.writelines(f"name{index},{index // 1000}\n" for index in range(300_000))
+
+    expected = scan(file_path, "age>295", "name")
+    process_csv_file(file_path, "name", "age>295", io.StringIO(), zone_maps=True)
+    assert os.path.exists(zone_map_path(file_path))
+
+    output = io.StringIO()
+    profiler = Profiler()
+    process_csv_file(
+        file_path, "name", "age>295", output, profile=profiler, zone_maps=True
+    )
+
+    assert output.getvalue() == expected
+    assert profiler.stage("read_lines").rows_out < 300_000 / 10
+    assert profiler.stage("zone_map").calls == 1
+
+
+def test_first_query_maps_the_columns_while_it_reads(
+    csv_file: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def build_zone_map(*args: object) -> None:
+        raise AssertionError("The file was mapped before the query read it")
+
+    expected = scan(csv_file, "age>25", "name")
+    monkeypatch.setattr(zonemap, "build_zone_map", build_zone_map)
+
+    zoned_read = plan_zoned_read(csv_file, "age>25", BLOCK_SIZE, map_on_read=True)
+    assert zoned_read is not None and zoned_read.unmapped_columns == ("age",)
+
+    output = io.StringIO()
+    process_lines(
+        zoned_read.headers,
+        iter_zoned_read(csv_file, zoned_read, BLOCK_SIZE),
+        "name",
+        "age>25",
+        output,
+    )
+    assert output.getvalue() == expected
+
+    zoned_read = plan_zoned_read(csv_file, "age>25", BLOCK_SIZE, map_on_read=True)
+    assert zoned_read is not None and not zoned_read.unmapped_columns
+    assert len(zoned_read.block_ranges) < len(
+        load_zone_map(csv_file, BLOCK_SIZE).blocks  # type: ignore
+    )
+    assert zoned_read.block_ranges
+
+
+def test_query_stopped_by_its_limit_maps_nothing(csv_file: str) -> None:
+    process_csv_file(csv_file, "name", "age>25", io.StringIO(), zone_maps=True, limit=1)
+
+    assert load_zone_map(csv_file) is None
+
+
+def test_lone_carriage_returns_are_not_mapped_on_read(tmpdir: Path) -> None:
+    file_path = str(tmpdir / "lone.csv")
+    with open(file_path, "wb") as file:
+        file.write(b"name,age\rname1,1\nname2,2\n")
+
+    assert plan_zoned_read(file_path, "age>1", 64, map_on_read=True) is None
+
+
+@pytest.mark.parametrize(
+    "zone_maps, environment, expected",
+    [
+        (None, None, False),
+        (None, "1", True),
+        (None, "false", False),
+        (False, "1", False),
+        (True, None, True),
+    ],
+)
+def test_resolve_zone_maps(
+    monkeypatch: pytest.MonkeyPatch,
+    zone_maps: bool,
+    environment: str,
+    expected: bool,
+) -> None:
+    if environment is None:
+        monkeypatch.delenv(ZONE_MAPS_ENVIRONMENT_VARIABLE, raising=False)
+    else:
+        monkeypatch.setenv(ZONE_MAPS_ENVIRONMENT_VARIABLE, environment)
+
+    assert resolve_zone_maps(zone_maps) is expected
@@ -0,0 +1,134 @@
+import pytest
+from types import ModuleType
+from typing import Callable, List
+from processor_py import filter as python_filter
+from processor_py import query
+from processor_py.schema import ColumnTypeEnum
+
+headers = ["name", "age", "big"]
+
+
+@pytest.fixture
+def typed_filter(compile_pyx: Callable[[str], ModuleType]) -> ModuleType:
+    return compile_pyx("filter")
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        "age>=30",
+        "age<30\nname!=Bob",
+        "age=+30",
+        "age!=-5",
+        "name>Bob",
+        "big<99999999999999999999",
+        "age<=abc",
+    ],
+)
+@pytest.mark.parametrize(
+    "row",
+    [
+        ["Alice", "30", "1"],
+        ["Bob", "-5", "1"],
+        ["Carol", " 35 ", "1"],
+        ["Dan", "abc", "1"],
+        ["Eve", "1_00", "1"],
+        ["Fay", "+30", "999999999999999999999"],
+        ["Gus", "", "1"],
+        ["Hal", "-", "1"],
+        ["Ivy", "３５", "1"],
+        ["Jon", "1234567890123456789", "1"],
+    ],
+)
+def test_plan_match_matches_processor_py(
+    typed_filter: ModuleType, filters: str, row: List[str]
+) -> None:
+    comparison_map = python_filter.parse_filters(filters)
+
+    typed_plan = typed_filter.compile_filters(comparison_map, headers)
+    python_plan = python_filter.compile_filters(comparison_map, headers)
+
+    assert typed_filter.plan_match(row, typed_plan) == python_filter.plan_match(
+        row, python_plan
+    )
+
+
+def test_compiled_comparison(typed_filter: ModuleType) -> None:
+    comparison_map = python_filter.parse_filters("age>29\nname=Alice")
+
+    number, text = typed_filter.compile_filters(comparison_map, headers).comparisons
+
+    assert (number.header, number.column_index, number.reference_value) == (
+        "age",
+        1,
+        29,
+    )
+    assert number.comparison_type.value == ">"
+    assert text.reference_value == text.raw_reference_value == "Alice"
+    assert number({1: "30"}) and not number({1: "29"})
+
+
+def test_compile_filters_header_not_found(typed_filter: ModuleType) -> None:
+    comparison_map = python_filter.parse_filters("height>180")
+
+    with pytest.raises(ValueError) as error:
+        typed_filter.compile_filters(comparison_map, headers)
+
+    assert str(error.value) == "Header 'height' not found in CSV file/string"
+
+
+def test_order_filter_plan_keeps_the_typed_plan(typed_filter: ModuleType) -> None:
+    comparison_map = python_filter.parse_filters("name!=Bob\nage>97")
+    sampled_rows = [[f"name{age}", str(age), "1"] for age in range(100)]
+
+    typed_plan = python_filter.order_filter_plan(
+        typed_filter.compile_filters(comparison_map, headers), sampled_rows
+    )
+
+    assert isinstance(typed_plan, typed_filter.FilterPlan)
+    assert [stats.definition for stats in typed_plan.statistics] == [
+        "age>97",
+        "name!=Bob",
+    ]
+    assert typed_plan.row_length == 2
+    assert typed_filter.plan_match(["Bob"], typed_plan) is False
+    with pytest.raises(IndexError):
+        typed_filter.plan_match(["Alice"], typed_plan)
+
+
+def test_compile_query_routes_through_the_typed_plan(
+    typed_filter: ModuleType, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    lines = ["Alice,30,1", "Bob,-5,1", "Carol,abc,1", "Dan,99,2"]
+    python_plan = query.compile_query(headers, "name,big", "age>=30\nname!=Dan")
+    monkeypatch.setattr(query, "compile_typed_filters", typed_filter.compile_filters)
+    monkeypatch.setattr(query, "typed_plan_match", typed_filter.plan_match)
+
+    typed_plan = query.compile_query(headers, "name,big", "age>=30\nname!=Dan")
+
+    assert isinstance(typed_plan.filter_plan, typed_filter.FilterPlan)
+    assert typed_plan.match_plan is typed_filter.plan_match
+    assert list(query.iter_matching_lines(lines, typed_plan)) == list(
+        query.iter_matching_lines(lines, python_plan)
+    )
+    assert list(query.iter_matching_lines(lines, typed_plan)) == [
+        "Alice,1",
+        "Carol,1",
+    ]
+
+
+def test_compile_query_passes_the_schema_to_the_typed_plan(
+    typed_filter: ModuleType, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    column_types: List[object] = []
+
+    def compile_filters(*arguments: object) -> object:
+        column_types.append(arguments[2])
+        return typed_filter.compile_filters(*arguments)
+
+    monkeypatch.setattr(query, "compile_typed_filters", compile_filters)
+    monkeypatch.setattr(query, "typed_plan_match", typed_filter.plan_match)
+
+    query.compile_query(headers, "name", "age>=30", schema="age:string")
+
+    assert column_types == [{"age": ColumnTypeEnum.STRING}]
@@ -0,0 +1,36 @@
+import pytest
+from types import ModuleType
+from typing import Callable
+
+
+@pytest.fixture
+def scanner(compile_pyx: Callable[[str], ModuleType]) -> ModuleType:
+    return compile_pyx("scanner")
+
+
+def test_scan_lines(scanner: ModuleType) -> None:
+    data = b"a,b\n1,x\n+5,y\r\n 7,z\n-3\n12345678901234567890,w\n9,v"
+
+    lines, end = scanner.scan_lines(data, 4, len(data), 2, [(0, ">", 2)])
+
+    assert end == len(data)
+    assert [
+        (data[start:stop], is_undecided) for start, stop, is_undecided in lines
+    ] == [
+        (b"+5,y", False),
+        (b" 7,z\n", True),
+        (b"-3\n", True),
+        (b"12345678901234567890,w\n", True),
+        (b"9,v", False),
+    ]
+
+
+def test_scan_lines_stops_at_the_first_line_after_the_window(
+    scanner: ModuleType,
+) -> None:
+    data = b"1,a\n2,b\n3,c"
+
+    lines, end = scanner.scan_lines(data, 0, 5, 2, [])
+
+    assert lines == [(0, 3, False), (4, 7, False)]
+    assert end == 8
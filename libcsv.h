@@ -1,6 +1,48 @@
+#ifndef LIBCSV_H
+#define LIBCSV_H
+
+#include <stddef.h>
+
+/*
+ * libcsv.so embeds the interpreter and runs the queries in the host process.
+ *
+ * libcsvclient.so provides libcsv_init, libcsv_shutdown, freeCsvBuffer and the
+ * processCsvFile, processCsvFileWithCallback, processCsvFileToBuffer and
+ * processCsvFileLimit functions with the same signatures, sending the queries
+ * to a server started with `python -m processor_py.server` instead. The
+ * server keeps a warm pool of worker processes with the compiled filters
+ * cached, it listens on the LIBCSV_SERVER_SOCKET Unix socket, /tmp/libcsv.sock
+ * by default. Queries run with the text engine, errors are written to stderr
+ * by the client.
+ */
+
+/**
+ * Start the embedded interpreter and import the processor modules once.
+ *
+ * Calling it is optional, the process functions initialize the library on
+ * their first call. It is safe to call it again or from several threads, the
+ * interpreter is only started by the first call. When the host process already
+ * runs an interpreter, it is reused and only the modules are imported.
+ *
+ * @return 0 on success, -1 when the interpreter or the modules failed to load.
+ */
+int libcsv_init(void);
+
+/**
+ * Release the processor modules and finalize the interpreter started by
+ * libcsv_init. The compiled modules cannot be loaded twice in a process, so
+ * the library can no longer be used once the interpreter is finalized.
+ *
+ * @return void
+ */
+void libcsv_shutdown(void);
+
 /**
  * Process the CSV data by applying filters and selecting columns.
  *
+ * Errors are written to stderr and the call returns, the host process is not
+ * terminated.
+ *
  * @param csv The CSV data to be processed.
  * @param selectedColumns The columns to be selected from the CSV data.
  * @param rowFilterDefinitions The filters to be applied to the CSV data.
@@ -12,6 +54,28 @@ void processCsv(const char[], const char[], const char[]);
 /**
  * Process the CSV data by applying filters and selecting columns.
  *
+ * The input engine is read from the LIBCSV_ENGINE environment variable:
+ * "text" (default) decodes every line, "mmap" scans the memory mapped file and
+ * only decodes the filtered and selected columns, "columnar" evaluates the
+ * filters over blocks of rows held as NumPy arrays (requires numpy).
+ *
+ * With the mmap engine, numeric filters are evaluated by a compiled scanner
+ * that releases the GIL, so calls from several host threads scan in parallel.
+ *
+ * Results are cached between calls when LIBCSV_CACHE_SIZE (memory budget in
+ * bytes) or LIBCSV_CACHE_DIR (on-disk tier) is set. LIBCSV_CACHE_DIR_SIZE is
+ * the byte budget of the directory, 1GB by default, the least recently used
+ * files are removed past it. Entries are keyed by the file path, mtime, size
+ * and inode, so they are dropped when the file changes.
+ *
+ * Setting LIBCSV_PROFILE to 1 writes the time, calls and rows of each stage to
+ * stderr once the query ends, any other value is the path of a JSON profile.
+ *
+ * Setting LIBCSV_ZONE_MAPS to 1 keeps the min/max and the distinct values of
+ * the filtered columns per block of about 1MB in a csvFilePath".zones"
+ * sidecar, built by the first query filtering them, so the blocks where the
+ * filters cannot match are not read.
+ *
  * @param csvFilePath The file path of the CSV to be processed.
  * @param selectedColumns The columns to be selected from the CSV data.
  * @param rowFilterDefinitions The filters to be applied to the CSV data.
@@ -19,3 +83,201 @@ void processCsv(const char[], const char[], const char[]);
  * @return void
  */
 void processCsvFile(const char[], const char[], const char[]);
+
+/**
+ * Process the CSV file in parallel by splitting it in byte ranges aligned to
+ * line breaks, each range is filtered in a worker process and the results are
+ * written in the original row order.
+ *
+ * The workers are not forked from the host, whose other threads may hold
+ * locks: they are forked from a fork server started from the interpreter of
+ * the Python installation, or spawned where there is no fork server. The
+ * ranges are processed by the calling thread when that interpreter is not
+ * found.
+ *
+ * @param csvFilePath The file path of the CSV to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param workers The amount of worker processes, 0 uses all the CPUs.
+ *
+ * @return void
+ */
+void processCsvFileParallel(const char[], const char[], const char[], int);
+
+
+/**
+ * Receives the serialized rows in chunks as they are produced. A chunk is not
+ * NUL terminated and may hold several lines or part of one.
+ *
+ * @param data The UTF-8 bytes of the chunk, only valid during the call.
+ * @param size The amount of bytes of the chunk.
+ * @param context The pointer given to the process function.
+ *
+ * @return 0 to continue, any other value stops the processing.
+ */
+typedef int (*CsvWriteCallback)(const char *data, size_t size, void *context);
+
+/**
+ * A growable buffer owned by the caller, zero initialize it before the first
+ * use and release it with freeCsvBuffer. Results are appended to it and data
+ * is kept NUL terminated.
+ */
+typedef struct {
+    char *data;
+    size_t size;
+    size_t capacity;
+} CsvBuffer;
+
+/**
+ * Process the CSV data, handing the serialized rows to a callback instead of
+ * writing them to stdout.
+ *
+ * @param csv The CSV data to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param callback Receives the serialized rows.
+ * @param context Passed as is to the callback.
+ *
+ * @return 0 on success, -1 on errors or when the callback stopped the processing.
+ */
+int processCsvWithCallback(const char[], const char[], const char[], CsvWriteCallback, void *);
+
+/**
+ * Process the CSV file, handing the serialized rows to a callback instead of
+ * writing them to stdout. The engine and the cache are configured as in
+ * processCsvFile.
+ *
+ * @param csvFilePath The file path of the CSV to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param callback Receives the serialized rows.
+ * @param context Passed as is to the callback.
+ *
+ * @return 0 on success, -1 on errors or when the callback stopped the processing.
+ */
+int processCsvFileWithCallback(const char[], const char[], const char[], CsvWriteCallback, void *);
+
+/**
+ * Process the CSV data, appending the serialized rows to a buffer.
+ *
+ * @param csv The CSV data to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param buffer The buffer the rows are appended to.
+ *
+ * @return 0 on success, -1 on errors or when the buffer could not grow.
+ */
+int processCsvToBuffer(const char[], const char[], const char[], CsvBuffer *);
+
+/**
+ * Process the CSV file, appending the serialized rows to a buffer.
+ *
+ * @param csvFilePath The file path of the CSV to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param buffer The buffer the rows are appended to.
+ *
+ * @return 0 on success, -1 on errors or when the buffer could not grow.
+ */
+int processCsvFileToBuffer(const char[], const char[], const char[], CsvBuffer *);
+
+/**
+ * Process the CSV file, writing only a page of the matching rows to stdout.
+ * The file is no longer read once limit rows are written, so previews of large
+ * files return as soon as enough rows matched. Limited queries are not cached.
+ *
+ * @param csvFilePath The file path of the CSV to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param limit The maximum amount of matching rows written, negative for all.
+ * @param offset The amount of matching rows skipped before the first written.
+ *
+ * @return void
+ */
+void processCsvFileLimit(const char[], const char[], const char[], long, long);
+
+/**
+ * Process a page of the matching rows of the CSV file, as processCsvFileLimit,
+ * handing the serialized rows to a callback.
+ *
+ * @param csvFilePath The file path of the CSV to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param limit The maximum amount of matching rows, negative for all.
+ * @param offset The amount of matching rows skipped before the first handed.
+ * @param callback Receives the serialized rows.
+ * @param context Passed as is to the callback.
+ *
+ * @return 0 on success, -1 on errors or when the callback stopped the processing.
+ */
+int processCsvFileLimitWithCallback(const char[], const char[], const char[], long, long, CsvWriteCallback, void *);
+
+/**
+ * Process a page of the matching rows of the CSV file, as processCsvFileLimit,
+ * appending the serialized rows to a buffer.
+ *
+ * @param csvFilePath The file path of the CSV to be processed.
+ * @param selectedColumns The columns to be selected from the CSV data.
+ * @param rowFilterDefinitions The filters to be applied to the CSV data.
+ * @param limit The maximum amount of matching rows, negative for all.
+ * @param offset The amount of matching rows skipped before the first appended.
+ * @param buffer The buffer the rows are appended to.
+ *
+ * @return 0 on success, -1 on errors or when the buffer could not grow.
+ */
+int processCsvFileLimitToBuffer(const char[], const char[], const char[], long, long, CsvBuffer *);
+
+/**
+ * One query of a batch. Its rows are handed to callback when it is set,
+ * appended to buffer when it is set, and written to stdout otherwise.
+ */
+typedef struct {
+    const char *selectedColumns;
+    const char *rowFilterDefinitions;
+    CsvWriteCallback callback;
+    void *context;
+    CsvBuffer *buffer;
+} CsvQuery;
+
+/**
+ * Process many queries over the CSV file in a single pass: the file is read
+ * and each line is tokenized once, then routed to every query whose filters
+ * it matches. Each output receives the same rows as processCsvFile would
+ * write for its query. Queries sharing an output, stdout or the same callback
+ * and context or buffer, write to it one after the other in query order, as
+ * consecutive processCsvFile calls would.
+ *
+ * @param csvFilePath The file path of the CSV to be processed.
+ * @param queries The queries of the batch.
+ * @param queryCount The amount of queries.
+ *
+ * @return 0 on success, -1 on errors or when a callback stopped the processing.
+ */
+int processCsvFileBatch(const char[], const CsvQuery[], size_t);
+
+/**
+ * Build the index sidecar of a CSV file, written next to it as csvFilePath
+ * followed by ".idx". The process functions then seek to the rows that may
+ * match equality and range filters on the indexed columns instead of scanning
+ * the whole file, as long as the filters keep a small fraction of the rows.
+ * The index is ignored once the mtime or the size of the file change.
+ *
+ * @param csvFilePath The file path of the CSV to be indexed.
+ * @param indexedColumns The columns to be indexed, all when empty.
+ *
+ * @return 0 on success, -1 on errors.
+ */
+int indexCsvFile(const char[], const char[]);
+
+/**
+ * Release the memory of a buffer filled by processCsvToBuffer,
+ * processCsvFileToBuffer or processCsvFileLimitToBuffer, leaving it empty and
+ * ready to be reused.
+ *
+ * @param buffer The buffer to be released.
+ *
+ * @return void
+ */
+void freeCsvBuffer(CsvBuffer *);
+
+#endif